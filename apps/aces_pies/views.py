@@ -1,6 +1,15 @@
 """Views for the ACES/PIES application."""
 from django.shortcuts import render
 
+from apps.autocare.query.aces import parts_for_vehicle
+
+
 def vehicle_search(request):
     """Search products by vehicle."""
-    return render(request, 'aces_pies/vehicle_search.html')
+    context = {}
+    vehicle_id = request.GET.get('vehicle_id')
+    if vehicle_id and vehicle_id.isdigit():
+        part_type_ids = [int(p) for p in request.GET.getlist('part_type_id') if p.isdigit()]
+        context['vehicle_id'] = int(vehicle_id)
+        context['fitment'] = parts_for_vehicle(int(vehicle_id), part_type_ids or None)
+    return render(request, 'aces_pies/vehicle_search.html', context)
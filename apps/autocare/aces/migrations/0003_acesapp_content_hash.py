@@ -0,0 +1,24 @@
+# Generated by Django 5.2.9 on 2026-10-18 03:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("autocare_aces", "0002_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="acesapp",
+            name="content_hash",
+            field=models.CharField(max_length=40, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="acesapp",
+            index=models.Index(
+                fields=["brand_aaiaid", "app_id"], name="app_brand_a_49299e_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 5.2.9 on 2026-10-18 03:42
+
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("autocare_aces", "0003_acesapp_content_hash"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AcesFitment",
+            fields=[
+                (
+                    "app",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="fitment",
+                        serialize=False,
+                        to="autocare_aces.acesapp",
+                    ),
+                ),
+                ("source_file", models.TextField()),
+                ("part_number", models.CharField(max_length=45)),
+                ("part_type_id", models.IntegerField()),
+                ("position_id", models.IntegerField(null=True)),
+                ("brand_aaiaid", models.CharField(max_length=4, null=True)),
+                ("year_from", models.IntegerField(null=True)),
+                ("year_to", models.IntegerField(null=True)),
+                ("base_vehicle_id", models.IntegerField(null=True)),
+                ("make_id", models.IntegerField(null=True)),
+                ("model_id", models.IntegerField(null=True)),
+                ("submodel_id", models.IntegerField(null=True)),
+                (
+                    "attribute_keys",
+                    django.contrib.postgres.fields.ArrayField(
+                        base_field=models.BigIntegerField(), default=list, size=None
+                    ),
+                ),
+            ],
+            options={
+                "db_table": '"autocare_aces"."fitment"',
+                "indexes": [
+                    django.contrib.postgres.indexes.GinIndex(
+                        fields=["attribute_keys"], name="fitment_attribu_b17aae_gin"
+                    ),
+                    models.Index(
+                        fields=["base_vehicle_id", "year_from", "year_to"],
+                        name="fitment_base_ve_86c9b5_idx",
+                    ),
+                    models.Index(
+                        fields=["make_id", "model_id", "year_from", "year_to"],
+                        name="fitment_make_id_ee0996_idx",
+                    ),
+                    models.Index(
+                        fields=["part_type_id"], name="fitment_part_ty_649f70_idx"
+                    ),
+                    models.Index(
+                        fields=["part_number"], name="fitment_part_nu_ed6b9d_idx"
+                    ),
+                    models.Index(
+                        fields=["source_file"], name="fitment_source__b25c20_idx"
+                    ),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,121 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Drop the FOREIGN KEY constraints of the AcesAppVehicle vehicle axis
+# (BaseVehicle/Make/Model/SubModel): ACES files published against a newer
+# VCdb reference ids the local VCdb does not have yet, and one such id
+# failed the whole file at commit.
+#
+# The table name is schema-qualified, which the schema editor's
+# constraint introspection does not resolve (AlterField would be a
+# no-op), so constraint names are read from the catalog.
+
+FIELDS = ["base_vehicle", "make", "model", "submodel"]
+
+
+def _foreign_keys(cursor, table, column):
+    cursor.execute(
+        "SELECT c.conname FROM pg_constraint c "
+        "JOIN pg_attribute a ON a.attrelid = c.conrelid AND a.attnum = ANY (c.conkey) "
+        "WHERE c.conrelid = %s::regclass AND c.contype = 'f' AND a.attname = %s",
+        [table, column],
+    )
+    return [name for (name,) in cursor.fetchall()]
+
+
+def drop_constraints(apps, schema_editor):
+    model = apps.get_model("autocare_aces", "AcesAppVehicle")
+    table = model._meta.db_table
+    with schema_editor.connection.cursor() as cursor:
+        for name in FIELDS:
+            column = model._meta.get_field(name).column
+            for conname in _foreign_keys(cursor, table, column):
+                cursor.execute(f'ALTER TABLE {table} DROP CONSTRAINT "{conname}"')
+
+
+def add_constraints(apps, schema_editor):
+    """NOT VALID: rows loaded meanwhile may reference ids VCdb lacks"""
+    model = apps.get_model("autocare_aces", "AcesAppVehicle")
+    table = model._meta.db_table
+    with schema_editor.connection.cursor() as cursor:
+        for name in FIELDS:
+            field = model._meta.get_field(name)
+            target = field.remote_field.model._meta
+            cursor.execute(
+                f'ALTER TABLE {table} ADD CONSTRAINT "app_vehicle_{field.column}_fk" '
+                f'FOREIGN KEY ("{field.column}") '
+                f'REFERENCES {target.db_table} ("{field.target_field.column}") '
+                f"DEFERRABLE INITIALLY DEFERRED NOT VALID"
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("autocare_aces", "0004_acesfitment"),
+        ("autocare_vcdb", "0002_brakeconfig_front_rear_brake_type"),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunPython(drop_constraints, add_constraints),
+            ],
+            state_operations=[
+                migrations.AlterField(
+                    model_name="acesappvehicle",
+                    name="base_vehicle",
+                    field=models.ForeignKey(
+                        blank=True,
+                        db_column="BaseVehicleID",
+                        db_constraint=False,
+                        null=True,
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        related_name="aces_applications",
+                        to="autocare_vcdb.basevehicle",
+                    ),
+                ),
+                migrations.AlterField(
+                    model_name="acesappvehicle",
+                    name="make",
+                    field=models.ForeignKey(
+                        blank=True,
+                        db_column="MakeID",
+                        db_constraint=False,
+                        null=True,
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        related_name="aces_applications",
+                        to="autocare_vcdb.make",
+                    ),
+                ),
+                migrations.AlterField(
+                    model_name="acesappvehicle",
+                    name="model",
+                    field=models.ForeignKey(
+                        blank=True,
+                        db_column="ModelID",
+                        db_constraint=False,
+                        null=True,
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        related_name="aces_applications",
+                        to="autocare_vcdb.vehiclemodel",
+                    ),
+                ),
+                migrations.AlterField(
+                    model_name="acesappvehicle",
+                    name="submodel",
+                    field=models.ForeignKey(
+                        blank=True,
+                        db_column="SubModelID",
+                        db_constraint=False,
+                        null=True,
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        related_name="aces_applications",
+                        to="autocare_vcdb.submodel",
+                    ),
+                ),
+            ],
+        ),
+    ]
@@ -1,3 +1,5 @@
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
 from django.db import models
 
 
@@ -28,12 +30,16 @@ class AcesApp(models.Model):
     asset_item_order = models.IntegerField(null=True)
     asset_item_ref = models.CharField(max_length=255, null=True)
 
+    # SHA-1 of the parsed <App> (action excluded); lets delta loads skip unchanged apps
+    content_hash = models.CharField(max_length=40, null=True)
+
     class Meta:
         db_table = '"autocare_aces"."app"'
         unique_together = [("source_file", "app_id")]
         indexes = [
             models.Index(fields=["part_number"]),
             models.Index(fields=["part_type_id"]),
+            models.Index(fields=["brand_aaiaid", "app_id"]),
         ]
 
 
@@ -45,6 +51,9 @@ class AcesAppVehicle(models.Model):
     """Vehicle identification and primary attributes"""
     app = models.OneToOneField(AcesApp, on_delete=models.CASCADE, primary_key=True)
 
+    # The vehicle axis FKs carry no database constraint: files published
+    # against a newer VCdb reference ids the local VCdb does not have yet,
+    # and those apps must still load. Ingestion reports unmatched ids.
     # base_vehicle_id = models.IntegerField(null=True, db_index=True)
     base_vehicle = models.ForeignKey(
         'autocare_vcdb.BaseVehicle',
@@ -52,6 +61,7 @@ class AcesAppVehicle(models.Model):
         to_field='base_vehicle_id',
         related_name='aces_applications',
         on_delete=models.DO_NOTHING,
+        db_constraint=False,
         null=True,
         blank=True,
     )
@@ -62,6 +72,7 @@ class AcesAppVehicle(models.Model):
         to_field='make_id',
         related_name='aces_applications',
         on_delete=models.DO_NOTHING,
+        db_constraint=False,
         null=True,
         blank=True,
     )
@@ -72,6 +83,7 @@ class AcesAppVehicle(models.Model):
         to_field='model_id',
         related_name='aces_applications',
         on_delete=models.DO_NOTHING,
+        db_constraint=False,
         null=True,
         blank=True,
     )
@@ -82,6 +94,7 @@ class AcesAppVehicle(models.Model):
         to_field='submodel_id',
         related_name='aces_applications',
         on_delete=models.DO_NOTHING,
+        db_constraint=False,
         null=True,
         blank=True,
     )
@@ -639,4 +652,104 @@ ACES_TYPED_TABLES = {
     "mfr": ("mfr_id", AcesMfr),
     "mfr_body_code": ("mfr_body_code_id", AcesMfrBodyCode),
     "region": ("region_id", AcesRegion),
-}
\ No newline at end of file
+}
+
+
+# =====================================================
+# FITMENT FACT TABLE
+# =====================================================
+
+# Stable per-attribute codes for AcesFitment.attribute_keys.
+# Keys are stored as (code << 32) + attribute id, so these numbers are
+# persisted: append new attributes, never renumber existing ones.
+FITMENT_ATTRIBUTE_CODES = {
+    "body_type": 1,
+    "body_num_doors": 2,
+    "bed_type": 3,
+    "bed_length": 4,
+    "wheel_base": 5,
+    "brake_abs": 6,
+    "brake_system": 7,
+    "front_brake_type": 8,
+    "rear_brake_type": 9,
+    "drive_type": 10,
+    "steering_system": 11,
+    "steering_type": 12,
+    "front_spring_type": 13,
+    "rear_spring_type": 14,
+    "engine_base": 15,
+    "engine_block": 16,
+    "engine_bore_stroke": 17,
+    "engine_designation": 18,
+    "engine_vin": 19,
+    "engine_version": 20,
+    "engine_mfr": 21,
+    "cylinder_head_type": 22,
+    "fuel_type": 23,
+    "fuel_delivery_type": 24,
+    "fuel_delivery_sub_type": 25,
+    "fuel_system_control_type": 26,
+    "fuel_system_design": 27,
+    "ignition_system_type": 28,
+    "aspiration": 29,
+    "power_output": 30,
+    "valves_per_engine": 31,
+    "transmission_base": 32,
+    "transmission_type": 33,
+    "transmission_control_type": 34,
+    "transmission_num_speeds": 35,
+    "transmission_mfr": 36,
+    "transmission_mfr_code": 37,
+    "trans_elec_controlled": 38,
+    "equipment_base": 39,
+    "equipment_model": 40,
+    "mfr": 41,
+    "mfr_body_code": 42,
+    "region": 43,
+    "vehicle_type": 44,
+}
+
+
+class AcesFitment(models.Model):
+    """
+    Denormalised one-row-per-app fitment fact.
+
+    Built from AcesApp, AcesAppVehicle, the typed attribute tables and
+    AcesVehicleType by services.aces_fitment.refresh_fitment. Every
+    attribute id the app is constrained by is folded into
+    ``attribute_keys`` (see FITMENT_ATTRIBUTE_CODES) so "which parts fit
+    this configuration" is a single GIN lookup instead of a many-way join.
+    """
+    app = models.OneToOneField(
+        AcesApp,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="fitment",
+    )
+    source_file = models.TextField()
+
+    part_number = models.CharField(max_length=45)
+    part_type_id = models.IntegerField()
+    position_id = models.IntegerField(null=True)
+    brand_aaiaid = models.CharField(max_length=4, null=True)
+
+    year_from = models.IntegerField(null=True)
+    year_to = models.IntegerField(null=True)
+
+    base_vehicle_id = models.IntegerField(null=True)
+    make_id = models.IntegerField(null=True)
+    model_id = models.IntegerField(null=True)
+    submodel_id = models.IntegerField(null=True)
+
+    attribute_keys = ArrayField(models.BigIntegerField(), default=list)
+
+    class Meta:
+        db_table = '"autocare_aces"."fitment"'
+        indexes = [
+            GinIndex(fields=["attribute_keys"]),
+            models.Index(fields=["base_vehicle_id", "year_from", "year_to"]),
+            models.Index(fields=["make_id", "model_id", "year_from", "year_to"]),
+            models.Index(fields=["part_type_id"]),
+            models.Index(fields=["part_number"]),
+            models.Index(fields=["source_file"]),
+        ]
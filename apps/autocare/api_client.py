@@ -1,6 +1,10 @@
 import time
+from typing import Any
+
+import orjson
 import requests
 from requests.adapters import HTTPAdapter
+from urllib3.util import make_headers
 from urllib3.util.retry import Retry
 
 from django.conf import settings
@@ -19,6 +23,38 @@ class AutocareAPIFatalError(AutocareAPIError):
     """Permanent error (do not retry)."""
 
 
+def conditional_headers(validators: dict | None) -> dict:
+    """If-None-Match / If-Modified-Since headers for stored validators"""
+    headers = {}
+    if validators:
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+    return headers
+
+
+def response_validators(response: requests.Response) -> dict:
+    """ETag / Last-Modified of a response, for storing with the page"""
+    return {
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+    }
+
+
+def decode_json(response: requests.Response, chunk_size: int = 1 << 16) -> Any:
+    """
+    Decode a (streamed) JSON response body with orjson.
+
+    Reads the decompressed body in chunks straight into one buffer, which
+    skips requests' text decoding and charset detection on large pages.
+    """
+    buf = bytearray()
+    for chunk in response.iter_content(chunk_size=chunk_size):
+        buf += chunk
+    return orjson.loads(buf)
+
+
 class AutocareAPIClient:
     """
     Resilient Autocare API client.
@@ -55,9 +91,25 @@ class AutocareAPIClient:
         session.mount("https://", adapter)
         session.mount("http://", adapter)
 
+        # gzip/deflate, plus br (and zstd) when their decoders are installed
+        session.headers.update(make_headers(accept_encoding=True))
+
         return session
 
-    def get(self, path: str, params: dict | None = None) -> requests.Response:
+    def get(
+        self,
+        path: str,
+        params: dict | None = None,
+        validators: dict | None = None,
+    ) -> requests.Response:
+        """
+        GET an API path (or absolute pagination URL).
+
+        ``validators`` ({"etag": ..., "last_modified": ...}, e.g. from a
+        stored raw page) make the request conditional; an unchanged page
+        comes back as a bodiless 304 response. The body is streamed, so
+        decode it with decode_json().
+        """
         token = AutocareOAuthClient.get_access_token()
 
         # Absolute pagination URL
@@ -75,15 +127,22 @@ class AutocareAPIClient:
                 headers={
                     "Authorization": f"Bearer {token}",
                     "Accept": "application/json",
+                    **conditional_headers(validators),
                 },
                 timeout=(5, 180),
+                stream=True,
             )
         except requests.exceptions.Timeout as exc:
             raise AutocareAPIRetryableError(f"Timeout fetching {url}") from exc
         except requests.exceptions.ConnectionError as exc:
             raise AutocareAPIRetryableError(f"Connection error fetching {url}") from exc
 
+        if response.status_code == 304:
+            response.close()
+            return response
         if response.status_code == 401:
+            # Drop the shared token so the next request fetches a new one
+            AutocareOAuthClient.invalidate(token)
             raise AutocareAPIFatalError("Unauthorized (invalid OAuth token)")
         if response.status_code == 403:
             raise AutocareAPIFatalError("Forbidden (permission issue)")
@@ -133,6 +192,8 @@ class AutocareAPIClient:
 
         # Match get() semantics exactly
         if response.status_code == 401:
+            # Drop the shared token so the next request fetches a new one
+            AutocareOAuthClient.invalidate(token)
             raise AutocareAPIFatalError("Unauthorized (invalid OAuth token)")
         if response.status_code == 403:
             raise AutocareAPIFatalError("Forbidden (permission issue)")
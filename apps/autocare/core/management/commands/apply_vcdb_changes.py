@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.autocare.api_client import AutocareAPIClient
+from apps.autocare.domain import fitment, vehicle_hierarchy
+from apps.autocare.ingest.fetch import RateLimiter
+from apps.autocare.ingest.plans import DEFAULT_PAGE_SIZE, VCDB_BASELINE_AS_OF
+from apps.autocare.ingest.vcdb_changes import apply_changes, fetch_changes, last_applied_version
+
+
+class Command(BaseCommand):
+    help = (
+        "Bring VCdb tables up to date from VCdbChanges instead of a full replay.\n"
+        "Reads changes since the last applied VersionDate, pulls only the affected\n"
+        "tables with SinceDate, and applies upserts/deletes per table in FK order."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--since",
+            default=None,
+            help=(
+                "SinceDate for the pulls (default: last applied VersionDate, "
+                f"or the baseline as-of {VCDB_BASELINE_AS_OF} on first run)"
+            ),
+        )
+        parser.add_argument("--page-size", type=int, default=DEFAULT_PAGE_SIZE)
+        parser.add_argument("--concurrency", type=int, default=8, help="Pages fetched in parallel")
+        parser.add_argument("--rate", type=float, default=None, help="Max requests per second")
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--allow-missing",
+            action="store_true",
+            help="Apply even if some changed rows were not returned by the SinceDate pull",
+        )
+        parser.add_argument("--dry-run", action="store_true", help="Fetch and report, write nothing")
+
+    def handle(self, *args, **opts):
+        after = last_applied_version()
+        since = opts["since"] or (timezone.localtime(after).date().isoformat() if after else VCDB_BASELINE_AS_OF)
+
+        self.stdout.write(f"Last applied VersionDate: {after or '-'}; pulling changes since {since}")
+
+        changeset = fetch_changes(
+            AutocareAPIClient("vcdb"),
+            since=since,
+            after=after,
+            page_size=opts["page_size"],
+            concurrency=opts["concurrency"],
+            limiter=RateLimiter(opts["rate"], max_concurrent=opts["concurrency"]),
+            stdout=self.stdout,
+        )
+
+        if changeset.failed_pages:
+            raise CommandError(
+                f"Pages failed: {changeset.failed_pages}. "
+                f"Rerun to resume, or repair with: vcdb_raw_gaps --since {since} --refetch"
+            )
+
+        if not changeset.changes:
+            self.stdout.write(self.style.SUCCESS("No new changes."))
+            return
+
+        for name, tc in changeset.tables.items():
+            self.stdout.write(
+                f"{name}: {len(tc.upsert_ids)} upserts ({len(tc.rows)} rows pulled), "
+                f"{len(tc.delete_ids)} deletes"
+            )
+        for table, count in changeset.unknown_tables.items():
+            self.stdout.write(self.style.WARNING(f"{table}: {count} changes for a table not in the VCdb plan"))
+
+        missing = changeset.missing
+        for name, ids in missing.items():
+            sample = ", ".join(map(str, sorted(ids)[:10]))
+            self.stdout.write(self.style.WARNING(f"{name}: {len(ids)} changed rows not returned ({sample})"))
+
+        if opts["dry_run"]:
+            self.stdout.write(self.style.WARNING("Dry run: nothing written."))
+            return
+
+        if missing and not opts["allow_missing"]:
+            raise CommandError("Changed rows missing from the SinceDate pulls; rerun with --allow-missing to apply anyway")
+
+        # Fitment index of the version being updated, refreshed in place below
+        fitment_index = fitment.get_index()
+
+        result = apply_changes(changeset, batch_size=opts["batch_size"], stdout=self.stdout)
+
+        # Workers pick up the new indexes on their next version check
+        hierarchy = vehicle_hierarchy.publish_snapshot()
+        self.stdout.write(f"Published vehicle hierarchy {hierarchy.version} ({len(hierarchy):,} vehicles)")
+
+        fitment_index = fitment.publish_snapshot(
+            fitment.refresh_index(fitment_index, result.touched_vehicles)
+        )
+        self.stdout.write(
+            f"Published fitment index {fitment_index.version} "
+            f"({sum(map(len, result.touched_vehicles.values())):,} vehicle links refreshed)"
+        )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Applied {result.recorded} changes: "
+                f"{sum(result.upserted.values())} rows upserted, "
+                f"{sum(result.deleted.values())} deleted; "
+                f"now at VersionDate {last_applied_version()}"
+            )
+        )
@@ -0,0 +1,88 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.autocare.ingest.raw_store import prune_orphan_blobs
+from apps.autocare.services.raw_partitions import (
+    PARTITIONED_SOURCES,
+    detach_snapshot_partition,
+    drop_snapshot_partition,
+    ensure_snapshot_partition,
+    list_partitions,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Manage as-of snapshot partitions of AutocareRawRecord.\n"
+        "  list                        show snapshot partitions\n"
+        "  attach --db X --asof D      create/re-attach the partition for D (moves rows out of default)\n"
+        "  detach --db X --asof D      detach D, keeping its rows as a standalone table\n"
+        "  drop   --db X --asof D      drop D and all its pages\n"
+        "  drop   --db X --before D    drop every snapshot older than D"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("action", choices=["list", "attach", "detach", "drop"])
+        parser.add_argument("--db", choices=PARTITIONED_SOURCES)
+        parser.add_argument("--asof", help="Snapshot as_of_date, e.g. 2024-01-01")
+        parser.add_argument("--before", help="drop only: every snapshot with as_of_date < this")
+        parser.add_argument(
+            "--prune-blobs",
+            action="store_true",
+            help="drop only: also delete raw blobs no longer referenced",
+        )
+
+    def handle(self, *args, **opts):
+        action = opts["action"]
+
+        if action == "list":
+            self._list(opts["db"])
+            return
+
+        if not opts["db"]:
+            raise CommandError(f"{action} requires --db")
+
+        if action == "drop" and opts["before"]:
+            if opts["asof"]:
+                raise CommandError("Use either --asof or --before, not both")
+            targets = sorted(
+                p.as_of_date
+                for p in list_partitions(opts["db"])
+                if p.as_of_date and p.as_of_date < opts["before"]
+            )
+        elif opts["asof"]:
+            targets = [opts["asof"]]
+        else:
+            raise CommandError(f"{action} requires --asof" + (" or --before" if action == "drop" else ""))
+
+        for as_of in targets:
+            try:
+                if action == "attach":
+                    created = ensure_snapshot_partition(opts["db"], as_of)
+                    msg = "attached" if created else "already attached"
+                elif action == "detach":
+                    msg = f"detached as {detach_snapshot_partition(opts['db'], as_of)}"
+                else:
+                    msg = f"dropped {drop_snapshot_partition(opts['db'], as_of)}"
+            except ValueError as exc:
+                raise CommandError(str(exc)) from exc
+
+            self.stdout.write(self.style.SUCCESS(f"{opts['db']} {as_of}: {msg}"))
+
+        if not targets:
+            self.stdout.write(self.style.WARNING("No matching snapshots."))
+
+        if action == "drop" and opts["prune_blobs"]:
+            pruned = prune_orphan_blobs()
+            self.stdout.write(self.style.SUCCESS(f"Pruned {pruned:,} orphan blobs"))
+
+    def _list(self, db):
+        parts = list_partitions(db)
+        if not parts:
+            self.stdout.write(self.style.WARNING("No snapshot partitions."))
+            return
+
+        for p in parts:
+            state = "attached" if p.attached else "DETACHED"
+            self.stdout.write(
+                f"{p.source_db:5} {p.as_of_date or '?':12} {state:9} ~{p.approx_rows:,} rows  {p.table}"
+            )
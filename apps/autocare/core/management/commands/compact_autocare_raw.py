@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+
+from apps.autocare.ingest.raw_store import compact_records, prune_orphan_blobs, storage_stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Move inline JSONB raw payloads into the compressed, content-addressed blob store.\n"
+        "Resumable: each batch commits on its own."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--db",
+            choices=["vcdb", "pcdb", "padb", "qdb", "brand"],
+            help="Only compact records of this source db",
+        )
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument(
+            "--prune",
+            action="store_true",
+            help="Also delete blobs no raw record references",
+        )
+
+    def handle(self, *args, **opts):
+        n = compact_records(
+            batch_size=opts["batch_size"],
+            source_db=opts["db"],
+            stdout=self.stdout,
+        )
+        self.stdout.write(self.style.SUCCESS(f"Compacted {n:,} raw records"))
+
+        if opts["prune"]:
+            pruned = prune_orphan_blobs()
+            self.stdout.write(self.style.SUCCESS(f"Pruned {pruned:,} orphan blobs"))
+
+        stats = storage_stats()
+        ratio = stats["raw_bytes"] / stats["stored_bytes"] if stats["stored_bytes"] else 0
+        self.stdout.write(
+            f"{stats['blobs']:,} blobs: {stats['raw_bytes']:,} bytes raw, "
+            f"{stats['stored_bytes']:,} stored ({ratio:0.1f}x)"
+        )
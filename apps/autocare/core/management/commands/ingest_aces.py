@@ -5,13 +5,21 @@ Usage:
     python manage.py ingest_aces /path/to/aces_file.xml
     python manage.py ingest_aces /path/to/aces_file.xml --verify
     python manage.py ingest_aces /path/to/aces_file.xml --batch-size 10000
+    python manage.py ingest_aces /path/to/aces_file.xml --stream
+    python manage.py ingest_aces /path/to/aces_file.xml --stream --copy
+    python manage.py ingest_aces /path/to/aces_file.xml --workers 8
+    python manage.py ingest_aces /path/to/weekly_delta.xml --delta --stream
+    python manage.py ingest_aces /path/to/aces_file.xml --skip-fitment
+    python manage.py ingest_aces /path/to/aces_file.xml --backfill-vehicles
 """
 
 from django.core.management.base import BaseCommand, CommandError
 import os
 
 from apps.autocare.core.management.commands.verify_aces import verify_aces_integrity
-from apps.autocare.services.aces_ingest import ingest_aces_file
+from apps.autocare.services.aces_fitment import rebuild_fitment_for_file, refresh_fitment
+from apps.autocare.services.aces_ingest import backfill_vehicle_axis, ingest_aces_file
+from apps.autocare.services.aces_parallel import ingest_aces_file_parallel
 from apps.data_sync.utils.db_silence import silence_db_debug
 
 
@@ -35,6 +43,40 @@ class Command(BaseCommand):
             action='store_true',
             help='Run integrity verification after ingestion'
         )
+        parser.add_argument(
+            '--stream',
+            action='store_true',
+            help='Stream <App> elements instead of parsing the whole file (memory bounded by --batch-size)'
+        )
+        parser.add_argument(
+            '--copy',
+            action='store_true',
+            help='Load each chunk with PostgreSQL COPY instead of bulk INSERTs'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Transform chunks in N processes and load via a staging schema (implies --stream --copy)'
+        )
+        parser.add_argument(
+            '--delta',
+            action='store_true',
+            help='Apply App action="A"/"D" by (brand_aaiaid, app_id) and skip apps whose content is unchanged'
+        )
+        parser.add_argument(
+            '--skip-fitment',
+            action='store_true',
+            help='Do not refresh the fitment fact table after ingestion'
+        )
+        parser.add_argument(
+            '--backfill-vehicles',
+            action='store_true',
+            help=(
+                'Do not ingest: re-read an already ingested file, fill its apps\' '
+                'BaseVehicle/Make/Model/SubModel columns and rebuild its fitment rows'
+            )
+        )
         parser.add_argument(
             '--no-transaction',
             action='store_true',
@@ -45,11 +87,26 @@ class Command(BaseCommand):
         file_path = options['file_path']
         batch_size = options['batch_size']
         verify = options['verify']
+        stream = options['stream']
+        use_copy = options['copy']
+        workers = options['workers']
+        delta = options['delta']
+        skip_fitment = options['skip_fitment']
 
         # Validate file exists
         if not os.path.exists(file_path):
             raise CommandError(f'File not found: {file_path}')
 
+        if options['backfill_vehicles']:
+            with silence_db_debug():
+                backfill_vehicle_axis(file_path, stdout=self.stdout, batch_size=batch_size)
+                rebuild_fitment_for_file(file_path, stdout=self.stdout)
+            self.stdout.write(self.style.SUCCESS('\n✓ Vehicle axis backfilled'))
+            return
+
+        if delta and workers > 1:
+            raise CommandError('--delta cannot be combined with --workers')
+
         if not file_path.lower().endswith('.xml'):
             self.stdout.write(
                 self.style.WARNING(
@@ -64,16 +121,32 @@ class Command(BaseCommand):
 
         try:
             with silence_db_debug():
-                stats = ingest_aces_file(
-                    path=file_path,
-                    stdout=self.stdout,
-                    batch_size=batch_size
-                )
+                if workers > 1:
+                    stats = ingest_aces_file_parallel(
+                        path=file_path,
+                        stdout=self.stdout,
+                        batch_size=batch_size,
+                        workers=workers,
+                    )
+                else:
+                    stats = ingest_aces_file(
+                        path=file_path,
+                        stdout=self.stdout,
+                        batch_size=batch_size,
+                        stream=stream,
+                        use_copy=use_copy,
+                        delta=delta,
+                    )
 
             self.stdout.write(
                 self.style.SUCCESS('\n✓ Ingestion completed successfully!')
             )
 
+            if not skip_fitment:
+                self.stdout.write('\nRefreshing fitment fact table...\n')
+                with silence_db_debug():
+                    refresh_fitment(source_file=file_path, stdout=self.stdout)
+
             # Run verification if requested
             if verify:
                 self.stdout.write('\nRunning integrity verification...')
@@ -3,8 +3,16 @@ import requests
 
 from django.core.management.base import BaseCommand, CommandError
 
-from apps.autocare.api_client import AutocareAPIClient
+from apps.autocare.api_client import (
+    AutocareAPIClient,
+    AutocareAPIRetryableError,
+    decode_json,
+    response_validators,
+)
 from apps.autocare.core.models import AutocareRawRecord
+from apps.autocare.ingest.fetch import RateLimiter, ingest_endpoint_concurrent
+from apps.autocare.ingest.raw_store import attach_blobs
+from apps.autocare.services.raw_partitions import ensure_snapshot_partition
 from apps.autocare.pagination import extract_pagination
 from apps.autocare.utils import get_record_count
 from apps.autocare.ingest.plans import EndpointSpec
@@ -32,6 +40,29 @@ class Command(BaseCommand):
         parser.add_argument("--mode", choices=["debug", "full", "incremental"], default="full")
         parser.add_argument("--start-page", type=int)
         parser.add_argument("--resume", action="store_true")
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=1,
+            help="Fetch pages N at a time by page number (default 1 = follow nextPageLink sequentially)",
+        )
+        parser.add_argument(
+            "--rate",
+            type=float,
+            default=None,
+            help="Max requests per second across all concurrent fetches",
+        )
+        parser.add_argument(
+            "--write-batch",
+            type=int,
+            default=20,
+            help="Pages per bulk insert in concurrent mode",
+        )
+        parser.add_argument(
+            "--revalidate",
+            action="store_true",
+            help="Concurrent mode: re-request stored pages conditionally (ETag/Last-Modified)",
+        )
 
     # ============================================================
     # EndpointSpec resolution
@@ -73,6 +104,8 @@ class Command(BaseCommand):
             params["SinceDate"] = options["since"]
         if options["asof"]:
             params["AsOfDate"] = options["asof"]
+            # Snapshot pages land in their own raw partition
+            ensure_snapshot_partition(spec.db, options["asof"])
 
         # --------------------------------------------------------
         # Resume logic
@@ -97,30 +130,56 @@ class Command(BaseCommand):
                 start_page = last_page + 1
                 self.stdout.write(self.style.WARNING(f"Resuming from page {start_page}"))
 
+        if options["concurrency"] > 1:
+            self._handle_concurrent(client, spec, start_page, options)
+            return
+
         if start_page:
             params["pageNumber"] = start_page
 
         next_url = spec.request_path
+        skipped_pages = []
 
         # --------------------------------------------------------
         # Main ingest loop
         # --------------------------------------------------------
         while next_url:
+            response = pagination = None
             try:
                 response = client.get(next_url, params=params)
-            except (requests.exceptions.ReadTimeout, requests.exceptions.ConnectionError) as exc:
-                page = params.get("pageNumber") if params else None
-                self.stderr.write(self.style.ERROR(f"⚠ Request failed on page {page} — skipping"))
+                pagination = extract_pagination(response)
+                # The body is streamed: a dropped connection or a truncated
+                # compressed body surfaces here, not in client.get()
+                data = decode_json(response)
+            except (
+                AutocareAPIRetryableError,
+                requests.exceptions.ReadTimeout,
+                requests.exceptions.ConnectionError,
+                requests.exceptions.ChunkedEncodingError,
+                requests.exceptions.ContentDecodingError,
+                ValueError,
+            ) as exc:
+                if pagination:
+                    page = pagination.get("currentPage")
+                else:
+                    page = params.get("pageNumber") if params else None
+                self.stderr.write(
+                    self.style.ERROR(f"⚠ Request failed on page {page} ({type(exc).__name__}) — skipping")
+                )
+                skipped_pages.append(page)
 
+                # Headers arrived: the next page is still known
+                if pagination and pagination.get("nextPageLink"):
+                    next_url = pagination["nextPageLink"]
+                    params = None
+                    time.sleep(1)
+                    continue
                 if params and "pageNumber" in params:
                     params["pageNumber"] += 1
                     time.sleep(1)
                     continue
                 break
 
-            data = response.json()
-            pagination = extract_pagination(response)
-
             page_number = pagination.get("currentPage") if pagination else None
             page_size = pagination.get("pageSize") if pagination else None
 
@@ -135,7 +194,7 @@ class Command(BaseCommand):
             if exists:
                 self.stdout.write(self.style.WARNING(f"Skipping duplicate page {page_number}"))
             else:
-                AutocareRawRecord.objects.create(
+                record = AutocareRawRecord(
                     source_db=spec.db,
                     endpoint_key=spec.key,
                     request_path=spec.request_path,
@@ -143,11 +202,15 @@ class Command(BaseCommand):
                     as_of_date=options["asof"],
                     page_number=page_number,
                     page_size=page_size,
+                    total_pages=pagination.get("totalPages") if pagination else None,
                     http_status=response.status_code,
                     record_count=get_record_count(data),
                     payload=data,
                     ingestion_mode=options["mode"],
+                    **response_validators(response),
                 )
+                attach_blobs([record])
+                record.save()
                 self.stdout.write(self.style.SUCCESS(f"Page {page_number} ingested"))
 
             # ----------------------------------------------------
@@ -160,3 +223,47 @@ class Command(BaseCommand):
                 break
 
             time.sleep(0.5)
+
+        if skipped_pages:
+            asof = f" --asof {options['asof']}" if options["asof"] else ""
+            self.stderr.write(
+                self.style.ERROR(
+                    f"⚠ {len(skipped_pages)} pages skipped: {skipped_pages}. "
+                    f"Repair with: manage.py vcdb_raw_gaps --db {spec.db}{asof} "
+                    f"--endpoint {spec.key} --refetch"
+                )
+            )
+
+    # ============================================================
+    # Concurrent mode
+    # ============================================================
+
+    def _handle_concurrent(self, client, spec: EndpointSpec, start_page, options) -> None:
+        result = ingest_endpoint_concurrent(
+            client,
+            spec,
+            since=options["since"],
+            asof=options["asof"],
+            page_size=options["pagesize"],
+            mode=options["mode"],
+            start_page=start_page,
+            concurrency=options["concurrency"],
+            limiter=RateLimiter(options["rate"]),
+            write_batch=options["write_batch"],
+            revalidate=options["revalidate"],
+            stdout=self.stdout,
+        )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{spec.key}: {result.written} pages ingested, "
+                f"{result.not_modified} not modified, "
+                f"{result.skipped_existing} already stored"
+            )
+        )
+        if result.failed_pages:
+            self.stderr.write(
+                self.style.ERROR(
+                    f"⚠ {len(result.failed_pages)} pages failed: {result.failed_pages}"
+                )
+            )
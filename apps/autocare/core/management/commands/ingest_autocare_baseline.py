@@ -1,67 +1,118 @@
-import time
-import subprocess
 from django.core.management.base import BaseCommand, CommandError
 
-from apps.autocare.ingest.plans import get_dataset, DEFAULT_PAGE_SIZE
-from apps.autocare.core.models import IngestState
+from apps.autocare.ingest.baseline import run_baseline
+from apps.autocare.ingest.plans import get_dataset
 
 
 class Command(BaseCommand):
+    help = (
+        "Pull the baseline plan of one or more datasets into raw storage, in-process.\n"
+        "Endpoints run concurrently on shared per-host HTTP clients; IngestState is\n"
+        "recorded per endpoint once all of its pages are stored."
+    )
+
     def add_arguments(self, parser):
-        parser.add_argument("--db", required=True)
-        parser.add_argument("--asof", default=None)
+        parser.add_argument(
+            "--db",
+            required=True,
+            help="Dataset name, or comma-separated list to overlap runs (e.g. vcdb,pcdb,padb,qdb)",
+        )
+        parser.add_argument(
+            "--asof",
+            action="append",
+            default=[],
+            metavar="[DB=]DATE",
+            help=(
+                "As-of date per dataset, e.g. --asof vcdb=2024-01-01 --asof pcdb=2024-02-01 "
+                "(or comma-separated); a bare DATE applies to every dataset"
+            ),
+        )
         parser.add_argument("--resume", action="store_true")
         parser.add_argument("--retries", type=int, default=3)
-        parser.add_argument("--sleep", type=float, default=0.5)
+        parser.add_argument(
+            "--revalidate",
+            action="store_true",
+            help="Re-request stored pages with If-None-Match/If-Modified-Since instead of skipping them",
+        )
+        parser.add_argument(
+            "--endpoint-workers",
+            type=int,
+            default=4,
+            help="Endpoints pulled at the same time (across all datasets)",
+        )
+        parser.add_argument(
+            "--page-concurrency",
+            type=int,
+            default=4,
+            help="Pages fetched in parallel per endpoint",
+        )
+        parser.add_argument(
+            "--host-concurrency",
+            type=int,
+            default=8,
+            help="Max requests in flight per API host",
+        )
+        parser.add_argument(
+            "--host-rate",
+            type=float,
+            default=None,
+            help="Max requests per second per API host",
+        )
 
-    def handle(self, *args, **opts):
-        dataset_name = opts["db"]
-        dataset = get_dataset(dataset_name)
+    def _parse_asof(self, values, names):
+        """--asof values -> (date for every dataset, {dataset: date})"""
+        default = None
+        per_db = {}
+        for value in values:
+            for item in [v.strip() for v in value.split(",") if v.strip()]:
+                if "=" not in item:
+                    if default is not None and default != item:
+                        raise CommandError(f"Conflicting --asof dates: {default}, {item}")
+                    default = item
+                    continue
+                db, _, date = item.partition("=")
+                db, date = db.strip(), date.strip()
+                if db not in names:
+                    raise CommandError(f"--asof {item}: {db} is not in --db ({', '.join(names)})")
+                if not date:
+                    raise CommandError(f"--asof {item}: missing date")
+                if per_db.get(db, date) != date:
+                    raise CommandError(f"Conflicting --asof dates for {db}: {per_db[db]}, {date}")
+                per_db[db] = date
+        return default, per_db
 
-        as_of = opts["asof"] or dataset.default_as_of
-        if dataset.supports_as_of and not as_of:
-            raise CommandError(f"{dataset_name} requires --asof (or set default_as_of).")
+    def handle(self, *args, **opts):
+        datasets = []
+        as_of = {}
 
-        completed = set()
-        if opts["resume"]:
-            completed = set(
-                IngestState.objects.filter(
-                    dataset=dataset_name,
-                    as_of_date=as_of,
-                ).values_list("endpoint_key", flat=True)
-            )
+        names = [d.strip() for d in opts["db"].split(",") if d.strip()]
+        default_as_of, as_of_by_db = self._parse_asof(opts["asof"], names)
 
-        for spec in dataset.plan:
-            if spec.key in completed:
-                self.stdout.write(f"✓ Skipping {spec.key}")
-                continue
+        for dataset_name in names:
+            dataset = get_dataset(dataset_name)
 
-            for attempt in range(1, opts["retries"] + 1):
-                try:
-                    cmd = [
-                        "python", "manage.py", "ingest_autocare",
-                        "--db", dataset_name,
-                        "--resource", spec.resource,
-                        "--api-version", spec.api_version,
-                        "--pagesize", str(DEFAULT_PAGE_SIZE),
-                    ]
-                    if dataset.supports_as_of:
-                        cmd += ["--asof", str(as_of)]
-                    if opts["resume"]:
-                        cmd.append("--resume")
+            dataset_as_of = as_of_by_db.get(dataset_name) or default_as_of or dataset.default_as_of
+            if dataset.supports_as_of and not dataset_as_of:
+                raise CommandError(f"{dataset_name} requires --asof (or set default_as_of).")
 
-                    subprocess.run(cmd, check=True)
+            datasets.append(dataset)
+            as_of[dataset.name] = dataset_as_of
 
-                    IngestState.objects.get_or_create(
-                        dataset=dataset_name,
-                        endpoint_key=spec.key,
-                        as_of_date=as_of,
-                    )
-                    break
+        results = run_baseline(
+            datasets,
+            as_of,
+            resume=opts["resume"],
+            endpoint_workers=opts["endpoint_workers"],
+            page_concurrency=opts["page_concurrency"],
+            host_concurrency=opts["host_concurrency"],
+            host_rate=opts["host_rate"],
+            retries=opts["retries"],
+            revalidate=opts["revalidate"],
+            stdout=self.stdout,
+        )
 
-                except subprocess.CalledProcessError:
-                    if attempt == opts["retries"]:
-                        raise CommandError(f"FAILED at {spec.key}")
-                    time.sleep(5)
+        failed = [r.spec.key for r in results if r.failed]
+        if failed:
+            raise CommandError(f"FAILED endpoints (not marked complete): {', '.join(failed)}")
 
-            time.sleep(opts["sleep"])
+        self.stdout.write(self.style.SUCCESS(f"✓ Baseline complete: {len(results)} endpoints"))
@@ -3,20 +3,33 @@ from __future__ import annotations
 import json
 import logging
 from collections import defaultdict, Counter
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Type, Tuple, Iterable, Set
+from typing import Any, List, Optional, Type, Iterator, Set
+
+import orjson
 
 from django.apps import apps
 from django.core.management.base import BaseCommand
-from django.db import IntegrityError, transaction
+from django.db import IntegrityError, connection, transaction
 from django.db import models
+from django.db.models.functions import Cast
 from django.utils import timezone
 
 from apps.autocare.core.models import AutocareRawRecord
+from apps.autocare.domain import supersession, terminology
 from apps.autocare.ingest.plans import get_dataset, EndpointSpec
-from apps.autocare.vcdb.deps import topo_sort_models
+from apps.autocare.ingest.raw_store import decode_blob, load_payload
+from apps.autocare.ingest.rows import (
+    RowMapper,
+    chunked,
+    compile_row_mapper,
+    is_required_field,
+)
+from apps.autocare.services.pg_copy import create_stage, copy_to_stage, insert_from_stage
+from apps.autocare.vcdb.deps import topo_levels, topo_sort_models
 
 # Optional import: only used when UI hydration is enabled.
 # Keep in file so this remains a single drop-in command.
@@ -130,20 +143,6 @@ def resolve_model(app_label: str, model_name: str) -> Optional[Type[models.Model
         return None
 
 
-def is_required_field(field: models.Field) -> bool:
-    """
-    Required: not null, no default.
-    Auto PKs are not required.
-    """
-    if getattr(field, "null", False):
-        return False
-    if field.has_default():
-        return False
-    if getattr(field, "primary_key", False) and field.get_internal_type() in ("AutoField", "BigAutoField"):
-        return False
-    return True
-
-
 def normalize_value(v: Any) -> Any:
     # IMPORTANT: empty strings from API payloads must become NULL.
     if v in ("null", "", "None"):
@@ -160,29 +159,6 @@ def normalize_value(v: Any) -> Any:
     return v
 
 
-def build_column_map(model: Type[models.Model]) -> Dict[str, str]:
-    """
-    Normalized API key (no underscores, lowercase) -> django attribute
-    """
-    mapping: Dict[str, str] = {}
-
-    for field in model._meta.fields:
-        # Foreign keys
-        if field.is_relation and field.many_to_one:
-            if field.db_column:
-                mapping[field.db_column.replace("_", "").lower()] = field.attname
-            continue
-
-        # Real DB columns
-        if field.db_column:
-            mapping[field.db_column.replace("_", "").lower()] = field.name
-        else:
-            # API metadata fields (culture_id etc)
-            mapping[field.name.replace("_", "").lower()] = field.name
-
-    return mapping
-
-
 def required_db_columns(model: Type[models.Model]) -> List[str]:
     cols = []
     for field in model._meta.fields:
@@ -202,9 +178,38 @@ def safe_row_dump(obj: models.Model) -> dict[str, Any]:
     return {f.name: getattr(obj, f.attname) for f in obj._meta.fields}
 
 
-def chunked(seq: list[Any], size: int) -> Iterable[list[Any]]:
-    for i in range(0, len(seq), size):
-        yield seq[i:i + size]
+# ============================================================
+# RAW PAYLOAD STREAMING
+# ============================================================
+
+def iter_raw_payloads(log_ids: list[int], id_batch: int = 1000) -> Iterator[AutocareRawRecord]:
+    """
+    Yield raw records one page at a time with ``payload`` decoded.
+
+    Payloads are read through a server-side cursor (one row per fetch),
+    either as jsonb text or as the compressed blob body, and decoded with
+    orjson, so only the page being replayed is held in memory. The yielded
+    records are unsaved shells carrying id, endpoint_key and payload.
+    """
+    for ids in chunked(log_ids, id_batch):
+        rows = (
+            AutocareRawRecord.objects
+            .filter(id__in=ids)
+            .order_by("fetched_at", "id")
+            .annotate(payload_text=Cast("payload", output_field=models.TextField()))
+            .values_list("id", "endpoint_key", "payload_text", "blob__codec", "blob__body")
+            .iterator(chunk_size=1)
+        )
+        for log_id, endpoint_key, payload_text, codec, body in rows:
+            if body is not None:
+                payload = decode_blob(codec, body)
+            else:
+                payload = orjson.loads(payload_text) if payload_text is not None else None
+            yield AutocareRawRecord(
+                id=log_id,
+                endpoint_key=endpoint_key,
+                payload=payload,
+            )
 
 
 # ============================================================
@@ -382,13 +387,8 @@ def maybe_hydrate_missing_vehicles(
     if not referenced:
         return
 
-    existing = set(
-        VehicleModel.objects.filter(vehicle_id__in=referenced).values_list("vehicle_id", flat=True)
-    )
-    missing = sorted(referenced - existing)
-
-    for vid in missing:
-        resolver.ensure_vehicle_exists(VehicleModel, vid)
+    # One existence query, concurrent lookups and one bulk insert per page
+    resolver.ensure_vehicles_exist(VehicleModel, referenced)
 
 
 # ============================================================
@@ -411,6 +411,12 @@ class Command(BaseCommand):
         parser.add_argument("--asof", default=None)
         parser.add_argument("--endpoint", default=None)
         parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Load models of the same FK level concurrently on N DB connections (auto_fk order only).",
+        )
 
         parser.add_argument(
             "--order",
@@ -424,6 +430,12 @@ class Command(BaseCommand):
             action="store_true",
             help="Attempt to hydrate missing Vehicles via authenticated UI lookup endpoint before insert.",
         )
+        parser.add_argument(
+            "--vehicle-lookup-concurrency",
+            type=int,
+            default=8,
+            help="Max concurrent UI vehicle lookups (with --ui-vehicle-lookup).",
+        )
 
         parser.add_argument(
             "--skip-missing-vehicles",
@@ -436,6 +448,24 @@ class Command(BaseCommand):
             help="Skip rows whose EngineConfig2 FK references are missing, and log them.",
         )
 
+        parser.add_argument(
+            "--copy",
+            action="store_true",
+            help=(
+                "Stream mapped rows into a temp table via COPY and load each model with one "
+                "INSERT ... ON CONFLICT DO NOTHING. Conflicting rows go to the skip log."
+            ),
+        )
+
+        parser.add_argument(
+            "--stream",
+            action="store_true",
+            help=(
+                "Fixed-memory replay: list raw logs without payloads, then fetch and decode "
+                "one payload page at a time through a server-side cursor."
+            ),
+        )
+
         parser.add_argument(
             "--truncate-first",
             action="store_true",
@@ -446,7 +476,6 @@ class Command(BaseCommand):
 
     def handle(self, *args, **opts):
         app_label: str = opts["app_label"]
-        batch_size: int = opts["batch_size"]
 
         # Clear previous skip + summary logs on each run
         SKIP_LOG_PATH.write_text("")
@@ -454,7 +483,10 @@ class Command(BaseCommand):
 
         resolver: Optional[VehicleResolver] = None
         if opts["ui_vehicle_lookup"]:
-            resolver = VehicleResolver(AutocareAPIClient())
+            resolver = VehicleResolver(
+                AutocareAPIClient("vcdb"),
+                concurrency=opts["vehicle_lookup_concurrency"],
+            )
 
         # =====================================================
         # BUILD PLAN FROM NEW plans.py REGISTRY
@@ -514,8 +546,18 @@ class Command(BaseCommand):
         if opts["asof"]:
             qs = qs.filter(as_of_date=opts["asof"])
 
+        if opts["stream"]:
+            # Metadata only; payloads are fetched page by page in _ingest_item
+            logs_iter = (
+                AutocareRawRecord(id=log_id, endpoint_key=endpoint_key)
+                for log_id, endpoint_key in qs.values_list("id", "endpoint_key").iterator()
+            )
+        else:
+            # Blob bodies are read one page at a time by load_payload
+            logs_iter = qs.select_related("blob").defer("blob__body").iterator(chunk_size=2000)
+
         logs_by_endpoint = defaultdict(list)
-        for log in qs:
+        for log in logs_iter:
             ep = (log.endpoint_key or "").strip()
             logs_by_endpoint[ep].append(log)
 
@@ -528,41 +570,26 @@ class Command(BaseCommand):
                 logs_by_endpoint[ep.rsplit("/", 1)[-1]].append(log)
 
         skip_counts = Counter()
-
-        for item in ordered:
-            model = resolve_model(app_label, item.model)
-
-            logs: list[AutocareRawRecord] = []
-            for k in item.endpoint_keys:
-                logs.extend(logs_by_endpoint.get(k, []))
-
-            # de-dupe by id, preserve order
-            seen = set()
-            deduped = []
-            for l in logs:
-                if l.id in seen:
-                    continue
-                seen.add(l.id)
-                deduped.append(l)
-            logs = deduped
-
-            if not logs:
-                self.stdout.write(f"{item.spec.resource}: no raw data")
-                continue
-
-            self.stdout.write(f"\n▶ {item.spec.request_path} → {item.model}")
-
-            for log in logs:
-                skipped = self._ingest_log_strict(
-                    model=model,
-                    log=log,
-                    batch_size=batch_size,
-                    resolver=resolver,
-                    skip_missing_vehicles=opts["skip_missing_vehicles"],
-                    skip_missing_engineconfig2=opts["skip_missing_engineconfig2"],
-                )
-                for s in skipped:
-                    skip_counts[s.reason] += 1
+        workers: int = opts["workers"]
+
+        if workers > 1 and opts["order"] != "auto_fk":
+            self.stderr.write("⚠ --workers needs --order auto_fk; loading sequentially")
+            workers = 1
+
+        if workers > 1:
+            # Models in one FK level never reference each other: load them concurrently.
+            # Each thread gets its own Django DB connection.
+            for level in self._plan_levels(app_label, ordered):
+                with ThreadPoolExecutor(max_workers=workers) as pool:
+                    futures = [
+                        pool.submit(self._ingest_item_threaded, app_label, item, logs_by_endpoint, opts, resolver)
+                        for item in level
+                    ]
+                    for future in futures:
+                        skip_counts.update(future.result())
+        else:
+            for item in ordered:
+                skip_counts.update(self._ingest_item(app_label, item, logs_by_endpoint, opts, resolver))
 
         # End summary
         summary_logger.info("===== INGEST SUMMARY =====")
@@ -577,6 +604,12 @@ class Command(BaseCommand):
         else:
             summary_logger.info("  (none)")
 
+        if opts["db"] == "pcdb":
+            # Moves the terminology and supersession generations, so every worker reloads
+            terminology.publish_snapshot()
+            supersession.publish_snapshot()
+            self.stdout.write("✔ Published PCdb terminology index and supersession graph")
+
         self.stdout.write("\n✔ INGEST COMPLETE")
         self.stdout.write(f"• Errors: {ERROR_LOG_PATH}")
         self.stdout.write(f"• Skips:  {SKIP_LOG_PATH}")
@@ -584,6 +617,90 @@ class Command(BaseCommand):
 
     # --------------------------------------------------------
 
+    def _plan_levels(self, app_label: str, ordered: list[PlanItem]) -> list[list[PlanItem]]:
+        """
+        Group plan items by FK level (see topo_levels).
+        """
+        by_model: dict[str, list[PlanItem]] = defaultdict(list)
+        for item in ordered:
+            by_model[item.model].append(item)
+
+        levels = topo_levels(app_label, list(by_model))
+        return [[item for name in level for item in by_model[name]] for level in levels]
+
+    def _ingest_item_threaded(self, *args) -> Counter:
+        """
+        _ingest_item for a worker thread.
+        """
+        try:
+            return self._ingest_item(*args)
+        finally:
+            # Thread-local connection; don't leak one per worker thread
+            connection.close()
+
+    def _ingest_item(
+        self,
+        app_label: str,
+        item: PlanItem,
+        logs_by_endpoint: dict[str, list[AutocareRawRecord]],
+        opts: dict[str, Any],
+        resolver: Optional[VehicleResolver],
+    ) -> Counter:
+        """
+        Replay every raw log for one plan item. Returns skip counts by reason.
+        """
+        skip_counts = Counter()
+        batch_size: int = opts["batch_size"]
+        model = resolve_model(app_label, item.model)
+
+        logs: list[AutocareRawRecord] = []
+        for k in item.endpoint_keys:
+            logs.extend(logs_by_endpoint.get(k, []))
+
+        # de-dupe by id, preserve order
+        seen = set()
+        deduped = []
+        for l in logs:
+            if l.id in seen:
+                continue
+            seen.add(l.id)
+            deduped.append(l)
+        logs = deduped
+
+        if not logs:
+            self.stdout.write(f"{item.spec.resource}: no raw data")
+            return skip_counts
+
+        self.stdout.write(f"\n▶ {item.spec.request_path} → {item.model}")
+
+        if opts["copy"]:
+            with connection.cursor() as cur:
+                create_stage(cur, model)
+
+        if opts["stream"]:
+            logs = iter_raw_payloads([l.id for l in logs])
+
+        for log in logs:
+            skipped = self._ingest_log_strict(
+                model=model,
+                log=log,
+                batch_size=batch_size,
+                resolver=resolver,
+                skip_missing_vehicles=opts["skip_missing_vehicles"],
+                skip_missing_engineconfig2=opts["skip_missing_engineconfig2"],
+                use_copy=opts["copy"],
+            )
+            for s in skipped:
+                skip_counts[s.reason] += 1
+
+        if opts["copy"]:
+            for s in self._flush_stage(model, item.endpoint):
+                skip_counts[s.reason] += 1
+
+        return skip_counts
+
+    # --------------------------------------------------------
+
     def _truncate_models(self, app_label: str, ordered: list[PlanItem]) -> None:
         """
         Deletes data for selected models in reverse order.
@@ -612,6 +729,38 @@ class Command(BaseCommand):
 
     # --------------------------------------------------------
 
+    def _flush_stage(self, model: Type[models.Model], endpoint: str) -> list[SkipRecord]:
+        """
+        --copy mode: move every row staged for ``model`` into its table.
+        Unique conflicts are logged as skips rather than aborting the run.
+        """
+        with transaction.atomic():
+            with connection.cursor() as cur:
+                inserted, conflicts = insert_from_stage(cur, model)
+
+        pk_col = model._meta.pk.column
+        skipped_records: list[SkipRecord] = []
+        for log_id, row_index, row in conflicts:
+            s = SkipRecord(
+                reason="UNIQUE_CONFLICT",
+                model=model.__name__,
+                endpoint=endpoint,
+                log_id=log_id,
+                row_index=row_index,
+                keys={pk_col: row.get(pk_col)},
+                raw_row=row,
+            )
+            skipped_records.append(s)
+            skip_logger.info(s.to_json())
+
+        self.stdout.write(
+            f"  ✔ {model.__name__}: inserted {inserted} rows via COPY; "
+            f"skipped {len(skipped_records)} conflicts"
+        )
+        return skipped_records
+
+    # --------------------------------------------------------
+
     def _ingest_log_strict(
         self,
         model: Type[models.Model],
@@ -620,57 +769,47 @@ class Command(BaseCommand):
         resolver: Optional[VehicleResolver],
         skip_missing_vehicles: bool,
         skip_missing_engineconfig2: bool,
+        use_copy: bool = False,
     ) -> list[SkipRecord]:
-        payload = log.payload
-        if isinstance(payload, str):
-            payload = json.loads(payload)
+        payload = load_payload(log)
 
         if not isinstance(payload, list):
             raise RuntimeError(f"Payload is not a list (log_id={log.id})")
 
-        col_map = build_column_map(model)
-        required = set(required_db_columns(model))
-
         instances_with_meta: list[tuple[int, dict[str, Any], models.Model]] = []
         skipped_records: list[SkipRecord] = []
 
+        mapper: Optional[RowMapper] = None
         for idx, row in enumerate(payload):
             if not isinstance(row, dict):
                 continue
 
-            def _norm_key(s: str) -> str:
-                return s.replace("_", "").lower()
+            shape = tuple(row)
+            if mapper is None or shape != mapper.shape:
+                mapper = compile_row_mapper(model, shape)
 
-            lower = {_norm_key(str(k)): v for k, v in row.items()}
-
-            data: Dict[str, Any] = {}
-            missing_cols: list[str] = []
-
-            for db_col, attr in col_map.items():
-                v = normalize_value(lower.get(db_col.lower()))
-                if v is None and db_col in required:
-                    missing_cols.append(db_col)
-                data[attr] = v
+            vals = mapper.values(row)
+            missing_cols = mapper.missing_required(vals)
 
             if missing_cols:
                 error = {
                     "error": "NOT_NULL_VIOLATION",
                     "model": model.__name__,
-                    "endpoint": log.endpoint,
+                    "endpoint": log.endpoint_key,
                     "log_id": log.id,
                     "row_index": idx,
                     "missing_columns": missing_cols,
                     "raw_row": row,
-                    "mapped_data": data,
+                    "mapped_data": mapper.as_dict(vals),
                 }
                 logger.error(json.dumps(error, default=str))
                 raise RuntimeError(
                     f"NOT NULL violation in {model.__name__} "
-                    f"(endpoint={log.endpoint}, log_id={log.id}, row={idx}). "
+                    f"(endpoint={log.endpoint_key}, log_id={log.id}, row={idx}). "
                     f"See {ERROR_LOG_PATH}"
                 )
 
-            instances_with_meta.append((idx, row, model(**data)))
+            instances_with_meta.append((idx, row, mapper.build(vals)))
 
         if not instances_with_meta:
             return []
@@ -680,7 +819,7 @@ class Command(BaseCommand):
             try:
                 maybe_hydrate_missing_vehicles(
                     model=model,
-                    endpoint=log.endpoint,
+                    endpoint=log.endpoint_key,
                     log_id=log.id,
                     instances=[obj for _, _, obj in instances_with_meta],
                     resolver=resolver,
@@ -689,7 +828,7 @@ class Command(BaseCommand):
                 logger.error(json.dumps({
                     "error": "VEHICLE_HYDRATION_FAILED",
                     "model": model.__name__,
-                    "endpoint": log.endpoint,
+                    "endpoint": log.endpoint_key,
                     "log_id": log.id,
                     "exception": str(exc),
                 }, default=str))
@@ -697,7 +836,7 @@ class Command(BaseCommand):
                 if not skip_missing_vehicles:
                     raise RuntimeError(
                         f"Vehicle hydration failed for {model.__name__} "
-                        f"(endpoint={log.endpoint}, log_id={log.id}). "
+                        f"(endpoint={log.endpoint_key}, log_id={log.id}). "
                         f"See {ERROR_LOG_PATH}"
                     ) from exc
 
@@ -731,6 +870,22 @@ class Command(BaseCommand):
 
         instances = [obj for _, _, obj in instances_with_meta]
 
+        # COPY into the per-model stage; inserted in one statement by _flush_stage
+        if use_copy:
+            with connection.cursor() as cur:
+                copy_to_stage(
+                    cur,
+                    model,
+                    instances,
+                    batch=log.id,
+                    row_numbers=[idx for idx, _, _ in instances_with_meta],
+                )
+            self.stdout.write(
+                f"  ✔ {model.__name__}: staged {len(instances)} rows (log {log.id}); "
+                f"skipped {len(skipped_records)}"
+            )
+            return skipped_records
+
         # INSERT (bulk, then isolate on IntegrityError)
         for chunk in chunked(instances, batch_size):
             try:
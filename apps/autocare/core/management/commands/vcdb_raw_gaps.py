@@ -1,58 +1,96 @@
-# from __future__ import annotations
-#
-# from collections import defaultdict
-# from typing import Dict, List, Tuple
-#
-# from django.core.management.base import BaseCommand
-#
-# from apps.autocare.core.models import AutocareRawRecord
-# from apps.autocare.ingest.plans import plan_endpoints
-#
-#
-# class Command(BaseCommand):
-#     help = "Report missing raw pages per VCDB endpoint (based on stored page_number sequence)."
-#
-#     def add_arguments(self, parser):
-#         parser.add_argument("--db", default="vcdb")
-#         parser.add_argument("--endpoint", default=None, help="Limit to one endpoint, e.g. /vcdb/Vehicle")
-#         parser.add_argument("--since", default=None)
-#         parser.add_argument("--asof", default=None)
-#
-#     def handle(self, *args, **opts):
-#         endpoints = [opts["endpoint"]] if opts["endpoint"] else plan_endpoints()
-#
-#         qs = (
-#             AutocareRawRecord.objects
-#             .filter(source_db=opts["db"])
-#             .filter(endpoint__in=endpoints)
-#         )
-#
-#         if opts["since"] is not None:
-#             qs = qs.filter(since_date=opts["since"])
-#         if opts["asof"] is not None:
-#             qs = qs.filter(as_of_date=opts["asof"])
-#
-#         qs = qs.exclude(page_number__isnull=True).values("endpoint", "page_number")
-#
-#         pages_by_endpoint: Dict[str, List[int]] = defaultdict(list)
-#         for row in qs:
-#             pages_by_endpoint[row["endpoint"]].append(int(row["page_number"]))
-#
-#         any_gaps = False
-#
-#         for ep in endpoints:
-#             pages = sorted(set(pages_by_endpoint.get(ep, [])))
-#             if not pages:
-#                 self.stdout.write(f"{ep}: no pages stored")
-#                 continue
-#
-#             expected = set(range(pages[0], pages[-1] + 1))
-#             missing = sorted(expected - set(pages))
-#             if missing:
-#                 any_gaps = True
-#                 self.stdout.write(f"{ep}: missing {len(missing)} pages -> {missing[:50]}{' ...' if len(missing) > 50 else ''}")
-#             else:
-#                 self.stdout.write(f"{ep}: OK ({pages[0]}..{pages[-1]})")
-#
-#         if any_gaps:
-#             self.stdout.write("\nRun your raw ingestion with --start-page on the missing ranges, or schedule Celery retries.")
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.autocare.api_client import AutocareAPIClient
+from apps.autocare.ingest.fetch import RateLimiter, ingest_endpoint_concurrent
+from apps.autocare.ingest.gaps import find_gaps, missing_endpoints, refetch_gaps
+from apps.autocare.ingest.plans import DEFAULT_PAGE_SIZE, get_dataset
+
+
+class Command(BaseCommand):
+    help = (
+        "Report missing raw pages per (endpoint, since, as-of) against the recorded\n"
+        "X-Pagination totalPages, and optionally refetch exactly those pages."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--db", default="vcdb", choices=["vcdb", "pcdb", "padb", "qdb", "brand"])
+        parser.add_argument("--endpoint", default=None, help="Limit to one endpoint key, e.g. vcdb:Vehicle")
+        parser.add_argument("--since", default=None)
+        parser.add_argument("--asof", default=None)
+        parser.add_argument(
+            "--refetch",
+            action="store_true",
+            help="Fetch the missing pages (and plan endpoints with no pages for --asof)",
+        )
+        parser.add_argument("--concurrency", type=int, default=8, help="Pages fetched in parallel")
+        parser.add_argument("--rate", type=float, default=None, help="Max requests per second")
+        parser.add_argument("--write-batch", type=int, default=20)
+
+    def handle(self, *args, **opts):
+        db = opts["db"]
+
+        gaps = find_gaps(
+            source_db=db,
+            endpoint_key=opts["endpoint"],
+            since=opts["since"],
+            asof=opts["asof"],
+        )
+
+        # Endpoints never pulled for this snapshot have no rows to compare against
+        empty = []
+        if opts["asof"] and not opts["endpoint"]:
+            empty = missing_endpoints(get_dataset(db).plan, since=opts["since"], asof=opts["asof"])
+
+        missing_pages = sum(len(g) for g in gaps)
+        for gap in gaps:
+            self.stdout.write(f"{gap}: missing {len(gap)}")
+        for spec in empty:
+            self.stdout.write(f"{spec.key}: no pages stored")
+
+        if not gaps and not empty:
+            self.stdout.write(self.style.SUCCESS("No gaps."))
+            return
+
+        self.stdout.write(
+            self.style.WARNING(
+                f"{missing_pages} missing pages in {len(gaps)} gaps; {len(empty)} endpoints not pulled"
+            )
+        )
+
+        if not opts["refetch"]:
+            return
+
+        clients = {db: AutocareAPIClient(db)}
+        limiter = RateLimiter(opts["rate"], max_concurrent=opts["concurrency"])
+
+        result = refetch_gaps(
+            gaps,
+            clients,
+            concurrency=opts["concurrency"],
+            limiter=limiter,
+            write_batch=opts["write_batch"],
+            stdout=self.stdout,
+        )
+        failed = dict(result.failed)
+
+        for spec in empty:
+            pulled = ingest_endpoint_concurrent(
+                clients[db],
+                spec,
+                since=opts["since"],
+                asof=opts["asof"],
+                page_size=DEFAULT_PAGE_SIZE,
+                concurrency=opts["concurrency"],
+                limiter=limiter,
+                write_batch=opts["write_batch"],
+                stdout=self.stdout,
+            )
+            result.written += pulled.written
+            if pulled.failed_pages:
+                failed[spec.key] = pulled.failed_pages
+
+        self.stdout.write(self.style.SUCCESS(f"Refetched {result.written} pages"))
+        if failed:
+            raise CommandError(f"Pages still missing: {failed}")
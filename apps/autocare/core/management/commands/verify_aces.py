@@ -4,7 +4,10 @@ ACES Data Integrity Verification Script
 Run this after ingestion to verify that no data was lost.
 """
 
-from django.db.models import Count, Q
+import hashlib
+
+from django.core.cache import cache
+from django.db import connection
 from apps.autocare.aces.models import (
     AcesApp,
     AcesAppVehicle,
@@ -14,10 +17,187 @@ from apps.autocare.aces.models import (
 )
 
 
-def verify_aces_integrity(source_file: str, verbose: bool = True):
+# How many offending app_ids to report (the full list can be millions)
+MISSING_SAMPLE_LIMIT = 100
+
+VERIFY_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def _verify_cache_key(source_file: str) -> str:
+    return f"aces:verify:{hashlib.md5(source_file.encode()).hexdigest()}"
+
+
+def _fetch_dict(sql: str, params: list) -> dict:
+    with connection.cursor() as cur:
+        cur.execute(sql, params)
+        row = cur.fetchone()
+        cols = [c[0] for c in cur.description]
+    return dict(zip(cols, row))
+
+
+def _fetch_all(sql: str, params: list) -> list[tuple]:
+    with connection.cursor() as cur:
+        cur.execute(sql, params)
+        return cur.fetchall()
+
+
+def _source_fingerprint(source_file: str) -> tuple:
+    """
+    Cheap change detector for a source_file.
+
+    Every ingest (full or delta) writes new AcesApp ids, so (count, max id)
+    changes whenever the file's data does.
+    """
+    row = _fetch_dict(
+        f"SELECT COUNT(*) AS n, MAX(id) AS max_id FROM {AcesApp._meta.db_table} WHERE source_file = %s",
+        [source_file],
+    )
+    return row["n"], row["max_id"]
+
+
+def compute_aces_metrics(source_file: str) -> dict:
+    """
+    Compute every verification metric for a source_file in one aggregate query.
+
+    Samples of offending apps and the unmapped-attribute breakdown are
+    fetched with LIMIT only when they are needed.
+    """
+    app_t = AcesApp._meta.db_table
+    veh_t = AcesAppVehicle._meta.db_table
+    qual_t = AcesQualifier._meta.db_table
+    raw_t = AcesRawAttribute._meta.db_table
+    vt_t = AcesVehicleType._meta.db_table
+
+    metrics = _fetch_dict(
+        f"""
+        WITH src AS (
+            SELECT id, part_number, part_type_id
+            FROM {app_t}
+            WHERE source_file = %s
+        )
+        SELECT
+            a.apps_total,
+            a.apps_with_vehicles,
+            a.apps_with_parts,
+            a.apps_with_part_types,
+            q.total_qualifiers,
+            q.apps_with_qualifiers,
+            r.total_notes,
+            r.apps_with_notes,
+            r.total_raw_attrs,
+            r.apps_with_raw_attrs,
+            vt.total_vehicle_types
+        FROM (
+            SELECT
+                COUNT(*) AS apps_total,
+                COUNT(*) FILTER (WHERE v.app_id IS NOT NULL) AS apps_with_vehicles,
+                COUNT(*) FILTER (WHERE src.part_number IS NOT NULL AND src.part_number <> '') AS apps_with_parts,
+                COUNT(*) FILTER (WHERE src.part_type_id IS NOT NULL) AS apps_with_part_types
+            FROM src
+            LEFT JOIN {veh_t} v ON v.app_id = src.id
+        ) a,
+        (
+            SELECT
+                COUNT(*) AS total_qualifiers,
+                COUNT(DISTINCT q.app_id) AS apps_with_qualifiers
+            FROM {qual_t} q
+            JOIN src ON src.id = q.app_id
+        ) q,
+        (
+            SELECT
+                COUNT(*) FILTER (WHERE r.attr_name = 'note') AS total_notes,
+                COUNT(DISTINCT r.app_id) FILTER (WHERE r.attr_name = 'note') AS apps_with_notes,
+                COUNT(*) FILTER (WHERE r.attr_name <> 'note') AS total_raw_attrs,
+                COUNT(DISTINCT r.app_id) FILTER (WHERE r.attr_name <> 'note') AS apps_with_raw_attrs
+            FROM {raw_t} r
+            JOIN src ON src.id = r.app_id
+        ) r,
+        (
+            SELECT COUNT(*) AS total_vehicle_types
+            FROM {vt_t} t
+            JOIN src ON src.id = t.app_id
+        ) vt
+        """,
+        [source_file],
+    )
+
+    metrics["missing_vehicle_records"] = []
+    if metrics["apps_with_vehicles"] != metrics["apps_total"]:
+        metrics["missing_vehicle_records"] = [
+            r[0] for r in _fetch_all(
+                f"""
+                SELECT a.app_id
+                FROM {app_t} a
+                LEFT JOIN {veh_t} v ON v.app_id = a.id
+                WHERE a.source_file = %s AND v.app_id IS NULL
+                ORDER BY a.app_id
+                LIMIT %s
+                """,
+                [source_file, MISSING_SAMPLE_LIMIT],
+            )
+        ]
+
+    metrics["missing_parts"] = []
+    if metrics["apps_with_parts"] != metrics["apps_total"]:
+        metrics["missing_parts"] = [
+            r[0] for r in _fetch_all(
+                f"""
+                SELECT app_id
+                FROM {app_t}
+                WHERE source_file = %s AND (part_number IS NULL OR part_number = '')
+                ORDER BY app_id
+                LIMIT %s
+                """,
+                [source_file, MISSING_SAMPLE_LIMIT],
+            )
+        ]
+
+    metrics["raw_breakdown"] = []
+    if metrics["total_raw_attrs"]:
+        metrics["raw_breakdown"] = [
+            {"attr_name": name, "count": count}
+            for name, count in _fetch_all(
+                f"""
+                SELECT r.attr_name, COUNT(*) AS count
+                FROM {raw_t} r
+                JOIN {app_t} a ON a.id = r.app_id
+                WHERE a.source_file = %s AND r.attr_name <> 'note'
+                GROUP BY r.attr_name
+                ORDER BY count DESC
+                LIMIT 10
+                """,
+                [source_file],
+            )
+        ]
+
+    return metrics
+
+
+def get_aces_metrics(source_file: str, use_cache: bool = True) -> dict:
+    """compute_aces_metrics() cached per source_file until its data changes"""
+    if not use_cache:
+        return compute_aces_metrics(source_file)
+
+    key = _verify_cache_key(source_file)
+    fingerprint = _source_fingerprint(source_file)
+
+    cached = cache.get(key)
+    if cached is not None and cached["fingerprint"] == fingerprint:
+        return cached["metrics"]
+
+    metrics = compute_aces_metrics(source_file)
+    cache.set(key, {"fingerprint": fingerprint, "metrics": metrics}, timeout=VERIFY_CACHE_TIMEOUT)
+    return metrics
+
+
+def verify_aces_integrity(source_file: str, verbose: bool = True, use_cache: bool = True):
     """
     Verify that all data from the ACES file was properly imported.
 
+    Metrics come from a single aggregate query (see compute_aces_metrics)
+    and are cached per source_file. ``missing_vehicle_records`` and
+    ``missing_parts`` hold at most MISSING_SAMPLE_LIMIT app_ids.
+
     Returns dict with verification results.
     """
 
@@ -45,9 +225,9 @@ def verify_aces_integrity(source_file: str, verbose: bool = True):
         print(f"\nSource file: {source_file}")
         print("\n[1/5] Checking core application records...")
 
-    # Get all apps from this source file
-    apps = AcesApp.objects.filter(source_file=source_file)
-    results["apps_total"] = apps.count()
+    metrics = get_aces_metrics(source_file, use_cache=use_cache)
+    raw_breakdown = metrics.get("raw_breakdown", [])
+    results.update({k: v for k, v in metrics.items() if k in results})
 
     if verbose:
         print(f"      ✓ Found {results['apps_total']:,} applications")
@@ -60,17 +240,15 @@ def verify_aces_integrity(source_file: str, verbose: bool = True):
     if verbose:
         print("\n[2/5] Verifying vehicle records...")
 
-    apps_with_vehicles = apps.filter(acesappvehicle__isnull=False).count()
-    results["apps_with_vehicles"] = apps_with_vehicles
+    apps_with_vehicles = results["apps_with_vehicles"]
 
     if apps_with_vehicles != results["apps_total"]:
-        missing = apps.filter(acesappvehicle__isnull=True)
-        results["missing_vehicle_records"] = list(missing.values_list("app_id", flat=True))
+        missing_vehicles = results["apps_total"] - apps_with_vehicles
         results["issues"].append(
-            f"{results['apps_total'] - apps_with_vehicles} apps missing vehicle records!"
+            f"{missing_vehicles} apps missing vehicle records!"
         )
         if verbose:
-            print(f"      ⚠ WARNING: {len(results['missing_vehicle_records'])} apps missing vehicle records")
+            print(f"      ⚠ WARNING: {missing_vehicles} apps missing vehicle records")
             print(f"        App IDs: {results['missing_vehicle_records'][:10]}...")
     else:
         if verbose:
@@ -80,11 +258,8 @@ def verify_aces_integrity(source_file: str, verbose: bool = True):
     if verbose:
         print("\n[3/5] Verifying required fields...")
 
-    apps_with_parts = apps.exclude(Q(part_number__isnull=True) | Q(part_number="")).count()
-    apps_with_part_types = apps.filter(part_type_id__isnull=False).count()
-
-    results["apps_with_parts"] = apps_with_parts
-    results["apps_with_part_types"] = apps_with_part_types
+    apps_with_parts = results["apps_with_parts"]
+    apps_with_part_types = results["apps_with_part_types"]
 
     if apps_with_parts != results["apps_total"]:
         missing_parts = results["apps_total"] - apps_with_parts
@@ -107,77 +282,25 @@ def verify_aces_integrity(source_file: str, verbose: bool = True):
     # Check qualifiers
     if verbose:
         print("\n[4/5] Verifying qualifiers and notes...")
-
-    qualifier_stats = AcesQualifier.objects.filter(
-        app__source_file=source_file
-    ).aggregate(
-        total=Count('id'),
-        distinct_apps=Count('app', distinct=True)
-    )
-
-    results["total_qualifiers"] = qualifier_stats["total"]
-    results["apps_with_qualifiers"] = qualifier_stats["distinct_apps"]
-
-    if verbose:
         print(f"      ✓ Found {results['total_qualifiers']:,} qualifiers")
         print(f"        on {results['apps_with_qualifiers']:,} applications")
 
     # Check notes
-    note_stats = AcesRawAttribute.objects.filter(
-        app__source_file=source_file,
-        attr_name="note"
-    ).aggregate(
-        total=Count('id'),
-        distinct_apps=Count('app', distinct=True)
-    )
-
-    results["total_notes"] = note_stats["total"]
-    results["apps_with_notes"] = note_stats["distinct_apps"]
-
     if verbose:
         print(f"      ✓ Found {results['total_notes']:,} notes")
         print(f"        on {results['apps_with_notes']:,} applications")
 
     # Check vehicle types
-    vehicle_type_stats = AcesVehicleType.objects.filter(
-        app__source_file=source_file
-    ).aggregate(
-        total=Count('id'),
-        distinct_apps=Count('app', distinct=True)
-    )
-
-    results["total_vehicle_types"] = vehicle_type_stats["total"]
-
     if verbose and results["total_vehicle_types"] > 0:
         print(f"      ✓ Found {results['total_vehicle_types']:,} vehicle type assignments")
 
     # Check raw attributes (non-notes)
-    raw_attr_stats = AcesRawAttribute.objects.filter(
-        app__source_file=source_file
-    ).exclude(
-        attr_name="note"
-    ).aggregate(
-        total=Count('id'),
-        distinct_apps=Count('app', distinct=True)
-    )
-
-    results["total_raw_attrs"] = raw_attr_stats["total"]
-    results["apps_with_raw_attrs"] = raw_attr_stats["distinct_apps"]
-
     if results["total_raw_attrs"] > 0:
         if verbose:
             print(f"\n      ℹ INFO: {results['total_raw_attrs']:,} attributes stored in raw_attribute table")
             print(f"        These are fields without dedicated typed tables yet.")
 
         # Show breakdown by attribute name
-        raw_breakdown = AcesRawAttribute.objects.filter(
-            app__source_file=source_file
-        ).exclude(
-            attr_name="note"
-        ).values('attr_name').annotate(
-            count=Count('id')
-        ).order_by('-count')
-
         if verbose:
             print("\n        Top unmapped attributes:")
             for item in raw_breakdown[:10]:
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.9 on 2026-10-18 03:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("autocare_core", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AutocareRawBlob",
+            fields=[
+                (
+                    "sha256",
+                    models.CharField(max_length=64, primary_key=True, serialize=False),
+                ),
+                ("codec", models.CharField(default="zstd", max_length=10)),
+                ("body", models.BinaryField()),
+                ("raw_size", models.IntegerField()),
+                ("stored_size", models.IntegerField()),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "db_table": "autocare_autocarerawblob",
+            },
+        ),
+        migrations.AlterField(
+            model_name="autocarerawrecord",
+            name="payload",
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="autocarerawrecord",
+            name="blob",
+            field=models.ForeignKey(
+                blank=True,
+                db_column="payload_sha256",
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="records",
+                to="autocare_core.autocarerawblob",
+            ),
+        ),
+    ]
@@ -0,0 +1,179 @@
+# Generated by Django 5.2.9 on 2026-01-22 10:04
+
+from django.db import migrations, models
+
+# Rebuild autocare_autocarerawrecord as a declaratively partitioned table:
+#
+#   LIST (source_db) -> one partition per SOURCE_CHOICES entry (+ default)
+#     LIST (as_of_date) -> one partition per as-of snapshot (+ default for
+#                          NULL / not-yet-partitioned dates)
+#
+# Postgres requires every unique constraint on a partitioned table to
+# include the partition keys, so "id" keeps its sequence and an index but
+# is no longer a PRIMARY KEY constraint. Django still needs a primary key,
+# so the model state keeps "id" as one; its db_comment records the
+# difference.
+#
+# Index and constraint names are read from the catalogs rather than
+# assumed, and the same definitions are recreated on the new table.
+#
+# Snapshot partitions are managed with apps.autocare.services.raw_partitions
+# and the autocare_raw_partitions command.
+
+SOURCES = ["vcdb", "pcdb", "padb", "qdb"]
+
+T = "autocare_autocarerawrecord"
+
+ID_COMMENT = "Indexed row id, not a PRIMARY KEY: the table is partitioned (core migration 0003)"
+
+
+def _definitions(cursor, table, skip=()):
+    """
+    (constraints, indexes) of ``table`` other than its primary key, as
+    (name, definition) pairs. Indexes backing a constraint are left out;
+    they come back with the constraint.
+    """
+    cursor.execute(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+        "WHERE conrelid = %s::regclass AND contype <> 'p' ORDER BY conname",
+        [table],
+    )
+    constraints = cursor.fetchall()
+    cursor.execute(
+        "SELECT i.indexname, i.indexdef FROM pg_indexes i "
+        "WHERE i.schemaname = current_schema() AND i.tablename = %s "
+        "AND NOT EXISTS (SELECT 1 FROM pg_constraint c "
+        "                WHERE c.conrelid = %s::regclass AND c.conindid = i.indexname::regclass) "
+        "ORDER BY i.indexname",
+        [table, table],
+    )
+    indexes = [(name, definition) for name, definition in cursor.fetchall() if name not in skip]
+    return constraints, indexes
+
+
+def _q(name):
+    return '"%s"' % name.replace('"', '""')
+
+
+def _drop(cursor, table, constraints, indexes):
+    for name, _ in constraints:
+        cursor.execute(f"ALTER TABLE {table} DROP CONSTRAINT {_q(name)}")
+    for name, _ in indexes:
+        cursor.execute(f"DROP INDEX {_q(name)}")
+
+
+def _recreate(cursor, table, constraints, indexes):
+    for _, definition in indexes:
+        # Definitions were read while the table had this name; partitioned
+        # indexes read back as "ON ONLY", which would not cascade
+        cursor.execute(definition.replace(" ON ONLY ", " ON "))
+    for name, definition in constraints:
+        cursor.execute(f"ALTER TABLE {table} ADD CONSTRAINT {_q(name)} {definition}")
+
+
+def partition(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        constraints, indexes = _definitions(cursor, T)
+        _drop(cursor, T, constraints, indexes)
+
+        cursor.execute(f"ALTER TABLE {T} RENAME TO {T}_unpartitioned")
+        # Free the id sequence (identity, or a plain default after a
+        # reverse migration); the new table gets its own below
+        cursor.execute(f"ALTER TABLE {T}_unpartitioned ALTER COLUMN id DROP IDENTITY IF EXISTS")
+        cursor.execute(f"ALTER TABLE {T}_unpartitioned ALTER COLUMN id DROP DEFAULT")
+        cursor.execute(f"DROP SEQUENCE IF EXISTS {T}_id_seq")
+        cursor.execute(
+            f"CREATE TABLE {T} (LIKE {T}_unpartitioned INCLUDING DEFAULTS) "
+            f"PARTITION BY LIST (source_db)"
+        )
+        for src in SOURCES:
+            cursor.execute(
+                f"CREATE TABLE {T}_{src} PARTITION OF {T} "
+                f"FOR VALUES IN ('{src}') PARTITION BY LIST (as_of_date)"
+            )
+            cursor.execute(f"CREATE TABLE {T}_{src}_default PARTITION OF {T}_{src} DEFAULT")
+        cursor.execute(f"CREATE TABLE {T}_default PARTITION OF {T} DEFAULT")
+
+        # One partition per existing snapshot; the table comment records its as_of_date
+        cursor.execute(f"""
+            DO $$
+            DECLARE
+                r record;
+                part text;
+            BEGIN
+                FOR r IN
+                    SELECT DISTINCT source_db, as_of_date
+                    FROM {T}_unpartitioned
+                    WHERE source_db IN ({", ".join(f"'{s}'" for s in SOURCES)})
+                      AND as_of_date ~ '^[0-9A-Za-z][0-9A-Za-z_.:-]*$'
+                LOOP
+                    part := '{T}_' || r.source_db || '_' || regexp_replace(r.as_of_date, '[^0-9A-Za-z]', '', 'g');
+                    EXECUTE format(
+                        'CREATE TABLE %I PARTITION OF %I FOR VALUES IN (%L)',
+                        part, '{T}_' || r.source_db, r.as_of_date
+                    );
+                    EXECUTE format('COMMENT ON TABLE %I IS %L', part, r.as_of_date);
+                END LOOP;
+            END
+            $$
+        """)
+
+        cursor.execute(f"INSERT INTO {T} SELECT * FROM {T}_unpartitioned")
+        cursor.execute(f"DROP TABLE {T}_unpartitioned")
+        cursor.execute(f"CREATE SEQUENCE {T}_id_seq OWNED BY {T}.id")
+        cursor.execute(f"ALTER TABLE {T} ALTER COLUMN id SET DEFAULT nextval('{T}_id_seq')")
+        cursor.execute(f"SELECT setval('{T}_id_seq', COALESCE((SELECT max(id) FROM {T}), 0) + 1, false)")
+        cursor.execute(f"COMMENT ON COLUMN {T}.id IS %s", [ID_COMMENT])
+        cursor.execute(f"CREATE INDEX {T}_id ON {T} (id)")
+
+        _recreate(cursor, T, constraints, indexes)
+        cursor.execute(f"ANALYZE {T}")
+
+
+def unpartition(apps, schema_editor):
+    """
+    Back to a plain table with "id" as PRIMARY KEY. Rows in detached
+    snapshot partitions are not part of the table; attach them first
+    (autocare_raw_partitions) or they stay behind as standalone tables.
+    """
+    with schema_editor.connection.cursor() as cursor:
+        constraints, indexes = _definitions(cursor, T, skip={f"{T}_id"})
+        _drop(cursor, T, constraints, indexes)
+        cursor.execute(f"DROP INDEX {T}_id")
+
+        cursor.execute(f"ALTER TABLE {T} RENAME TO {T}_partitioned")
+        cursor.execute(f"CREATE TABLE {T} (LIKE {T}_partitioned INCLUDING DEFAULTS)")
+        cursor.execute(f"INSERT INTO {T} SELECT * FROM {T}_partitioned")
+        # Keep the id sequence: it moves to the new table before the old one goes
+        cursor.execute(f"ALTER SEQUENCE {T}_id_seq OWNED BY {T}.id")
+        cursor.execute(f"DROP TABLE {T}_partitioned CASCADE")
+        cursor.execute(f"ALTER TABLE {T} ADD CONSTRAINT {T}_pkey PRIMARY KEY (id)")
+
+        _recreate(cursor, T, constraints, indexes)
+        cursor.execute(f"ANALYZE {T}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("autocare_core", "0002_autocarerawblob"),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunPython(partition, unpartition),
+            ],
+            state_operations=[
+                migrations.AlterField(
+                    model_name="autocarerawrecord",
+                    name="id",
+                    field=models.BigAutoField(
+                        db_comment=ID_COMMENT,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.9 on 2026-10-18 03:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("autocare_core", "0003_partition_autocarerawrecord"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="VehicleLookupMiss",
+            fields=[
+                ("vehicle_id", models.IntegerField(primary_key=True, serialize=False)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("not_found", "Not found"),
+                            ("non_canonical", "Non-canonical"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("reason", models.CharField(max_length=255)),
+                ("checked_at", models.DateTimeField(auto_now=True, db_index=True)),
+            ],
+            options={
+                "db_table": "autocare_vehiclelookupmiss",
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.9 on 2026-10-18 03:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("autocare_core", "0004_vehiclelookupmiss"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="autocarerawrecord",
+            name="etag",
+            field=models.CharField(blank=True, max_length=255, null=True),
+        ),
+        migrations.AddField(
+            model_name="autocarerawrecord",
+            name="last_modified",
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+    ]
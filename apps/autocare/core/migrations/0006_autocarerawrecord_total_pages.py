@@ -0,0 +1,18 @@
+# Generated by Django 5.2.9 on 2026-10-18 04:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("autocare_core", "0005_autocarerawrecord_validators"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="autocarerawrecord",
+            name="total_pages",
+            field=models.IntegerField(blank=True, null=True),
+        ),
+    ]
@@ -12,6 +12,34 @@ class IngestState(models.Model):
         managed = False
 
 
+class VehicleLookupMiss(models.Model):
+    """
+    Vehicle ids the UI lookup endpoint could not resolve canonically.
+
+    Remembered so VehicleResolver does not request the same 404 or
+    incomplete vehicle again on every ingest run.
+    """
+    NOT_FOUND = "not_found"
+    NON_CANONICAL = "non_canonical"
+
+    vehicle_id = models.IntegerField(primary_key=True)
+    status = models.CharField(
+        max_length=20,
+        choices=[
+            (NOT_FOUND, "Not found"),
+            (NON_CANONICAL, "Non-canonical"),
+        ],
+    )
+    reason = models.CharField(max_length=255)
+    checked_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        db_table = "autocare_vehiclelookupmiss"
+
+    def __str__(self):
+        return f"Vehicle {self.vehicle_id}: {self.reason}"
+
+
 class AutocareTemporalModel(models.Model):
     # These columns are consistent in the API/schema payloads
     culture_id = models.CharField(max_length=10, db_index=True, db_column="CultureID")
@@ -30,6 +58,29 @@ class AutocareNamedModel(AutocareTemporalModel):
         abstract = True
 
 
+class AutocareRawBlob(models.Model):
+    """
+    Content-addressed, compressed body of a raw API page.
+
+    Keyed by the SHA-256 of the canonical JSON, so identical pages (e.g.
+    re-pulls for a new as_of_date) are stored once. See
+    apps.autocare.ingest.raw_store.
+    """
+    sha256 = models.CharField(max_length=64, primary_key=True)
+    codec = models.CharField(max_length=10, default="zstd")
+    body = models.BinaryField()
+
+    raw_size = models.IntegerField()
+    stored_size = models.IntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = "autocare_autocarerawblob"
+
+    def __str__(self):
+        return f"{self.sha256[:12]} ({self.stored_size}/{self.raw_size} bytes)"
+
+
 class AutocareRawRecord(models.Model):
     SOURCE_CHOICES = [
         ("vcdb", "VCdb"),
@@ -38,6 +89,10 @@ class AutocareRawRecord(models.Model):
         ("qdb", "Qdb"),
     ]
 
+    id = models.BigAutoField(
+        primary_key=True,
+        db_comment="Indexed row id, not a PRIMARY KEY: the table is partitioned (core migration 0003)",
+    )
     source_db = models.CharField(max_length=10, choices=SOURCE_CHOICES)
 
     endpoint_key = models.CharField(max_length=120, db_index=True)
@@ -49,11 +104,25 @@ class AutocareRawRecord(models.Model):
 
     page_number = models.IntegerField(null=True, blank=True)
     page_size = models.IntegerField(null=True, blank=True)
+    total_pages = models.IntegerField(null=True, blank=True)  # X-Pagination totalPages (gap detection)
 
     http_status = models.IntegerField()
     record_count = models.IntegerField(null=True, blank=True)
 
-    payload = models.JSONField()
+    # HTTP validators for conditional re-fetch (If-None-Match / If-Modified-Since)
+    etag = models.CharField(max_length=255, null=True, blank=True)
+    last_modified = models.CharField(max_length=64, null=True, blank=True)
+
+    # Legacy inline body; new pages live in ``blob`` (read via raw_store.load_payload)
+    payload = models.JSONField(null=True, blank=True)
+    blob = models.ForeignKey(
+        AutocareRawBlob,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name="records",
+        db_column="payload_sha256",
+    )
 
     ingestion_mode = models.CharField(
         max_length=20,
@@ -66,6 +135,8 @@ class AutocareRawRecord(models.Model):
     )
 
     class Meta:
+        # Partitioned in Postgres by source_db, then as_of_date (migration 0003,
+        # apps.autocare.services.raw_partitions); "id" is indexed, not a PK constraint
         db_table = "autocare_autocarerawrecord"
         indexes = [
             models.Index(fields=["source_db", "endpoint_key"]),
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Callable, Generic, Optional, Protocol, TypeVar
+
+from django.core.cache import cache
+
+
+class Snapshot(Protocol):
+    version: str
+
+    def dumps(self) -> bytes: ...
+
+
+S = TypeVar("S", bound=Snapshot)
+
+
+class SnapshotCache(Generic[S]):
+    """
+    One in-memory copy per process of an index built from reference data.
+
+    The serialised index is shared through the Django cache under
+    ``autocare:<name>:<version>``, so only the first worker to see a new
+    version builds it; the rest load the snapshot. The version is checked
+    at most every ``check_interval`` seconds, and the index is swapped
+    when it changes.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        version: Callable[[], str],
+        build: Callable[[str], S],
+        loads: Callable[[bytes], S],
+        check_interval: float = 60,
+        timeout: int = 7 * 24 * 3600,
+    ):
+        self.name = name
+        self.version = version
+        self.build = build
+        self.loads = loads
+        self.check_interval = check_interval
+        self.timeout = timeout
+
+        self._current: Optional[S] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def key(self, version: str) -> str:
+        return f"autocare:{self.name}:{version}"
+
+    def _fresh(self) -> bool:
+        return self._current is not None and time.monotonic() - self._checked_at < self.check_interval
+
+    def get(self) -> S:
+        if self._fresh():
+            return self._current
+
+        with self._lock:
+            if self._fresh():
+                return self._current
+
+            version = self.version()
+            if self._current is None or self._current.version != version:
+                self._current = self.load(version) or self.publish(self.build(version))
+            self._checked_at = time.monotonic()
+            return self._current
+
+    def load(self, version: str) -> Optional[S]:
+        data = cache.get(self.key(version))
+        if data is None:
+            return None
+        return self.loads(data)
+
+    def publish(self, index: S) -> S:
+        """Share ``index`` with every process and use it in this one"""
+        cache.set(self.key(index.version), index.dumps(), timeout=self.timeout)
+        self._current = index
+        self._checked_at = time.monotonic()
+        return index
+
+    def invalidate(self) -> None:
+        """Force the next get() to re-check the version"""
+        self._checked_at = 0.0
@@ -0,0 +1,357 @@
+from __future__ import annotations
+
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Set, Tuple, Union
+
+import orjson
+import zstandard
+from django.apps import apps
+from django.db.models import Max
+
+from apps.autocare.domain.caching import SnapshotCache
+from apps.autocare.domain.vehicle_hierarchy import CHECK_INTERVAL, SNAPSHOT_ZSTD_LEVEL, current_version
+
+
+APP_LABEL = "autocare_vcdb"
+
+# Attribute -> (VCdb model, column holding the attribute value). Every
+# model has a ``vehicle`` FK; Vehicle itself is keyed by its own id.
+FITMENT_ATTRIBUTES: Dict[str, Tuple[str, str]] = {
+    "base_vehicle": ("Vehicle", "base_vehicle_id"),
+    "submodel": ("Vehicle", "sub_model_id"),
+    "region": ("Vehicle", "region_id"),
+    "engine_config": ("VehicleToEngineConfig", "engine_config2_id"),
+    "transmission": ("VehicleToTransmission", "transmission_id"),
+    "drive_type": ("VehicleToDriveType", "drive_type_id"),
+    "body_style_config": ("VehicleToBodyStyleConfig", "body_style_config_id"),
+    "bed_config": ("VehicleToBedConfig", "bed_config_id"),
+    "brake_config": ("VehicleToBrakeConfig", "brake_config_id"),
+    "spring_type_config": ("VehicleToSpringTypeConfig", "spring_type_config_id"),
+    "steering_config": ("VehicleToSteeringConfig", "steering_config_id"),
+    "mfr_body_code": ("VehicleToMfrBodyCode", "mfr_body_code_id"),
+    "wheel_base": ("VehicleToWheelBase", "wheel_base_id"),
+    "vehicle_class": ("VehicleToClass", "vehicle_class_id"),
+}
+
+_MAGIC = b"VFB1"
+_TYPECODE = "i"
+
+# A byte bitmap costs one bit per possible vehicle id, a sorted array 32
+# bits per member: switch to the bitmap once it is the smaller of the two.
+_BITS_PER_ID = 32
+
+# Set-bit offsets of every byte value, for iterating a byte bitmap
+_BYTE_BITS = tuple(tuple(i for i in range(8) if b >> i & 1) for b in range(256))
+
+
+# ============================================================
+# Vehicle sets
+# ============================================================
+
+class VehicleBitmap:
+    """
+    Immutable set of vehicle ids.
+
+    Stored as a sorted int32 array while sparse and as a little-endian
+    byte bitmap (bit ``v`` = vehicle ``v``) once dense, like a single
+    roaring container. Intersections pick the cheapest strategy for the
+    pair: one big-int AND for two bitmaps, a bit probe per member for
+    array & bitmap, and a bisect per member of the smaller array for
+    two arrays.
+    """
+    __slots__ = ("ids", "bits", "count")
+
+    def __init__(self, ids: Optional[array] = None, bits: Optional[bytes] = None, count: int = 0):
+        self.ids = ids
+        self.bits = bits
+        self.count = count
+
+    @classmethod
+    def from_sorted(cls, ids: array, universe: int) -> "VehicleBitmap":
+        if len(ids) * _BITS_PER_ID <= universe:
+            return cls(ids=ids, count=len(ids))
+        buf = bytearray(max(universe, ids[-1] + 1) // 8 + 1)
+        for v in ids:
+            buf[v >> 3] |= 1 << (v & 7)
+        return cls(bits=bytes(buf), count=len(ids))
+
+    @classmethod
+    def from_ids(cls, ids: Iterable[int], universe: int) -> "VehicleBitmap":
+        return cls.from_sorted(array(_TYPECODE, sorted(set(ids))), universe)
+
+    @property
+    def dense(self) -> bool:
+        return self.bits is not None
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __bool__(self) -> bool:
+        return self.count > 0
+
+    def __contains__(self, v: int) -> bool:
+        if self.bits is not None:
+            i = v >> 3
+            return 0 <= i < len(self.bits) and bool(self.bits[i] >> (v & 7) & 1)
+        i = bisect_left(self.ids, v)
+        return i < len(self.ids) and self.ids[i] == v
+
+    def __iter__(self) -> Iterator[int]:
+        if self.bits is None:
+            return iter(self.ids)
+        return (
+            base + off
+            for i, b in enumerate(self.bits) if b
+            for base in (i << 3,)
+            for off in _BYTE_BITS[b]
+        )
+
+    def to_list(self) -> List[int]:
+        return list(self)
+
+    def __and__(self, other: "VehicleBitmap") -> "VehicleBitmap":
+        if self.dense and other.dense:
+            n = max(len(self.bits), len(other.bits))
+            x = int.from_bytes(self.bits, "little") & int.from_bytes(other.bits, "little")
+            result = VehicleBitmap(bits=x.to_bytes(n, "little"), count=x.bit_count())
+            if result.count * _BITS_PER_ID > n * 8:
+                return result
+            return VehicleBitmap(ids=array(_TYPECODE, result), count=result.count)
+
+        small, big = (self, other) if len(self) <= len(other) else (other, self)
+        if small.dense:
+            small, big = big, small
+        ids = array(_TYPECODE, (v for v in small.ids if v in big))
+        return VehicleBitmap(ids=ids, count=len(ids))
+
+    def __repr__(self) -> str:
+        return f"VehicleBitmap({self.count} ids, {'bitmap' if self.dense else 'array'})"
+
+
+EMPTY = VehicleBitmap(ids=array(_TYPECODE), count=0)
+
+Criterion = Union[int, Iterable[int]]
+
+
+# ============================================================
+# Index
+# ============================================================
+
+@dataclass
+class FitmentIndex:
+    """
+    Per-attribute value -> VehicleBitmap of the vehicles having it.
+
+    "Vehicles of base vehicle B with engine config X and drive type Y"
+    becomes the intersection of three precomputed sets instead of a join
+    of Vehicle against each VehicleTo* table.
+    """
+    version: str
+    universe: int
+    bitmaps: Dict[str, Dict[int, VehicleBitmap]] = field(default_factory=dict)
+
+    def values(self, attribute: str) -> List[int]:
+        return sorted(self._attribute(attribute))
+
+    def _attribute(self, attribute: str) -> Dict[int, VehicleBitmap]:
+        try:
+            return self.bitmaps[attribute]
+        except KeyError:
+            raise ValueError(f"Unknown fitment attribute: {attribute}") from None
+
+    def _criterion(self, attribute: str, value: Criterion) -> VehicleBitmap:
+        by_value = self._attribute(attribute)
+        if isinstance(value, int):
+            return by_value.get(value, EMPTY)
+
+        # Several values of one attribute: any of them matches
+        found = [by_value[v] for v in value if v in by_value]
+        if len(found) <= 1:
+            return found[0] if found else EMPTY
+        return VehicleBitmap.from_ids((v for bm in found for v in bm), self.universe)
+
+    def vehicles(self, **criteria: Criterion) -> VehicleBitmap:
+        """
+        Vehicles matching every criterion, e.g.
+        ``vehicles(base_vehicle=123, engine_config=[7, 8], drive_type=2)``.
+        """
+        if not criteria:
+            raise ValueError("At least one fitment criterion is required")
+
+        sets = sorted((self._criterion(a, v) for a, v in criteria.items()), key=len)
+        result = sets[0]
+        for other in sets[1:]:
+            if not result:
+                break
+            result = result & other
+        return result
+
+    def vehicle_ids(self, **criteria: Criterion) -> List[int]:
+        return self.vehicles(**criteria).to_list()
+
+    # ---- incremental refresh -------------------------------
+
+    def refresh(self, attribute: str, vehicle_ids: Iterable[int], rows: Iterable[Tuple[int, int]]) -> int:
+        """
+        Replace the attribute values of ``vehicle_ids`` with ``rows``
+        ((vehicle_id, value) pairs read after the change).
+
+        Only bitmaps that contain one of the vehicles, or gain one, are
+        rebuilt. Returns the number of bitmaps rebuilt.
+        """
+        changed = set(vehicle_ids)
+        if not changed:
+            return 0
+
+        by_value = self._attribute(attribute)
+        added: Dict[int, Set[int]] = defaultdict(set)
+        for vehicle_id, value in rows:
+            if value is not None:
+                added[value].add(vehicle_id)
+        self.universe = max(self.universe, max(changed) + 1)
+
+        rebuilt = 0
+        for value in set(by_value) | set(added):
+            current = by_value.get(value)
+            if value not in added and not any(v in current for v in changed):
+                continue
+            members = set(current) if current is not None else set()
+            members = (members - changed) | added.get(value, set())
+            if members:
+                by_value[value] = VehicleBitmap.from_ids(members, self.universe)
+            else:
+                by_value.pop(value, None)
+            rebuilt += 1
+        return rebuilt
+
+    # ---- serialisation -------------------------------------
+
+    def dumps(self) -> bytes:
+        """zstd(MAGIC | header length | orjson header | bitmap bodies)"""
+        entries, bodies = [], []
+        for attribute, by_value in self.bitmaps.items():
+            for value, bm in by_value.items():
+                body = bm.bits if bm.dense else bm.ids.tobytes()
+                entries.append((attribute, value, bm.dense, bm.count, len(body)))
+                bodies.append(body)
+
+        header = orjson.dumps({
+            "version": self.version,
+            "universe": self.universe,
+            "byteorder": sys.byteorder,
+            "attributes": list(self.bitmaps),
+            "entries": entries,
+        })
+        parts = [_MAGIC, struct.pack("<I", len(header)), header, *bodies]
+        return zstandard.ZstdCompressor(level=SNAPSHOT_ZSTD_LEVEL).compress(b"".join(parts))
+
+    @classmethod
+    def loads(cls, data: bytes) -> "FitmentIndex":
+        raw = memoryview(zstandard.ZstdDecompressor().decompress(data))
+        if bytes(raw[:4]) != _MAGIC:
+            raise ValueError("Not a fitment index snapshot")
+
+        (size,) = struct.unpack("<I", raw[4:8])
+        header = orjson.loads(raw[8:8 + size])
+        pos = 8 + size
+        swap = header["byteorder"] != sys.byteorder
+
+        bitmaps: Dict[str, Dict[int, VehicleBitmap]] = {a: {} for a in header["attributes"]}
+        for attribute, value, dense, count, nbytes in header["entries"]:
+            body = raw[pos:pos + nbytes]
+            pos += nbytes
+            if dense:
+                bitmaps[attribute][value] = VehicleBitmap(bits=bytes(body), count=count)
+            else:
+                ids = array(_TYPECODE)
+                ids.frombytes(body)
+                if swap:
+                    ids.byteswap()
+                bitmaps[attribute][value] = VehicleBitmap(ids=ids, count=count)
+
+        return cls(version=header["version"], universe=header["universe"], bitmaps=bitmaps)
+
+
+# ============================================================
+# Build
+# ============================================================
+
+def _attribute_rows(attribute: str, vehicle_ids: Optional[Iterable[int]] = None):
+    model_name, column = FITMENT_ATTRIBUTES[attribute]
+    model = apps.get_model(APP_LABEL, model_name)
+    qs = model.objects.all()
+    if vehicle_ids is not None:
+        qs = qs.filter(vehicle_id__in=list(vehicle_ids))
+    return qs.values_list("vehicle_id", column).iterator(chunk_size=10000)
+
+
+def build_index(
+    version: str,
+    universe: int,
+    rows: Mapping[str, Iterable[Tuple[int, int]]],
+) -> FitmentIndex:
+    """Build from {attribute: (vehicle_id, value) pairs}"""
+    index = FitmentIndex(version=version, universe=universe)
+    for attribute, pairs in rows.items():
+        grouped: Dict[int, List[int]] = defaultdict(list)
+        for vehicle_id, value in pairs:
+            if value is not None:
+                grouped[value].append(vehicle_id)
+        index.bitmaps[attribute] = {
+            value: VehicleBitmap.from_ids(ids, universe) for value, ids in grouped.items()
+        }
+    return index
+
+
+def build_from_db(version: Optional[str] = None) -> FitmentIndex:
+    Vehicle = apps.get_model(APP_LABEL, "Vehicle")
+    top = Vehicle.objects.aggregate(m=Max("vehicle_id"))["m"] or 0
+    return build_index(
+        version=version or current_version(),
+        universe=top + 1,
+        rows={attribute: _attribute_rows(attribute) for attribute in FITMENT_ATTRIBUTES},
+    )
+
+
+def refresh_index(index: FitmentIndex, touched: Mapping[str, Iterable[int]]) -> FitmentIndex:
+    """
+    Bring ``index`` up to date after VCdb rows changed.
+
+    ``touched`` maps a VCdb model name to the vehicle ids whose rows in it
+    changed (see ApplyResult.touched_vehicles). Only the attributes backed
+    by those models are re-read, and only for those vehicles.
+    """
+    for attribute, (model_name, _) in FITMENT_ATTRIBUTES.items():
+        vehicle_ids = set(touched.get(model_name, ()))
+        if vehicle_ids:
+            index.refresh(attribute, vehicle_ids, _attribute_rows(attribute, vehicle_ids))
+    index.version = current_version()
+    return index
+
+
+# ============================================================
+# Snapshot sharing
+# ============================================================
+
+_snapshots: SnapshotCache[FitmentIndex] = SnapshotCache(
+    "vcdb:fitment",
+    version=current_version,
+    build=build_from_db,
+    loads=FitmentIndex.loads,
+    check_interval=CHECK_INTERVAL,
+)
+
+
+def get_index() -> FitmentIndex:
+    """Process-wide index, reloaded when the VCdb version changes"""
+    return _snapshots.get()
+
+
+def publish_snapshot(index: Optional[FitmentIndex] = None) -> FitmentIndex:
+    """Share ``index`` (default: a fresh build) with every worker"""
+    return _snapshots.publish(index or build_from_db())
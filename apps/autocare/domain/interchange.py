@@ -0,0 +1,277 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Union
+
+import orjson
+import zstandard
+from django.core.cache import cache
+from django.db.models import OuterRef, Q, Subquery
+
+from apps.autocare.domain.caching import SnapshotCache
+from apps.autocare.domain.supersession import SupersessionGraph, build_graph, edge_stamp
+from apps.autocare.domain.vehicle_hierarchy import CHECK_INTERVAL, SNAPSHOT_ZSTD_LEVEL
+from apps.products.models import Product, ProductInterchange, ProductRelationship
+
+
+GENERATION_KEY = "autocare:products:interchange:generation"
+PENDING_KEY = "autocare:products:interchange:pending"
+LOCK_KEY = "autocare:products:interchange:lock"
+
+REBUILD_DELAY = 30       # seconds; saves within this window share one rebuild
+REBUILD_TIMEOUT = 600
+
+GRAPH_RELATIONS = (
+    ProductRelationship.RelationType.REPLACEMENT,
+    ProductRelationship.RelationType.ALTERNATIVE,
+)
+
+ProductRef = Union[int, str]
+
+
+def number_key(number: str) -> str:
+    return number.strip().upper()
+
+
+# ============================================================
+# Index
+# ============================================================
+
+@dataclass
+class InterchangeIndex:
+    """
+    Product replacement/interchange graph plus the numbers of its products.
+
+    Nodes are product ids. REPLACEMENT relationships are replacement
+    edges (the related product replaces the product); ALTERNATIVE
+    relationships, and interchange numbers that are another product's
+    part number, are equivalence edges. Numbers (part numbers and
+    interchange numbers) resolve to products through one dict.
+    """
+    version: str
+    graph: SupersessionGraph
+    # product id -> (part number, *interchange numbers)
+    numbers: Dict[int, Tuple[str, ...]] = field(default_factory=dict)
+    # number_key(number) -> product id
+    products: Dict[str, int] = field(default_factory=dict)
+
+    # ---- queries -------------------------------------------
+
+    def product_id(self, ref: ProductRef) -> Optional[int]:
+        if isinstance(ref, int):
+            return ref
+        return self.products.get(number_key(ref))
+
+    def current_replacement(self, ref: ProductRef) -> Optional[int]:
+        """Id of the product currently replacing ``ref`` (itself if current)"""
+        product_id = self.product_id(ref)
+        return self.graph.current(product_id) if product_id is not None else None
+
+    def current_number(self, ref: ProductRef) -> Optional[str]:
+        product_id = self.current_replacement(ref)
+        found = self.numbers.get(product_id) if product_id is not None else None
+        return found[0] if found else None
+
+    def interchangeable(self, ref: ProductRef) -> Tuple[int, ...]:
+        """Ids of every product that can stand in for ``ref``, including it"""
+        product_id = self.product_id(ref)
+        return self.graph.interchangeable(product_id) if product_id is not None else ()
+
+    def interchangeable_numbers(self, ref: ProductRef) -> List[str]:
+        """
+        Part and interchange numbers of every product interchangeable with
+        ``ref``. Numbers the index does not know return an empty list.
+        """
+        seen: Dict[str, None] = {}
+        for product_id in self.interchangeable(ref):
+            for number in self.numbers.get(product_id, ()):
+                seen.setdefault(number)
+        return list(seen)
+
+    # ---- incremental refresh -------------------------------
+
+    def refresh(self, product_ids: Iterable[int]) -> int:
+        """Re-read the graph region and numbers around changed products"""
+        changed = set(product_ids)
+        region = self.graph.closure(changed)
+        self.graph.refresh(changed, _edges)
+        region |= self.graph.closure(changed)
+
+        for product_id in region:
+            for number in self.numbers.pop(product_id, ()):
+                if self.products.get(number_key(number)) == product_id:
+                    del self.products[number_key(number)]
+        self._add_numbers(_numbers(region))
+        return len(region)
+
+    def _add_numbers(self, rows: Iterable[Tuple[int, str, Optional[str]]]) -> None:
+        own: Dict[int, str] = {}
+        interchange: Dict[int, List[str]] = {}
+        for product_id, part_number, number in rows:
+            own[product_id] = part_number
+            if number:
+                interchange.setdefault(product_id, []).append(number)
+
+        for product_id, numbers in interchange.items():
+            for number in numbers:
+                self.products.setdefault(number_key(number), product_id)
+        for product_id, part_number in own.items():
+            # A product's own part number wins over anyone's interchange
+            self.products[number_key(part_number)] = product_id
+            self.numbers[product_id] = (part_number, *interchange.get(product_id, ()))
+
+    # ---- serialisation -------------------------------------
+
+    def dumps(self) -> bytes:
+        payload = orjson.dumps({
+            "version": self.version,
+            "graph": self.graph.to_dict(),
+            "numbers": self.numbers,
+            "products": self.products,
+        }, option=orjson.OPT_NON_STR_KEYS)
+        return zstandard.ZstdCompressor(level=SNAPSHOT_ZSTD_LEVEL).compress(payload)
+
+    @classmethod
+    def loads(cls, data: bytes) -> "InterchangeIndex":
+        raw = orjson.loads(zstandard.ZstdDecompressor().decompress(data))
+        return cls(
+            version=raw["version"],
+            graph=SupersessionGraph.from_dict(raw["graph"]),
+            numbers={int(k): tuple(v) for k, v in raw["numbers"].items()},
+            products=raw["products"],
+        )
+
+
+# ============================================================
+# Build
+# ============================================================
+
+def _edges(product_ids: Optional[Set[int]] = None):
+    relationships = ProductRelationship.objects.filter(relationship_type__in=GRAPH_RELATIONS)
+    # Interchange numbers that are some product's part number
+    matches = ProductInterchange.objects.annotate(
+        other_id=Subquery(Product.objects.filter(part_number=OuterRef("number")).values("pk")[:1])
+    ).filter(other_id__isnull=False)
+
+    if product_ids is not None:
+        ids = list(product_ids)
+        relationships = relationships.filter(Q(product_id__in=ids) | Q(related_product_id__in=ids))
+        matches = matches.filter(Q(product_id__in=ids) | Q(other_id__in=ids))
+
+    replacements, equivalences = [], []
+    for product_id, related_id, kind, created_at in relationships.values_list(
+        "product_id", "related_product_id", "relationship_type", "created_at"
+    ):
+        if kind == ProductRelationship.RelationType.REPLACEMENT:
+            replacements.append((product_id, related_id, edge_stamp(created_at)))
+        else:
+            equivalences.append((product_id, related_id))
+    equivalences.extend(matches.values_list("product_id", "other_id"))
+    return replacements, equivalences
+
+
+def _numbers(product_ids: Optional[Set[int]] = None):
+    """(product id, part number, interchange number or None) rows"""
+    products = Product.objects.all()
+    if product_ids is not None:
+        products = products.filter(pk__in=list(product_ids))
+    else:
+        # Only products the index can say something about
+        products = products.filter(
+            Q(interchanges__isnull=False)
+            | Q(related_products__relationship_type__in=GRAPH_RELATIONS)
+            | Q(related_to__relationship_type__in=GRAPH_RELATIONS)
+        ).distinct()
+    return products.values_list("pk", "part_number", "interchanges__number").iterator(chunk_size=10000)
+
+
+def build_from_db(version: Optional[str] = None) -> InterchangeIndex:
+    version = version or current_version()
+    replacements, equivalences = _edges()
+    index = InterchangeIndex(version=version, graph=build_graph(version, replacements, equivalences))
+    index._add_numbers(_numbers())
+    return index
+
+
+# ============================================================
+# Snapshot sharing
+# ============================================================
+
+def current_version() -> str:
+    """Generation of the published index; changes with every publish_snapshot()"""
+    version = cache.get(GENERATION_KEY)
+    if version is None:
+        version = new_version()
+        if not cache.add(GENERATION_KEY, version, timeout=None):
+            version = cache.get(GENERATION_KEY, version)
+    return version
+
+
+def new_version() -> str:
+    return str(time.time_ns())
+
+
+_snapshots: SnapshotCache[InterchangeIndex] = SnapshotCache(
+    "products:interchange",
+    version=current_version,
+    build=build_from_db,
+    loads=InterchangeIndex.loads,
+    check_interval=CHECK_INTERVAL,
+)
+
+
+def get_index() -> InterchangeIndex:
+    """Process-wide interchange index, reloaded when products change"""
+    return _snapshots.get()
+
+
+def publish_snapshot(index: Optional[InterchangeIndex] = None) -> InterchangeIndex:
+    """
+    Share ``index`` (default: a fresh build) with every worker.
+
+    The snapshot is stored before the generation moves to its version,
+    so workers switching over always find it.
+    """
+    index = _snapshots.publish(index or build_from_db(new_version()))
+    cache.set(GENERATION_KEY, index.version, timeout=None)
+    return index
+
+
+# ============================================================
+# Rebuild on change
+# ============================================================
+
+def request_rebuild() -> bool:
+    """
+    Note that products changed. True if no rebuild was pending, i.e. the
+    caller should schedule one (see apps.products.tasks); changes made
+    while one is pending are picked up by it.
+    """
+    return cache.add(PENDING_KEY, True, timeout=REBUILD_TIMEOUT)
+
+
+def rebuild_snapshot() -> Optional[InterchangeIndex]:
+    """
+    Build from the database and publish, one process at a time.
+
+    Always a full build: every rebuild reads every change committed
+    before it started, so concurrent saves cannot drop each other's
+    edges. Returns None if another rebuild holds the lock.
+    """
+    if not cache.add(LOCK_KEY, True, timeout=REBUILD_TIMEOUT):
+        return None
+    try:
+        # Changes committed from here on schedule the next rebuild
+        cache.delete(PENDING_KEY)
+        return publish_snapshot()
+    finally:
+        cache.delete(LOCK_KEY)
+
+
+def current_replacement(ref: ProductRef) -> Optional[int]:
+    return get_index().current_replacement(ref)
+
+
+def interchangeable_numbers(ref: ProductRef) -> List[str]:
+    return get_index().interchangeable_numbers(ref)
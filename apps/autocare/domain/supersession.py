@@ -0,0 +1,386 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+import orjson
+import zstandard
+from django.core.cache import cache
+
+from apps.autocare.domain.caching import SnapshotCache
+from apps.autocare.domain.vehicle_hierarchy import CHECK_INTERVAL, SNAPSHOT_ZSTD_LEVEL
+from apps.autocare.pcdb.models import PartsRelationship, PartsSupersession
+
+
+GENERATION_KEY = "autocare:pcdb:supersession:generation"
+
+# (old, new, stamp): ``new`` replaces ``old``. Stamps are ISO dates or
+# datetimes (or ""); the latest one wins when a node has several successors.
+Replacement = Tuple[int, int, str]
+# (a, b): either can stand in for the other
+Equivalence = Tuple[int, int]
+
+EdgeLoader = Callable[[Optional[Set[int]]], Tuple[Iterable[Replacement], Iterable[Equivalence]]]
+
+
+# ============================================================
+# Graph
+# ============================================================
+
+@dataclass
+class SupersessionGraph:
+    """
+    Replacement and equivalence edges between integer nodes, with every
+    answer precomputed.
+
+    Equivalence edges count in both directions, so a strongly connected
+    component is a set of nodes that can all stand in for each other
+    (alternatives, or a supersession that was later reversed). Between
+    components the replacement edges form a DAG; the latest successor of
+    a component is found by following, from each component, its most
+    recent outgoing replacement to a component with none.
+
+    ``component`` and ``latest`` are plain dicts, so lookups are O(1);
+    isolated nodes are not stored.
+    """
+    version: str
+    replaced_by: Dict[int, Dict[int, str]] = field(default_factory=dict)
+    equivalent: Dict[int, Set[int]] = field(default_factory=dict)
+    related: Dict[int, Set[int]] = field(default_factory=dict)
+    # node -> component id (its lowest member); component id -> members
+    component: Dict[int, int] = field(default_factory=dict)
+    members: Dict[int, Tuple[int, ...]] = field(default_factory=dict)
+    # superseded node -> the node that currently replaces it
+    latest: Dict[int, int] = field(default_factory=dict)
+    replaces: Dict[int, Set[int]] = field(default_factory=dict, repr=False)
+
+    # ---- queries -------------------------------------------
+
+    def current(self, node: int) -> int:
+        """The node currently replacing ``node`` (``node`` itself if it is current)"""
+        return self.latest.get(node, node)
+
+    def is_superseded(self, node: int) -> bool:
+        return node in self.latest
+
+    def interchangeable(self, node: int) -> Tuple[int, ...]:
+        """Every node that can stand in for ``node``, including itself"""
+        comp = self.component.get(node)
+        return self.members[comp] if comp is not None else (node,)
+
+    def successors(self, node: int) -> List[int]:
+        """Direct replacements of ``node``, latest first"""
+        edges = self.replaced_by.get(node, {})
+        return sorted(edges, key=lambda n: (edges[n], n), reverse=True)
+
+    def predecessors(self, node: int) -> List[int]:
+        """Nodes ``node`` directly replaces"""
+        return sorted(self.replaces.get(node, ()))
+
+    def related_to(self, node: int) -> List[int]:
+        return sorted(self.related.get(node, ()))
+
+    def __contains__(self, node: int) -> bool:
+        return node in self.component or node in self.related
+
+    def __len__(self) -> int:
+        return len(self.component)
+
+    # ---- edges ---------------------------------------------
+
+    def _add(self, replacements: Iterable[Replacement], equivalences: Iterable[Equivalence]) -> Set[int]:
+        nodes: Set[int] = set()
+        for old, new, stamp in replacements:
+            if old == new:
+                continue
+            edges = self.replaced_by.setdefault(old, {})
+            edges[new] = max(edges.get(new, ""), stamp or "")
+            self.replaces.setdefault(new, set()).add(old)
+            nodes.update((old, new))
+        for a, b in equivalences:
+            if a == b:
+                continue
+            self.equivalent.setdefault(a, set()).add(b)
+            self.equivalent.setdefault(b, set()).add(a)
+            nodes.update((a, b))
+        return nodes
+
+    def _neighbours(self, node: int) -> Iterable[int]:
+        yield from self.replaced_by.get(node, ())
+        yield from self.equivalent.get(node, ())
+
+    def closure(self, nodes: Iterable[int]) -> Set[int]:
+        """``nodes`` plus everything weakly connected to them"""
+        seen: Set[int] = set()
+        pending = list(nodes)
+        while pending:
+            node = pending.pop()
+            if node in seen:
+                continue
+            seen.add(node)
+            pending.extend(self._neighbours(node))
+            pending.extend(self.replaces.get(node, ()))
+        return seen
+
+    def _drop(self, nodes: Set[int]) -> None:
+        """Forget ``nodes`` and their edges (``nodes`` is a closed region)"""
+        for node in nodes:
+            comp = self.component.pop(node, None)
+            if comp is not None:
+                self.members.pop(comp, None)
+            self.latest.pop(node, None)
+            self.replaced_by.pop(node, None)
+            self.replaces.pop(node, None)
+            self.equivalent.pop(node, None)
+
+    # ---- components ----------------------------------------
+
+    def _strong_components(self, nodes: Iterable[int]) -> List[List[int]]:
+        """Tarjan, iteratively; components come out successors first"""
+        index: Dict[int, int] = {}
+        low: Dict[int, int] = {}
+        stack: List[int] = []
+        on_stack: Set[int] = set()
+        found: List[List[int]] = []
+
+        for root in sorted(nodes):
+            if root in index:
+                continue
+            index[root] = low[root] = len(index)
+            stack.append(root)
+            on_stack.add(root)
+            work = [(root, iter(self._neighbours(root)))]
+
+            while work:
+                node, it = work[-1]
+                for nxt in it:
+                    if nxt not in index:
+                        index[nxt] = low[nxt] = len(index)
+                        stack.append(nxt)
+                        on_stack.add(nxt)
+                        work.append((nxt, iter(self._neighbours(nxt))))
+                        break
+                    if nxt in on_stack:
+                        low[node] = min(low[node], index[nxt])
+                else:
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        low[parent] = min(low[parent], low[node])
+                    if low[node] == index[node]:
+                        comp = []
+                        while True:
+                            member = stack.pop()
+                            on_stack.discard(member)
+                            comp.append(member)
+                            if member == node:
+                                break
+                        found.append(comp)
+        return found
+
+    def _resolve(self, nodes: Set[int]) -> None:
+        """Components and latest successors for a closed region"""
+        for comp in self._strong_components(nodes):
+            comp_id = min(comp)
+            self.members[comp_id] = tuple(sorted(comp))
+            for member in comp:
+                self.component[member] = comp_id
+
+            # Every component this one can be replaced by is already
+            # resolved; take its most recent exit.
+            best: Optional[Tuple[str, int]] = None
+            for member in comp:
+                for new, stamp in self.replaced_by.get(member, {}).items():
+                    if self.component.get(new) != comp_id and (best is None or (stamp, new) > best):
+                        best = (stamp, new)
+            if best is not None:
+                target = self.current(best[1])
+                for member in comp:
+                    self.latest[member] = target
+
+    # ---- incremental refresh -------------------------------
+
+    def refresh(self, nodes: Iterable[int], load_edges: EdgeLoader) -> int:
+        """
+        Re-read the edges around ``nodes`` after they changed.
+
+        The region is everything weakly connected to ``nodes`` before or
+        after the change; it is reloaded until no edge leads out of it,
+        then its components and successors are recomputed. The rest of
+        the graph is untouched. Returns the size of the region.
+        """
+        region = self.closure(nodes)
+        while True:
+            replacements, equivalences = load_edges(region)
+            replacements, equivalences = list(replacements), list(equivalences)
+            reached = {n for old, new, _ in replacements for n in (old, new)}
+            reached.update(n for edge in equivalences for n in edge)
+            outside = reached - region
+            if not outside:
+                break
+            region |= self.closure(outside)
+
+        self._drop(region)
+        self._add(replacements, equivalences)
+        self._resolve(region & (set(self.replaced_by) | set(self.replaces) | set(self.equivalent)))
+        return len(region)
+
+    # ---- serialisation -------------------------------------
+
+    def to_dict(self) -> dict:
+        return {
+            "version": self.version,
+            "replaced_by": [(old, new, stamp) for old, edges in self.replaced_by.items() for new, stamp in edges.items()],
+            "equivalent": [(a, b) for a, others in self.equivalent.items() for b in others if a < b],
+            "related": [(a, b) for a, others in self.related.items() for b in others if a < b],
+            "members": list(self.members.values()),
+            "latest": self.latest,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "SupersessionGraph":
+        graph = cls(version=data["version"])
+        graph._add(data["replaced_by"], data["equivalent"])
+        _add_related(graph, data["related"])
+        for comp in data["members"]:
+            comp_id = comp[0]
+            graph.members[comp_id] = tuple(comp)
+            for member in comp:
+                graph.component[member] = comp_id
+        graph.latest = {int(k): v for k, v in data["latest"].items()}
+        return graph
+
+    def dumps(self) -> bytes:
+        payload = orjson.dumps(self.to_dict(), option=orjson.OPT_NON_STR_KEYS)
+        return zstandard.ZstdCompressor(level=SNAPSHOT_ZSTD_LEVEL).compress(payload)
+
+    @classmethod
+    def loads(cls, data: bytes) -> "SupersessionGraph":
+        return cls.from_dict(orjson.loads(zstandard.ZstdDecompressor().decompress(data)))
+
+
+def _add_related(graph: SupersessionGraph, pairs: Iterable[Equivalence]) -> None:
+    for a, b in pairs:
+        if a != b:
+            graph.related.setdefault(a, set()).add(b)
+            graph.related.setdefault(b, set()).add(a)
+
+
+def build_graph(
+    version: str,
+    replacements: Iterable[Replacement],
+    equivalences: Iterable[Equivalence] = (),
+    related: Iterable[Equivalence] = (),
+) -> SupersessionGraph:
+    graph = SupersessionGraph(version=version)
+    nodes = graph._add(replacements, equivalences)
+    _add_related(graph, related)
+    graph._resolve(nodes)
+    return graph
+
+
+def edge_stamp(value) -> str:
+    """Sortable edge stamp for a date/datetime (or None)"""
+    return value.isoformat() if value is not None else ""
+
+
+# ============================================================
+# PCdb part terminology supersession
+# ============================================================
+
+def _terminology_edges(ids: Optional[Set[int]] = None):
+    qs = PartsSupersession.objects.all()
+    if ids is not None:
+        qs = qs.filter(old_part_terminology_id__in=ids) | qs.filter(new_part_terminology_id__in=ids)
+    replacements = [
+        (old, new, edge_stamp(rev))
+        for old, new, rev in qs.values_list("old_part_terminology_id", "new_part_terminology_id", "rev_date")
+    ]
+    return replacements, ()
+
+
+def _terminology_related(ids: Optional[Set[int]] = None):
+    qs = PartsRelationship.objects.all()
+    if ids is not None:
+        qs = qs.filter(part_terminology_id__in=ids) | qs.filter(related_part_terminology_id__in=ids)
+    return qs.values_list("part_terminology_id", "related_part_terminology_id")
+
+
+def build_from_db(version: Optional[str] = None) -> SupersessionGraph:
+    replacements, equivalences = _terminology_edges()
+    return build_graph(
+        version=version or current_version(),
+        replacements=replacements,
+        equivalences=equivalences,
+        related=_terminology_related(),
+    )
+
+
+def refresh_graph(graph: SupersessionGraph, part_terminology_ids: Iterable[int]) -> SupersessionGraph:
+    """
+    Bring ``graph`` up to date after supersessions of these terminologies
+    changed. It gets a new version; share it with publish_snapshot(graph).
+    """
+    ids = set(part_terminology_ids)
+    graph.refresh(ids, _terminology_edges)
+
+    for node in ids:
+        for other in graph.related.pop(node, ()):
+            graph.related.get(other, set()).discard(node)
+    _add_related(graph, _terminology_related(ids))
+
+    graph.version = new_version()
+    return graph
+
+
+# ============================================================
+# Snapshot sharing
+# ============================================================
+
+def current_version() -> str:
+    """
+    Generation of the published graph; changes with every publish_snapshot(),
+    which the PCdb loader (ingest_payloads --db pcdb) calls after a load.
+    """
+    version = cache.get(GENERATION_KEY)
+    if version is None:
+        version = new_version()
+        if not cache.add(GENERATION_KEY, version, timeout=None):
+            version = cache.get(GENERATION_KEY, version)
+    return version
+
+
+def new_version() -> str:
+    return str(time.time_ns())
+
+
+_snapshots: SnapshotCache[SupersessionGraph] = SnapshotCache(
+    "pcdb:supersession",
+    version=current_version,
+    build=build_from_db,
+    loads=SupersessionGraph.loads,
+    check_interval=CHECK_INTERVAL,
+)
+
+
+def get_graph() -> SupersessionGraph:
+    """Process-wide PCdb supersession graph, reloaded when PCdb changes"""
+    return _snapshots.get()
+
+
+def publish_snapshot(graph: Optional[SupersessionGraph] = None) -> SupersessionGraph:
+    """
+    Share ``graph`` (default: a fresh build) with every worker.
+
+    The snapshot is stored before the generation moves to its version,
+    so workers switching over always find it.
+    """
+    graph = _snapshots.publish(graph or build_from_db(new_version()))
+    cache.set(GENERATION_KEY, graph.version, timeout=None)
+    return graph
+
+
+def current_terminology(part_terminology_id: int) -> int:
+    """The PartTerminologyID that currently supersedes ``part_terminology_id``"""
+    return get_graph().current(part_terminology_id)
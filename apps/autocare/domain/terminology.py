@@ -0,0 +1,336 @@
+from __future__ import annotations
+
+import heapq
+import re
+import time
+from array import array
+from bisect import bisect_left
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import orjson
+import zstandard
+from django.core.cache import cache
+
+from apps.autocare.domain.caching import SnapshotCache
+from apps.autocare.domain.vehicle_hierarchy import CHECK_INTERVAL, SNAPSHOT_ZSTD_LEVEL
+from apps.autocare.pcdb.models import (
+    Alias,
+    Categories,
+    PartCategory,
+    Parts,
+    PartsDescription,
+    PartsToAlias,
+    Subcategories,
+)
+
+
+GENERATION_KEY = "autocare:pcdb:terminology:generation"
+
+DEFAULT_LIMIT = 20
+
+# Keys are cut to this many characters; longer prefixes are checked
+# against the full text of each candidate.
+KEY_CHARS = 48
+
+# Index entry text numbers: 0 is the name, 1..n the aliases
+DESCRIPTION = -1
+_DESCRIPTION_TIER = 2
+
+_NON_WORD = re.compile(r"[^0-9a-z]+")
+
+
+def normalize(text: str) -> str:
+    """Lowercase, punctuation folded to single spaces"""
+    return _NON_WORD.sub(" ", text.casefold()).strip()
+
+
+@dataclass(frozen=True)
+class PartTerminology:
+    part_terminology_id: int
+    name: str
+    description: Optional[str] = None
+    aliases: Tuple[str, ...] = ()
+    # (category name, subcategory name) per PartCategory row
+    categories: Tuple[Tuple[str, str], ...] = ()
+
+    @property
+    def category_paths(self) -> List[str]:
+        return [f"{category} > {subcategory}" for category, subcategory in self.categories]
+
+    def text(self, text_no: int) -> str:
+        if text_no == DESCRIPTION:
+            return self.description or ""
+        return self.aliases[text_no - 1] if text_no else self.name
+
+
+def _source(text_no: int) -> str:
+    if text_no == DESCRIPTION:
+        return "description"
+    return "alias" if text_no else "name"
+
+
+@dataclass(frozen=True)
+class Suggestion:
+    terminology: PartTerminology
+    matched: str
+    source: str     # "name", "alias" or "description"
+
+
+# ============================================================
+# Index
+# ============================================================
+
+@dataclass
+class PrefixKeys:
+    """Sorted keys with, in parallel, the term id, text number and word offset of each"""
+    keys: List[str] = field(default_factory=list)
+    term_ids: array = field(default_factory=lambda: array("i"))
+    text_nos: array = field(default_factory=lambda: array("h"))
+    offsets: array = field(default_factory=lambda: array("H"))
+
+    @classmethod
+    def from_entries(cls, entries: List[Tuple[str, int, int, int]]) -> "PrefixKeys":
+        entries.sort()
+        return cls(
+            keys=[e[0] for e in entries],
+            term_ids=array("i", (e[1] for e in entries)),
+            text_nos=array("h", (e[2] for e in entries)),
+            offsets=array("H", (min(e[3], 0xFFFF) for e in entries)),
+        )
+
+    def scan(self, key: str) -> Iterator[Tuple[int, int, int]]:
+        """(term id, text number, offset) of every key starting with ``key``"""
+        keys = self.keys
+        i = bisect_left(keys, key)
+        while i < len(keys) and keys[i].startswith(key):
+            yield self.term_ids[i], self.text_nos[i], self.offsets[i]
+            i += 1
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+
+@dataclass
+class TerminologyIndex:
+    """
+    PCdb part types by name, alias and description prefix.
+
+    Every word start of every text is a key (``"disc brake pad"``,
+    ``"brake pad"``, ``"pad"``), so autocomplete is a bisect into a
+    sorted list and a scan of the matching run. Keys are split in tiers
+    (whole names and aliases, later words of them, descriptions) and a
+    tier is only scanned if the ones before it did not fill the limit.
+    Exact lookups go through a dict of normalised names and aliases.
+    """
+    version: str
+    terms: Dict[int, PartTerminology]
+    tiers: Tuple[PrefixKeys, ...] = ()
+    exact: Dict[str, Tuple[int, ...]] = field(default_factory=dict)
+
+    def get(self, part_terminology_id: int) -> Optional[PartTerminology]:
+        return self.terms.get(part_terminology_id)
+
+    def lookup(self, text: str) -> List[PartTerminology]:
+        """Part types whose name or an alias is ``text`` (case and punctuation ignored)"""
+        return [self.terms[i] for i in self.exact.get(normalize(text), ())]
+
+    def autocomplete(
+        self,
+        prefix: str,
+        limit: int = DEFAULT_LIMIT,
+        descriptions: bool = False,
+    ) -> List[Suggestion]:
+        """
+        Part types with a word starting with ``prefix``, best first.
+
+        Matches at the start of a name or alias rank first, then matches
+        on a later word, then descriptions (if asked for); within a tier
+        names come before aliases, then shorter names. Each part type
+        appears once.
+        """
+        query = normalize(prefix)
+        if not query:
+            return []
+        key = query[:KEY_CHARS]
+        tiers = self.tiers if descriptions else self.tiers[:_DESCRIPTION_TIER]
+
+        best: Dict[int, Tuple[tuple, int]] = {}
+        for tier_no, tier in enumerate(tiers):
+            if len(best) >= limit:
+                break
+            found: Dict[int, Tuple[tuple, int]] = {}
+            for term_id, text_no, offset in tier.scan(key):
+                if term_id in best:
+                    continue
+                term = self.terms[term_id]
+                if len(query) > KEY_CHARS:
+                    words = normalize(term.text(text_no)).split(" ")
+                    if not " ".join(words[offset:]).startswith(query):
+                        continue
+                rank = (tier_no, min(text_no, 1) if text_no != DESCRIPTION else 1, len(term.name), term.name)
+                if term_id not in found or rank < found[term_id][0]:
+                    found[term_id] = (rank, text_no)
+            best.update(found)
+
+        top = heapq.nsmallest(limit, best.items(), key=lambda item: item[1][0])
+        return [
+            Suggestion(
+                terminology=self.terms[term_id],
+                matched=self.terms[term_id].text(text_no),
+                source=_source(text_no),
+            )
+            for term_id, (_, text_no) in top
+        ]
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+    # ---- serialisation -------------------------------------
+
+    def dumps(self) -> bytes:
+        """The terms only; keys are rebuilt on load"""
+        payload = orjson.dumps({
+            "version": self.version,
+            "terms": [
+                (t.part_terminology_id, t.name, t.description, t.aliases, t.categories)
+                for t in self.terms.values()
+            ],
+        })
+        return zstandard.ZstdCompressor(level=SNAPSHOT_ZSTD_LEVEL).compress(payload)
+
+    @classmethod
+    def loads(cls, data: bytes) -> "TerminologyIndex":
+        raw = orjson.loads(zstandard.ZstdDecompressor().decompress(data))
+        return build_index(
+            raw["version"],
+            (
+                PartTerminology(tid, name, description, tuple(aliases), tuple(map(tuple, categories)))
+                for tid, name, description, aliases, categories in raw["terms"]
+            ),
+        )
+
+
+# ============================================================
+# Build
+# ============================================================
+
+def _word_keys(text: str) -> Iterable[Tuple[int, str]]:
+    words = normalize(text).split(" ")
+    for offset in range(len(words)):
+        if words[offset]:
+            yield offset, " ".join(words[offset:])[:KEY_CHARS]
+
+
+def build_index(version: str, terms: Iterable[PartTerminology]) -> TerminologyIndex:
+    by_id = {t.part_terminology_id: t for t in terms}
+
+    tiers: Tuple[list, ...] = ([], [], [])
+    exact: Dict[str, List[int]] = defaultdict(list)
+    for term_id, term in by_id.items():
+        texts = [(0, term.name)] + list(enumerate(term.aliases, start=1))
+        if term.description:
+            texts.append((DESCRIPTION, term.description))
+        for text_no, text in texts:
+            if text_no != DESCRIPTION:
+                exact[normalize(text)].append(term_id)
+            for offset, key in _word_keys(text):
+                tier = _DESCRIPTION_TIER if text_no == DESCRIPTION else min(offset, 1)
+                tiers[tier].append((key, term_id, text_no, offset))
+
+    return TerminologyIndex(
+        version=version,
+        terms=by_id,
+        tiers=tuple(PrefixKeys.from_entries(entries) for entries in tiers),
+        exact={k: tuple(dict.fromkeys(v)) for k, v in exact.items()},
+    )
+
+
+def build_from_db(version: Optional[str] = None) -> TerminologyIndex:
+    descriptions = dict(PartsDescription.objects.values_list("parts_description_id", "parts_description"))
+    alias_names = dict(Alias.objects.values_list("alias_id", "alias_name"))
+    category_names = dict(Categories.objects.values_list("category_id", "category_name"))
+    subcategory_names = dict(Subcategories.objects.values_list("sub_category_id", "sub_category_name"))
+
+    aliases: Dict[int, List[str]] = defaultdict(list)
+    for term_id, alias_id in PartsToAlias.objects.order_by("id").values_list("part_terminology_id", "alias_id"):
+        if alias_id in alias_names:
+            aliases[term_id].append(alias_names[alias_id])
+
+    categories: Dict[int, List[Tuple[str, str]]] = defaultdict(list)
+    for term_id, category_id, subcategory_id in PartCategory.objects.order_by(
+        "part_category_id"
+    ).values_list("part_terminology_id", "category_id", "subcategory_id"):
+        categories[term_id].append(
+            (category_names.get(category_id, ""), subcategory_names.get(subcategory_id, ""))
+        )
+
+    terms = (
+        PartTerminology(
+            part_terminology_id=term_id,
+            name=name,
+            description=descriptions.get(description_id),
+            aliases=tuple(dict.fromkeys(aliases.get(term_id, ()))),
+            categories=tuple(dict.fromkeys(categories.get(term_id, ()))),
+        )
+        for term_id, name, description_id in Parts.objects.values_list(
+            "part_terminology_id", "part_terminology_name", "parts_description_id"
+        ).iterator(chunk_size=10000)
+    )
+    return build_index(version or current_version(), terms)
+
+
+# ============================================================
+# Snapshot sharing
+# ============================================================
+
+def current_version() -> str:
+    """
+    Generation of the published index; changes with every publish_snapshot(),
+    which the PCdb loader (ingest_payloads --db pcdb) calls after a load.
+    """
+    version = cache.get(GENERATION_KEY)
+    if version is None:
+        version = new_version()
+        if not cache.add(GENERATION_KEY, version, timeout=None):
+            version = cache.get(GENERATION_KEY, version)
+    return version
+
+
+def new_version() -> str:
+    return str(time.time_ns())
+
+
+_snapshots: SnapshotCache[TerminologyIndex] = SnapshotCache(
+    "pcdb:terminology",
+    version=current_version,
+    build=build_from_db,
+    loads=TerminologyIndex.loads,
+    check_interval=CHECK_INTERVAL,
+)
+
+
+def get_index() -> TerminologyIndex:
+    """Process-wide terminology index, reloaded when PCdb changes"""
+    return _snapshots.get()
+
+
+def publish_snapshot(index: Optional[TerminologyIndex] = None) -> TerminologyIndex:
+    """
+    Share ``index`` (default: a fresh build) with every worker.
+
+    The snapshot is stored before the generation moves to its version,
+    so workers switching over always find it.
+    """
+    index = _snapshots.publish(index or build_from_db(new_version()))
+    cache.set(GENERATION_KEY, index.version, timeout=None)
+    return index
+
+
+def autocomplete(prefix: str, limit: int = DEFAULT_LIMIT, descriptions: bool = False) -> List[Suggestion]:
+    return get_index().autocomplete(prefix, limit=limit, descriptions=descriptions)
+
+
+def lookup(text: str) -> List[PartTerminology]:
+    return get_index().lookup(text)
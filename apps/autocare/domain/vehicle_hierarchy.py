@@ -0,0 +1,317 @@
+from __future__ import annotations
+
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import orjson
+import zstandard
+from django.db.models import Max
+
+from apps.autocare.domain.caching import SnapshotCache
+from apps.autocare.vcdb.models import (
+    BaseVehicle,
+    Make,
+    SubModel,
+    VCdbChanges,
+    VcdbVersion,
+    Vehicle,
+    VehicleModel,
+)
+
+
+CHECK_INTERVAL = 60      # seconds between VCdb version checks per process
+SNAPSHOT_ZSTD_LEVEL = 9
+
+_MAGIC = b"VCH1"
+_TYPECODE = "i"          # int32; every VCdb id fits
+
+# CSR levels, in order. Each ``*_start`` array has one more entry than its
+# keys and holds the child range [start[i], start[i+1]) in the next level.
+_ARRAYS = (
+    "year_keys", "year_start",
+    "make_keys", "make_start",
+    "model_keys", "model_base", "model_start",
+    "sub_keys", "sub_start",
+    "vehicles",
+)
+
+
+# ============================================================
+# Index
+# ============================================================
+
+@dataclass
+class VehicleHierarchy:
+    """
+    Year -> Make -> Model -> SubModel -> VehicleID, as flat sorted arrays.
+
+    Each level is a run of sorted child keys per parent (CSR layout), so a
+    lookup is a bisect inside the parent's slice and an answer is a slice
+    of an int32 array: no ORM, no joins, microseconds per call. Model
+    nodes carry their BaseVehicleID (Year + Make + Model is one
+    BaseVehicle); base vehicles without vehicles have no submodels.
+    """
+    version: str
+    year_keys: array
+    year_start: array
+    make_keys: array
+    make_start: array
+    model_keys: array
+    model_base: array
+    model_start: array
+    sub_keys: array
+    sub_start: array
+    vehicles: array
+    make_names: Dict[int, str] = field(default_factory=dict)
+    model_names: Dict[int, str] = field(default_factory=dict)
+    submodel_names: Dict[int, str] = field(default_factory=dict)
+
+    # ---- navigation ----------------------------------------
+
+    @staticmethod
+    def _find(keys: array, lo: int, hi: int, key: int) -> int:
+        i = bisect_left(keys, key, lo, hi)
+        return i if i < hi and keys[i] == key else -1
+
+    def _year(self, year: int) -> int:
+        return self._find(self.year_keys, 0, len(self.year_keys), year)
+
+    def _make(self, year: int, make_id: int) -> int:
+        y = self._year(year)
+        if y < 0:
+            return -1
+        return self._find(self.make_keys, self.year_start[y], self.year_start[y + 1], make_id)
+
+    def _model(self, year: int, make_id: int, model_id: int) -> int:
+        m = self._make(year, make_id)
+        if m < 0:
+            return -1
+        return self._find(self.model_keys, self.make_start[m], self.make_start[m + 1], model_id)
+
+    def _submodel(self, year: int, make_id: int, model_id: int, submodel_id: int) -> int:
+        md = self._model(year, make_id, model_id)
+        if md < 0:
+            return -1
+        return self._find(self.sub_keys, self.model_start[md], self.model_start[md + 1], submodel_id)
+
+    # ---- queries -------------------------------------------
+
+    def years(self) -> List[int]:
+        return self.year_keys.tolist()
+
+    def makes(self, year: int) -> List[int]:
+        y = self._year(year)
+        return self.make_keys[self.year_start[y]:self.year_start[y + 1]].tolist() if y >= 0 else []
+
+    def models(self, year: int, make_id: int) -> List[int]:
+        m = self._make(year, make_id)
+        return self.model_keys[self.make_start[m]:self.make_start[m + 1]].tolist() if m >= 0 else []
+
+    def submodels(self, year: int, make_id: int, model_id: int) -> List[int]:
+        md = self._model(year, make_id, model_id)
+        return self.sub_keys[self.model_start[md]:self.model_start[md + 1]].tolist() if md >= 0 else []
+
+    def base_vehicle_id(self, year: int, make_id: int, model_id: int) -> Optional[int]:
+        md = self._model(year, make_id, model_id)
+        return self.model_base[md] if md >= 0 else None
+
+    def vehicle_ids(
+        self,
+        year: int,
+        make_id: int,
+        model_id: int,
+        submodel_id: Optional[int] = None,
+    ) -> List[int]:
+        """Vehicles of a Year/Make/Model, optionally narrowed to one submodel"""
+        if submodel_id is not None:
+            s = self._submodel(year, make_id, model_id, submodel_id)
+            return self.vehicles[self.sub_start[s]:self.sub_start[s + 1]].tolist() if s >= 0 else []
+
+        md = self._model(year, make_id, model_id)
+        if md < 0:
+            return []
+        lo, hi = self.model_start[md], self.model_start[md + 1]
+        return sorted(self.vehicles[self.sub_start[lo]:self.sub_start[hi]])
+
+    def __len__(self) -> int:
+        return len(self.vehicles)
+
+    # ---- serialisation -------------------------------------
+
+    def dumps(self) -> bytes:
+        """
+        zstd(MAGIC | header length | orjson header | raw int32 arrays).
+
+        The header carries the version, names and array lengths; arrays are
+        written with tobytes() and read back with frombytes(), so loading
+        is a copy per array rather than a parse per element.
+        """
+        header = orjson.dumps({
+            "version": self.version,
+            "byteorder": sys.byteorder,
+            "lengths": [len(getattr(self, name)) for name in _ARRAYS],
+            "make_names": self.make_names,
+            "model_names": self.model_names,
+            "submodel_names": self.submodel_names,
+        }, option=orjson.OPT_NON_STR_KEYS)
+        parts = [_MAGIC, struct.pack("<I", len(header)), header]
+        parts.extend(getattr(self, name).tobytes() for name in _ARRAYS)
+        return zstandard.ZstdCompressor(level=SNAPSHOT_ZSTD_LEVEL).compress(b"".join(parts))
+
+    @classmethod
+    def loads(cls, data: bytes) -> "VehicleHierarchy":
+        raw = memoryview(zstandard.ZstdDecompressor().decompress(data))
+        if bytes(raw[:4]) != _MAGIC:
+            raise ValueError("Not a vehicle hierarchy snapshot")
+
+        (size,) = struct.unpack("<I", raw[4:8])
+        header = orjson.loads(raw[8:8 + size])
+        pos = 8 + size
+
+        arrays = {}
+        for name, length in zip(_ARRAYS, header["lengths"]):
+            arr = array(_TYPECODE)
+            end = pos + length * arr.itemsize
+            arr.frombytes(raw[pos:end])
+            if header["byteorder"] != sys.byteorder:
+                arr.byteswap()
+            arrays[name] = arr
+            pos = end
+
+        def _names(key):
+            return {int(k): v for k, v in header[key].items()}
+
+        return cls(
+            version=header["version"],
+            make_names=_names("make_names"),
+            model_names=_names("model_names"),
+            submodel_names=_names("submodel_names"),
+            **arrays,
+        )
+
+
+# ============================================================
+# Build
+# ============================================================
+
+def build_index(
+    version: str,
+    base_vehicles: Iterable[Tuple[int, int, int, int]],
+    vehicles: Iterable[Tuple[int, int, int]],
+    make_names: Optional[Dict[int, str]] = None,
+    model_names: Optional[Dict[int, str]] = None,
+    submodel_names: Optional[Dict[int, str]] = None,
+) -> VehicleHierarchy:
+    """
+    Build from (year, make_id, model_id, base_vehicle_id) and
+    (base_vehicle_id, submodel_id, vehicle_id) tuples.
+    """
+    by_base: Dict[int, List[Tuple[int, int]]] = defaultdict(list)
+    for base_id, sub_id, vehicle_id in vehicles:
+        by_base[base_id].append((sub_id, vehicle_id))
+
+    arrs = {name: array(_TYPECODE) for name in _ARRAYS}
+    year_keys, year_start = arrs["year_keys"], arrs["year_start"]
+    make_keys, make_start = arrs["make_keys"], arrs["make_start"]
+    model_keys, model_base, model_start = arrs["model_keys"], arrs["model_base"], arrs["model_start"]
+    sub_keys, sub_start = arrs["sub_keys"], arrs["sub_start"]
+    vehicles = arrs["vehicles"]
+
+    last_year = last_make = last_model = None
+    for year, make_id, model_id, base_id in sorted(set(base_vehicles)):
+        if year != last_year:
+            year_keys.append(year)
+            year_start.append(len(make_keys))
+            last_year, last_make, last_model = year, None, None
+        if make_id != last_make:
+            make_keys.append(make_id)
+            make_start.append(len(model_keys))
+            last_make, last_model = make_id, None
+        if model_id == last_model:
+            # Duplicate Year/Make/Model: the lowest BaseVehicleID wins
+            continue
+        last_model = model_id
+
+        model_keys.append(model_id)
+        model_base.append(base_id)
+        model_start.append(len(sub_keys))
+
+        last_sub = None
+        for sub_id, vehicle_id in sorted(by_base.get(base_id, ())):
+            if sub_id != last_sub:
+                sub_keys.append(sub_id)
+                sub_start.append(len(vehicles))
+                last_sub = sub_id
+            vehicles.append(vehicle_id)
+
+    # Closing offsets
+    year_start.append(len(make_keys))
+    make_start.append(len(model_keys))
+    model_start.append(len(sub_keys))
+    sub_start.append(len(vehicles))
+
+    return VehicleHierarchy(
+        version=version,
+        make_names=make_names or {},
+        model_names=model_names or {},
+        submodel_names=submodel_names or {},
+        **arrs,
+    )
+
+
+def current_version() -> str:
+    """
+    VCdb publication the tables reflect: the Version table's VersionDate
+    plus the last incrementally applied VCdbChanges VersionDate.
+    """
+    published = VcdbVersion.objects.aggregate(v=Max("version_date"))["v"]
+    applied = VCdbChanges.objects.aggregate(v=Max("version_date"))["v"]
+    return f"{published or '-'}+{applied.isoformat() if applied else '-'}"
+
+
+def build_from_db(version: Optional[str] = None) -> VehicleHierarchy:
+    return build_index(
+        version=version or current_version(),
+        base_vehicles=BaseVehicle.objects.values_list(
+            "vehicle_year_id", "make_id", "vehicle_model_id", "base_vehicle_id"
+        ).iterator(chunk_size=10000),
+        vehicles=Vehicle.objects.values_list(
+            "base_vehicle_id", "sub_model_id", "vehicle_id"
+        ).iterator(chunk_size=10000),
+        make_names=dict(Make.objects.values_list("make_id", "make_name")),
+        model_names=dict(VehicleModel.objects.values_list("model_id", "model_name")),
+        submodel_names=dict(SubModel.objects.values_list("submodel_id", "sub_model_name")),
+    )
+
+
+# ============================================================
+# Snapshot sharing
+# ============================================================
+
+_snapshots: SnapshotCache[VehicleHierarchy] = SnapshotCache(
+    "vcdb:hierarchy",
+    version=current_version,
+    build=build_from_db,
+    loads=VehicleHierarchy.loads,
+    check_interval=CHECK_INTERVAL,
+)
+
+
+def get_hierarchy() -> VehicleHierarchy:
+    """Process-wide index, reloaded when the VCdb version changes"""
+    return _snapshots.get()
+
+
+def publish_snapshot() -> VehicleHierarchy:
+    """Rebuild from the database and share it with every worker"""
+    return _snapshots.publish(build_from_db())
+
+
+def invalidate() -> None:
+    """Force the next get_hierarchy() call to re-check the VCdb version"""
+    _snapshots.invalidate()
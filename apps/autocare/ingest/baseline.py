@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from apps.autocare.api_client import AutocareAPIClient
+from apps.autocare.core.models import IngestState
+from apps.autocare.ingest.fetch import FetchResult, RateLimiter, ingest_endpoint_concurrent
+from apps.autocare.ingest.plans import DEFAULT_PAGE_SIZE, DatasetSpec, EndpointSpec
+from apps.autocare.services.raw_partitions import ensure_snapshot_partition
+
+
+# ============================================================
+# Shared HTTP resources
+# ============================================================
+
+@dataclass
+class HostResources:
+    """One pooled client + limiter per API host, shared by every endpoint on it"""
+    client: AutocareAPIClient
+    limiter: RateLimiter
+
+
+def build_host_resources(
+    datasets: Sequence[DatasetSpec],
+    host_concurrency: int,
+    host_rate: Optional[float],
+) -> Dict[str, HostResources]:
+    """
+    Map dataset name -> HostResources.
+
+    Datasets served by the same host (e.g. pcdb and padb) share a client,
+    its connection pool and the host's concurrency/rate budget.
+    """
+    by_host: Dict[str, HostResources] = {}
+    by_dataset: Dict[str, HostResources] = {}
+
+    for dataset in datasets:
+        host = settings.AUTOCARE_API_HOSTS[dataset.name].rstrip("/")
+        if host not in by_host:
+            by_host[host] = HostResources(
+                client=AutocareAPIClient(dataset.name),
+                limiter=RateLimiter(per_second=host_rate, max_concurrent=host_concurrency),
+            )
+        by_dataset[dataset.name] = by_host[host]
+
+    return by_dataset
+
+
+# ============================================================
+# Orchestration
+# ============================================================
+
+@dataclass(frozen=True)
+class BaselineTask:
+    dataset: DatasetSpec
+    spec: EndpointSpec
+    as_of: Optional[str]
+
+
+def completed_endpoints(dataset: str, as_of: Optional[str]) -> set[str]:
+    return set(
+        IngestState.objects.filter(
+            dataset=dataset,
+            as_of_date=as_of,
+        ).values_list("endpoint_key", flat=True)
+    )
+
+
+def record_completed(task: BaselineTask) -> None:
+    """Mark one endpoint done for its as-of date (idempotent, atomic)"""
+    with transaction.atomic():
+        IngestState.objects.get_or_create(
+            dataset=task.dataset.name,
+            endpoint_key=task.spec.key,
+            as_of_date=task.as_of,
+        )
+
+
+def _run_task(
+    task: BaselineTask,
+    resources: HostResources,
+    page_concurrency: int,
+    retries: int,
+    revalidate: bool = False,
+    stdout=None,
+) -> FetchResult:
+    """
+    Pull one endpoint, re-running it while pages fail.
+
+    Pages already stored are skipped by the fetcher, so each retry only
+    requests the pages that failed before.
+    """
+    try:
+        for attempt in range(1, retries + 1):
+            result = ingest_endpoint_concurrent(
+                resources.client,
+                task.spec,
+                asof=task.as_of if task.dataset.supports_as_of else None,
+                page_size=DEFAULT_PAGE_SIZE,
+                concurrency=page_concurrency,
+                limiter=resources.limiter,
+                revalidate=revalidate,
+                stdout=stdout,
+            )
+            if not result.failed_pages:
+                record_completed(task)
+                return result
+            if stdout:
+                stdout.write(
+                    f"⚠ {task.spec.key}: attempt {attempt}/{retries} incomplete "
+                    f"(failed pages: {result.failed_pages})\n"
+                )
+        return result
+    finally:
+        # Endpoint threads each hold their own DB connection
+        connection.close()
+
+
+def run_baseline(
+    datasets: Sequence[DatasetSpec],
+    as_of: Dict[str, Optional[str]],
+    resume: bool = False,
+    endpoint_workers: int = 4,
+    page_concurrency: int = 4,
+    host_concurrency: int = 8,
+    host_rate: Optional[float] = None,
+    retries: int = 3,
+    revalidate: bool = False,
+    stdout=None,
+) -> List[FetchResult]:
+    """
+    Pull every plan endpoint of ``datasets`` in-process and concurrently.
+
+    Up to ``endpoint_workers`` endpoints (from any dataset) run at once,
+    each fetching ``page_concurrency`` pages in parallel. All of that is
+    throttled per API host by ``host_concurrency``/``host_rate``. An
+    endpoint's IngestState row is written only once all its pages are
+    stored; with ``resume`` those endpoints are skipped. ``revalidate``
+    re-requests stored pages conditionally (see ingest_endpoint_concurrent).
+
+    Returns one FetchResult per endpoint attempted; endpoints that still
+    have failed pages, or that raised (``error`` set), are not marked
+    complete.
+    """
+    resources = build_host_resources(datasets, host_concurrency, host_rate)
+
+    tasks: List[BaselineTask] = []
+    for dataset in datasets:
+        if dataset.supports_as_of:
+            # Give the snapshot its own raw partition before pages arrive
+            ensure_snapshot_partition(dataset.name, as_of[dataset.name])
+
+        done = completed_endpoints(dataset.name, as_of[dataset.name]) if resume else set()
+        for spec in dataset.plan:
+            if spec.key in done:
+                if stdout:
+                    stdout.write(f"✓ Skipping {spec.key}\n")
+                continue
+            tasks.append(BaselineTask(dataset=dataset, spec=spec, as_of=as_of[dataset.name]))
+
+    results: List[FetchResult] = []
+    with ThreadPoolExecutor(max_workers=endpoint_workers) as pool:
+        futures = {
+            pool.submit(
+                _run_task,
+                task,
+                resources[task.dataset.name],
+                page_concurrency,
+                retries,
+                revalidate,
+                stdout,
+            ): task
+            for task in tasks
+        }
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as exc:
+                # One endpoint blowing up must not lose the others' results
+                result = FetchResult(spec=futures[future].spec, error=f"{type(exc).__name__}: {exc}")
+            results.append(result)
+            if stdout:
+                if result.error:
+                    stdout.write(f"✗ {result.spec.key}: {result.error}\n")
+                    continue
+                status = "✓" if not result.failed else "✗"
+                stdout.write(
+                    f"{status} {result.spec.key}: {result.written} pages written, "
+                    f"{result.not_modified} not modified, "
+                    f"{result.skipped_existing} already stored\n"
+                )
+
+    return results
@@ -0,0 +1,462 @@
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import nullcontext
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from apps.autocare.api_client import (
+    AutocareAPIClient,
+    AutocareAPIError,
+    decode_json,
+    response_validators,
+)
+from apps.autocare.core.models import AutocareRawRecord
+from apps.autocare.ingest.plans import EndpointSpec
+from apps.autocare.ingest.raw_store import attach_blobs
+from apps.autocare.pagination import extract_pagination
+from apps.autocare.utils import get_record_count
+
+
+# ============================================================
+# Rate limiting
+# ============================================================
+
+class RateLimiter:
+    """
+    Thread-safe request limiter shared by every thread hitting one host.
+
+    - ``per_second``: minimum spacing between request starts (None/0 = off)
+    - ``max_concurrent``: cap on requests in flight (None = no cap)
+
+    Use as a context manager around each request.
+    """
+
+    def __init__(self, per_second: Optional[float] = None, max_concurrent: Optional[int] = None):
+        self.interval = 1.0 / per_second if per_second else 0.0
+        self._lock = threading.Lock()
+        self._next = 0.0
+        self._slots = threading.BoundedSemaphore(max_concurrent) if max_concurrent else None
+
+    def wait(self) -> None:
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+    def __enter__(self) -> "RateLimiter":
+        if self._slots is not None:
+            self._slots.acquire()
+        self.wait()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        if self._slots is not None:
+            self._slots.release()
+
+
+# ============================================================
+# Page fetching
+# ============================================================
+
+@dataclass
+class FetchedPage:
+    page_number: Optional[int]
+    page_size: Optional[int]
+    http_status: int
+    data: Any
+    pagination: Optional[dict]
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+    @property
+    def not_modified(self) -> bool:
+        return self.http_status == 304
+
+
+@dataclass
+class FetchResult:
+    """Outcome of one endpoint pull"""
+    spec: EndpointSpec
+    total_pages: Optional[int] = None
+    written: int = 0
+    skipped_existing: int = 0
+    not_modified: int = 0
+    failed_pages: List[int] = field(default_factory=list)
+    # Set when the pull raised instead of finishing
+    error: Optional[str] = None
+
+    @property
+    def failed(self) -> bool:
+        return bool(self.failed_pages or self.error)
+
+
+def fetch_page(
+    client: AutocareAPIClient,
+    spec: EndpointSpec,
+    params: dict,
+    page_number: int,
+    limiter: Optional[RateLimiter] = None,
+    validators: Optional[dict] = None,
+) -> FetchedPage:
+    """
+    GET one page by number (independent of nextPageLink).
+
+    With ``validators`` the request is conditional; a 304 comes back as a
+    page with ``not_modified`` set and no data.
+    """
+    with limiter or nullcontext():
+        response = client.get(
+            spec.request_path,
+            params={**params, "pageNumber": page_number},
+            validators=validators,
+        )
+        data = None if response.status_code == 304 else decode_json(response)
+    pagination = extract_pagination(response)
+
+    return FetchedPage(
+        page_number=pagination.get("currentPage", page_number) if pagination else page_number,
+        page_size=pagination.get("pageSize") if pagination else None,
+        http_status=response.status_code,
+        data=data,
+        pagination=pagination,
+        **response_validators(response),
+    )
+
+
+def iter_pages_concurrently(
+    client: AutocareAPIClient,
+    spec: EndpointSpec,
+    params: dict,
+    page_numbers: Iterable[int],
+    concurrency: int,
+    limiter: Optional[RateLimiter] = None,
+    validators: Optional[Dict[int, dict]] = None,
+) -> Iterator[tuple[int, Optional[FetchedPage], Optional[Exception]]]:
+    """
+    Fetch pages on a thread pool sharing ``client``'s pooled session.
+
+    Yields (page number, page or None, error or None) as pages complete.
+    At most ``concurrency * 2`` requests are in flight, so memory stays
+    bounded however slowly the caller consumes results. Pages with an
+    entry in ``validators`` are requested conditionally.
+    """
+    validators = validators or {}
+    pages = iter(page_numbers)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        in_flight = {}
+
+        def _submit() -> bool:
+            page = next(pages, None)
+            if page is None:
+                return False
+            in_flight[
+                pool.submit(fetch_page, client, spec, params, page, limiter, validators.get(page))
+            ] = page
+            return True
+
+        while len(in_flight) < concurrency * 2 and _submit():
+            pass
+
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                page = in_flight.pop(future)
+                try:
+                    yield page, future.result(), None
+                except (AutocareAPIError, ValueError, OSError) as exc:
+                    yield page, None, exc
+                _submit()
+
+
+# ============================================================
+# Raw storage
+# ============================================================
+
+def existing_pages(spec: EndpointSpec, since: Optional[str], asof: Optional[str]) -> set[int]:
+    """Page numbers already stored for this endpoint/since/as-of (one query)"""
+    return set(
+        AutocareRawRecord.objects.filter(
+            source_db=spec.db,
+            endpoint_key=spec.key,
+            since_date=since,
+            as_of_date=asof,
+        )
+        .exclude(page_number__isnull=True)
+        .values_list("page_number", flat=True)
+    )
+
+
+@dataclass
+class StoredPage:
+    """Validators and body reference of one stored raw page"""
+    id: int
+    as_of_date: Optional[str]
+    page_size: Optional[int]
+    record_count: Optional[int]
+    blob_id: Optional[str]
+    etag: Optional[str]
+    last_modified: Optional[str]
+
+    @property
+    def validators(self) -> dict:
+        return {"etag": self.etag, "last_modified": self.last_modified}
+
+
+def stored_pages(
+    spec: EndpointSpec,
+    since: Optional[str],
+    asof: Optional[str],
+    page_size: int,
+) -> tuple[Dict[int, StoredPage], Dict[int, StoredPage]]:
+    """
+    Stored copies of each page of this endpoint, for conditional re-fetch.
+
+    Returns (this snapshot's pages, newest blob-backed copy with an ETag
+    from any other snapshot). Only the ETag of another snapshot's page is
+    sent: an If-None-Match match means the bytes are identical, whereas a
+    Last-Modified date says nothing about a different as-of date.
+    """
+    rows = (
+        AutocareRawRecord.objects.filter(
+            source_db=spec.db,
+            endpoint_key=spec.key,
+            since_date=since,
+            page_size=page_size,
+        )
+        .exclude(page_number__isnull=True)
+        .order_by("page_number", "-fetched_at")
+        .values_list(
+            "page_number", "id", "as_of_date", "page_size", "record_count",
+            "blob_id", "etag", "last_modified",
+        )
+    )
+
+    same: Dict[int, StoredPage] = {}
+    other: Dict[int, StoredPage] = {}
+    for page_number, *fields in rows:
+        page = StoredPage(*fields)
+        if page.as_of_date == asof:
+            same.setdefault(page_number, page)
+        elif page.blob_id and page.etag and page_number not in other:
+            page.last_modified = None
+            other[page_number] = page
+
+    return same, other
+
+
+def build_raw_record(
+    spec: EndpointSpec,
+    page: FetchedPage,
+    since: Optional[str],
+    asof: Optional[str],
+    mode: str,
+) -> AutocareRawRecord:
+    return AutocareRawRecord(
+        source_db=spec.db,
+        endpoint_key=spec.key,
+        request_path=spec.request_path,
+        since_date=since,
+        as_of_date=asof,
+        page_number=page.page_number,
+        page_size=page.page_size,
+        total_pages=(page.pagination or {}).get("totalPages"),
+        http_status=page.http_status,
+        record_count=get_record_count(page.data),
+        payload=page.data,
+        etag=page.etag,
+        last_modified=page.last_modified,
+        ingestion_mode=mode,
+    )
+
+
+def reuse_raw_record(
+    spec: EndpointSpec,
+    page: FetchedPage,
+    prior: StoredPage,
+    page_number: int,
+    since: Optional[str],
+    asof: Optional[str],
+    mode: str,
+) -> AutocareRawRecord:
+    """A new snapshot's page answered 304: point it at the unchanged blob"""
+    return AutocareRawRecord(
+        source_db=spec.db,
+        endpoint_key=spec.key,
+        request_path=spec.request_path,
+        since_date=since,
+        as_of_date=asof,
+        page_number=page_number,
+        page_size=prior.page_size,
+        total_pages=(page.pagination or {}).get("totalPages"),
+        http_status=page.http_status,
+        record_count=prior.record_count,
+        blob_id=prior.blob_id,
+        etag=page.etag or prior.etag,
+        last_modified=page.last_modified,
+        ingestion_mode=mode,
+    )
+
+
+def write_raw_records(records: List[AutocareRawRecord]) -> None:
+    """
+    Insert a batch of pages; a page stored concurrently by another run is ignored.
+
+    Page bodies go to the compressed blob store (see raw_store).
+    """
+    if records:
+        AutocareRawRecord.objects.bulk_create(attach_blobs(records), ignore_conflicts=True)
+
+
+def update_raw_records(records: List[AutocareRawRecord]) -> None:
+    """Replace the body and validators of re-fetched pages (records carry their id)"""
+    if records:
+        AutocareRawRecord.objects.bulk_update(
+            attach_blobs(records),
+            ["blob", "payload", "http_status", "record_count", "total_pages", "etag", "last_modified"],
+        )
+
+
+# ============================================================
+# Endpoint pull
+# ============================================================
+
+def _log(stdout, msg: str) -> None:
+    if stdout:
+        stdout.write(msg)
+
+
+def ingest_endpoint_concurrent(
+    client: AutocareAPIClient,
+    spec: EndpointSpec,
+    since: Optional[str] = None,
+    asof: Optional[str] = None,
+    page_size: int = 1000,
+    mode: str = "full",
+    start_page: Optional[int] = None,
+    concurrency: int = 8,
+    limiter: Optional[RateLimiter] = None,
+    write_batch: int = 20,
+    revalidate: bool = False,
+    stdout=None,
+) -> FetchResult:
+    """
+    Pull every page of ``spec`` into AutocareRawRecord concurrently.
+
+    The first page is fetched alone to read ``totalPages`` from the
+    X-Pagination header; the remaining pages are requested by number in
+    parallel. Pages already stored are never requested, and fetched pages
+    are written ``write_batch`` at a time. Failed pages are reported in
+    the result rather than retried here.
+
+    With ``revalidate``, pages are requested conditionally instead:
+    stored pages of this snapshot with their own ETag/Last-Modified
+    (and are replaced if they changed), new pages with the ETag of the
+    same page in an earlier snapshot. A 304 transfers no body; for a new
+    snapshot the page is stored pointing at the existing blob.
+    """
+    result = FetchResult(spec=spec)
+
+    params = {"pageSize": page_size}
+    if since:
+        params["SinceDate"] = since
+    if asof:
+        params["AsOfDate"] = asof
+
+    done = existing_pages(spec, since, asof)
+    first = start_page or 1
+
+    same: Dict[int, StoredPage] = {}
+    prior: Dict[int, StoredPage] = {}
+    if revalidate:
+        same, prior = stored_pages(spec, since, asof, page_size)
+        done = set()
+
+    batch: List[AutocareRawRecord] = []
+    changed: List[AutocareRawRecord] = []
+
+    def _flush() -> None:
+        write_raw_records(batch)
+        update_raw_records(changed)
+        result.written += len(batch) + len(changed)
+        batch.clear()
+        changed.clear()
+
+    def _validators(page_number: int) -> Optional[dict]:
+        stored = same.get(page_number) or prior.get(page_number)
+        return stored.validators if stored else None
+
+    def _accept(page_number: int, page: FetchedPage) -> None:
+        stored = same.get(page_number)
+
+        if page.not_modified or (stored and page.etag and page.etag == stored.etag):
+            result.not_modified += 1
+            if stored is None:
+                batch.append(
+                    reuse_raw_record(spec, page, prior[page_number], page_number, since, asof, mode)
+                )
+            return
+
+        record = build_raw_record(spec, page, since, asof, mode)
+        if stored is None:
+            batch.append(record)
+        else:
+            record.id = stored.id
+            changed.append(record)
+
+    # totalPages is needed before anything else, so the first page is
+    # always requested in full
+    try:
+        first_page = fetch_page(client, spec, params, first, limiter)
+    except (AutocareAPIError, ValueError, OSError) as exc:
+        _log(stdout, f"⚠ {spec.key}: page {first} failed ({exc})\n")
+        result.failed_pages.append(first)
+        return result
+
+    pagination = first_page.pagination or {}
+    result.total_pages = pagination.get("totalPages")
+
+    if first_page.page_number in done:
+        result.skipped_existing += 1
+    else:
+        _accept(first_page.page_number, first_page)
+
+    if result.total_pages is None:
+        _flush()
+        _log(stdout, f"⚠ {spec.key}: no totalPages in X-Pagination; fetched page {first} only\n")
+        return result
+
+    todo = [p for p in range(first + 1, result.total_pages + 1) if p not in done]
+    result.skipped_existing += (result.total_pages - first) - len(todo)
+
+    validators = {p: v for p in todo if (v := _validators(p))}
+
+    _log(
+        stdout,
+        f"{spec.key}: {result.total_pages} pages, {len(todo)} to fetch "
+        f"({len(validators)} conditional, {concurrency} concurrent)\n",
+    )
+
+    for page_number, page, exc in iter_pages_concurrently(
+        client, spec, params, todo, concurrency, limiter, validators
+    ):
+        if exc is not None:
+            result.failed_pages.append(page_number)
+            _log(stdout, f"⚠ {spec.key}: page {page_number} failed ({exc})\n")
+            continue
+
+        _accept(page_number, page)
+        if len(batch) + len(changed) >= write_batch:
+            _flush()
+            _log(stdout, f"{spec.key}: {result.written}/{len(todo) + 1} pages written\n")
+
+    _flush()
+    result.failed_pages.sort()
+    return result
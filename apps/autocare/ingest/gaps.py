@@ -0,0 +1,254 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Sequence
+
+from django.db import connection
+
+from apps.autocare.api_client import AutocareAPIClient, AutocareAPIError
+from apps.autocare.core.models import AutocareRawRecord
+from apps.autocare.ingest.fetch import (
+    RateLimiter,
+    build_raw_record,
+    fetch_page,
+    write_raw_records,
+)
+from apps.autocare.ingest.plans import EndpointSpec, get_spec
+
+
+# ============================================================
+# Detection
+# ============================================================
+
+@dataclass
+class PageGap:
+    """One run of consecutive missing pages of a stored endpoint pull"""
+    source_db: str
+    endpoint_key: str
+    request_path: str
+    since_date: Optional[str]
+    as_of_date: Optional[str]
+    page_size: Optional[int]
+    total_pages: int
+    first: int
+    last: int
+
+    @property
+    def pages(self) -> range:
+        return range(self.first, self.last + 1)
+
+    def __len__(self) -> int:
+        return self.last - self.first + 1
+
+    def __str__(self) -> str:
+        span = str(self.first) if self.first == self.last else f"{self.first}-{self.last}"
+        return f"{self.endpoint_key} as_of={self.as_of_date} pages {span} (of {self.total_pages})"
+
+
+_GAP_SQL = """
+WITH pages AS MATERIALIZED (
+    SELECT source_db,
+           endpoint_key,
+           COALESCE(since_date, '') AS s,
+           COALESCE(as_of_date, '') AS a,
+           COALESCE(page_size, 0)   AS ps,
+           page_number,
+           total_pages,
+           request_path
+    FROM {table}
+    WHERE page_number IS NOT NULL {where}
+),
+grp AS (
+    SELECT source_db, endpoint_key, s, a, ps,
+           -- Rows written before total_pages was recorded: only holes
+           -- below the highest stored page can be detected
+           COALESCE(max(total_pages), max(page_number)) AS total,
+           max(request_path) AS request_path
+    FROM pages
+    GROUP BY source_db, endpoint_key, s, a, ps
+),
+missing AS (
+    SELECT g.source_db, g.endpoint_key, g.s, g.a, g.ps, g.total, g.request_path, n
+    FROM grp g
+    CROSS JOIN LATERAL generate_series(1, g.total) AS n
+    WHERE NOT EXISTS (
+        SELECT 1 FROM pages p
+        WHERE p.source_db = g.source_db
+          AND p.endpoint_key = g.endpoint_key
+          AND p.s = g.s AND p.a = g.a AND p.ps = g.ps
+          AND p.page_number = n
+    )
+),
+islands AS (
+    SELECT *,
+           n - row_number() OVER (
+               PARTITION BY source_db, endpoint_key, s, a, ps ORDER BY n
+           ) AS island
+    FROM missing
+)
+SELECT source_db, endpoint_key, request_path,
+       NULLIF(s, ''), NULLIF(a, ''), NULLIF(ps, 0),
+       total, min(n), max(n)
+FROM islands
+GROUP BY source_db, endpoint_key, request_path, s, a, ps, total, island
+ORDER BY source_db, endpoint_key, a, s, ps, min(n)
+"""
+
+
+def find_gaps(
+    source_db: Optional[str] = None,
+    endpoint_key: Optional[str] = None,
+    since: Optional[str] = None,
+    asof: Optional[str] = None,
+) -> List[PageGap]:
+    """
+    Missing page ranges per (source_db, endpoint_key, since, as_of, page_size).
+
+    One query: every stored pull is expanded to generate_series(1,
+    totalPages) and anti-joined against the pages actually stored, then
+    consecutive missing pages are collapsed into ranges.
+    """
+    where, params = [], []
+    for column, value in (
+        ("source_db", source_db),
+        ("endpoint_key", endpoint_key),
+        ("since_date", since),
+        ("as_of_date", asof),
+    ):
+        if value is not None:
+            where.append(f"AND {column} = %s")
+            params.append(value)
+
+    sql = _GAP_SQL.format(table=AutocareRawRecord._meta.db_table, where=" ".join(where))
+
+    with connection.cursor() as cur:
+        cur.execute(sql, params)
+        return [PageGap(*row) for row in cur.fetchall()]
+
+
+def missing_endpoints(
+    plan: Sequence[EndpointSpec],
+    since: Optional[str] = None,
+    asof: Optional[str] = None,
+) -> List[EndpointSpec]:
+    """Plan endpoints with no stored page at all for this since/as-of"""
+    stored = set(
+        AutocareRawRecord.objects.filter(
+            source_db__in={spec.db for spec in plan},
+            endpoint_key__in=[spec.key for spec in plan],
+            since_date=since,
+            as_of_date=asof,
+        )
+        .values_list("endpoint_key", flat=True)
+        .distinct()
+    )
+    return [spec for spec in plan if spec.key not in stored]
+
+
+# ============================================================
+# Repair
+# ============================================================
+
+@dataclass
+class RepairResult:
+    requested: int = 0
+    written: int = 0
+    failed: Dict[str, List[int]] = field(default_factory=lambda: defaultdict(list))
+
+
+def gap_spec(gap: PageGap) -> EndpointSpec:
+    """EndpointSpec that requests the same path the gap's pages came from"""
+    parts = gap.request_path.strip("/").split("/")
+    if len(parts) == 4 and parts[0] == "api":
+        _, api_version, db, resource = parts
+        spec = EndpointSpec(db=db, resource=resource, api_version=api_version)
+        if spec.key == gap.endpoint_key:
+            return spec
+    return get_spec(gap.endpoint_key)
+
+
+def _gap_params(gap: PageGap) -> dict:
+    params = {}
+    if gap.page_size:
+        params["pageSize"] = gap.page_size
+    if gap.since_date:
+        params["SinceDate"] = gap.since_date
+    if gap.as_of_date:
+        params["AsOfDate"] = gap.as_of_date
+    return params
+
+
+def _iter_gap_pages(gaps: Sequence[PageGap]) -> Iterator[tuple[PageGap, EndpointSpec, dict, int]]:
+    for gap in gaps:
+        spec, params = gap_spec(gap), _gap_params(gap)
+        for page_number in gap.pages:
+            yield gap, spec, params, page_number
+
+
+def refetch_gaps(
+    gaps: Sequence[PageGap],
+    clients: Dict[str, AutocareAPIClient],
+    concurrency: int = 8,
+    limiter: Optional[RateLimiter] = None,
+    write_batch: int = 20,
+    mode: str = "full",
+    stdout=None,
+) -> RepairResult:
+    """
+    Request exactly the missing pages, ``concurrency`` at a time.
+
+    Pages from every gap share one bounded pool, so repair cost tracks the
+    number of missing pages rather than the number of endpoints.
+    ``clients`` maps source_db -> API client.
+    """
+    result = RepairResult()
+    tasks = _iter_gap_pages(gaps)
+    batch: List[AutocareRawRecord] = []
+
+    def _flush() -> None:
+        write_raw_records(batch)
+        result.written += len(batch)
+        batch.clear()
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        in_flight = {}
+
+        def _submit() -> bool:
+            task = next(tasks, None)
+            if task is None:
+                return False
+            gap, spec, params, page_number = task
+            future = pool.submit(
+                fetch_page, clients[gap.source_db], spec, params, page_number, limiter
+            )
+            in_flight[future] = task
+            result.requested += 1
+            return True
+
+        while len(in_flight) < concurrency * 2 and _submit():
+            pass
+
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                gap, spec, _, page_number = in_flight.pop(future)
+                try:
+                    page = future.result()
+                except (AutocareAPIError, ValueError, OSError) as exc:
+                    result.failed[gap.endpoint_key].append(page_number)
+                    if stdout:
+                        stdout.write(f"⚠ {gap.endpoint_key}: page {page_number} failed ({exc})\n")
+                else:
+                    batch.append(
+                        build_raw_record(spec, page, gap.since_date, gap.as_of_date, mode)
+                    )
+                    if len(batch) >= write_batch:
+                        _flush()
+                _submit()
+
+    _flush()
+    for pages in result.failed.values():
+        pages.sort()
+    return result
@@ -148,6 +148,9 @@ VCDB_BASELINE_PLAN: List[EndpointSpec] = [
     EndpointSpec("vcdb", "VehicleToMfrBodyCode", "v1", "VehicleToMfrBodyCode"),
 ]
 
+# Change log driving incremental VCdb updates (not part of the baseline replay)
+VCDB_CHANGES_SPEC = EndpointSpec("vcdb", "VCdbChanges", "v1", "VCdbChanges")
+
 
 PCDB_PLAN: List[EndpointSpec] = [
     EndpointSpec("pcdb", "ACESCodedValues", "v1", "ACESCodedValues"),
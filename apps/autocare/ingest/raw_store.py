@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+import hashlib
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+
+import orjson
+import zstandard
+
+from django.db import connection, transaction
+
+from apps.autocare.core.models import AutocareRawBlob, AutocareRawRecord
+
+
+# ============================================================
+# Codec
+# ============================================================
+
+ZSTD = "zstd"
+ZSTD_LEVEL = 9
+
+# zstd (de)compressors are not thread-safe; keep one per thread
+_local = threading.local()
+
+
+def _compressor() -> zstandard.ZstdCompressor:
+    c = getattr(_local, "compressor", None)
+    if c is None:
+        c = _local.compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL)
+    return c
+
+
+def _decompressor() -> zstandard.ZstdDecompressor:
+    d = getattr(_local, "decompressor", None)
+    if d is None:
+        d = _local.decompressor = zstandard.ZstdDecompressor()
+    return d
+
+
+def canonical_bytes(data: Any) -> bytes:
+    """Stable JSON encoding (sorted keys) so equal payloads hash equal"""
+    return orjson.dumps(data, option=orjson.OPT_SORT_KEYS)
+
+
+def content_hash(raw: bytes) -> str:
+    return hashlib.sha256(raw).hexdigest()
+
+
+def encode_blob(data: Any) -> AutocareRawBlob:
+    """Build an unsaved blob for one page of API data"""
+    raw = canonical_bytes(data)
+    body = _compressor().compress(raw)
+    return AutocareRawBlob(
+        sha256=content_hash(raw),
+        codec=ZSTD,
+        body=body,
+        raw_size=len(raw),
+        stored_size=len(body),
+    )
+
+
+def decode_blob(codec: str, body) -> Any:
+    if codec != ZSTD:
+        raise ValueError(f"Unknown raw blob codec: {codec!r}")
+    # Compressed frames carry their content size, so no max_output_size needed
+    return orjson.loads(_decompressor().decompress(bytes(body)))
+
+
+# ============================================================
+# Write / read
+# ============================================================
+
+def attach_blobs(records: Iterable[AutocareRawRecord]) -> List[AutocareRawRecord]:
+    """
+    Move each record's ``payload`` into a content-addressed blob.
+
+    Blobs are inserted with ON CONFLICT DO NOTHING, so a page identical to
+    one already stored (e.g. the same page pulled for a later as_of_date)
+    costs only its raw-record row. Records come back with ``blob_id`` set
+    and ``payload`` cleared, ready to be saved.
+    """
+    records = list(records)
+    blobs: Dict[str, AutocareRawBlob] = {}
+
+    for record in records:
+        if record.payload is None:
+            continue
+        blob = encode_blob(record.payload)
+        blobs.setdefault(blob.sha256, blob)
+        record.blob_id = blob.sha256
+        record.payload = None
+
+    if blobs:
+        AutocareRawBlob.objects.bulk_create(list(blobs.values()), ignore_conflicts=True)
+
+    return records
+
+
+def load_payload(record: AutocareRawRecord) -> Any:
+    """
+    Decoded page data for a raw record, whichever way it is stored.
+
+    If the blob was loaded with its body deferred (``defer("blob__body")``)
+    the body is read for this call only and not kept on the instance, so
+    callers holding many records hold no bodies.
+    """
+    if record.payload is not None:
+        payload = record.payload
+        if isinstance(payload, (str, bytes)):
+            payload = orjson.loads(payload)
+        return payload
+
+    if record.blob_id is None:
+        return None
+
+    blob = record.blob
+    if "body" in blob.get_deferred_fields():
+        body = AutocareRawBlob.objects.filter(pk=blob.pk).values_list("body", flat=True).get()
+        return decode_blob(blob.codec, body)
+    return decode_blob(blob.codec, blob.body)
+
+
+# ============================================================
+# Maintenance
+# ============================================================
+
+def compact_records(batch_size: int = 500, source_db: Optional[str] = None, stdout=None) -> int:
+    """
+    Move inline JSONB payloads into blobs, ``batch_size`` records at a time.
+
+    Each batch commits on its own, so the command can be stopped and
+    re-run. Returns the number of records compacted.
+    """
+    qs = AutocareRawRecord.objects.filter(payload__isnull=False, blob__isnull=True)
+    if source_db:
+        qs = qs.filter(source_db=source_db)
+
+    total = 0
+    while True:
+        with transaction.atomic():
+            batch = list(
+                qs.order_by("id").only("id", "payload")[:batch_size].select_for_update(skip_locked=True)
+            )
+            if not batch:
+                break
+            attach_blobs(batch)
+            AutocareRawRecord.objects.bulk_update(batch, ["blob", "payload"])
+
+        total += len(batch)
+        if stdout:
+            stdout.write(f"  compacted {total:,} records\n")
+
+    return total
+
+
+def prune_orphan_blobs() -> int:
+    """Delete blobs no raw record references any more"""
+    blob_t = AutocareRawBlob._meta.db_table
+    rec_t = AutocareRawRecord._meta.db_table
+    col = AutocareRawRecord._meta.get_field("blob").column
+
+    with connection.cursor() as cur:
+        cur.execute(
+            f"""
+            DELETE FROM {blob_t} b
+            WHERE NOT EXISTS (SELECT 1 FROM {rec_t} r WHERE r.{col} = b.sha256)
+            """
+        )
+        return cur.rowcount
+
+
+def storage_stats() -> Dict[str, int]:
+    """Blob count plus raw vs stored byte totals"""
+    with connection.cursor() as cur:
+        cur.execute(
+            f"SELECT count(*), COALESCE(sum(raw_size), 0), COALESCE(sum(stored_size), 0) "
+            f"FROM {AutocareRawBlob._meta.db_table}"
+        )
+        blobs, raw, stored = cur.fetchone()
+    return {"blobs": blobs, "raw_bytes": raw, "stored_bytes": stored}
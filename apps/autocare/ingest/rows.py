@@ -0,0 +1,164 @@
+"""
+Payload row helpers shared by the VCdb/PCdb loaders: compiled row
+mappers (payload row -> model constructor args) and batching.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple, Type
+
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+
+
+# ============================================================
+# Fields
+# ============================================================
+
+def is_required_field(field: models.Field) -> bool:
+    """
+    Required: not null, no default.
+    Auto PKs are not required.
+    """
+    if getattr(field, "null", False):
+        return False
+    if field.has_default():
+        return False
+    if getattr(field, "primary_key", False) and field.get_internal_type() in ("AutoField", "BigAutoField"):
+        return False
+    return True
+
+
+def build_column_map(model: Type[models.Model]) -> Dict[str, str]:
+    """
+    Normalized API key (no underscores, lowercase) -> django attribute
+    """
+    mapping: Dict[str, str] = {}
+
+    for field in model._meta.fields:
+        # Foreign keys
+        if field.is_relation and field.many_to_one:
+            if field.db_column:
+                mapping[field.db_column.replace("_", "").lower()] = field.attname
+            continue
+
+        # Real DB columns
+        if field.db_column:
+            mapping[field.db_column.replace("_", "").lower()] = field.name
+        else:
+            # API metadata fields (culture_id etc)
+            mapping[field.name.replace("_", "").lower()] = field.name
+
+    return mapping
+
+
+def chunked(seq: list[Any], size: int) -> Iterable[list[Any]]:
+    for i in range(0, len(seq), size):
+        yield seq[i:i + size]
+
+
+# ============================================================
+# Compiled row mapper
+# ============================================================
+
+# Payload values that mean NULL (as in ingest_payloads.normalize_value)
+NULL_STRINGS = ("null", "", "None")
+
+
+def _norm_key(s: str) -> str:
+    return s.replace("_", "").lower()
+
+
+def to_datetime(v: Any) -> Any:
+    """ingest_payloads.normalize_value's ISO-8601 handling, for date/datetime columns only"""
+    if not isinstance(v, str):
+        return v
+    try:
+        dt = datetime.fromisoformat(v)
+    except ValueError:
+        return v
+    if settings.USE_TZ and timezone.is_naive(dt):
+        return timezone.make_aware(dt, timezone.get_current_timezone())
+    return dt
+
+
+@dataclass(frozen=True)
+class RowMapper:
+    """
+    Payload row -> model constructor args, compiled once per (model, row shape).
+
+    ``keys`` holds, for every concrete field in declaration order, the
+    payload key feeding it (None when the payload has no such key), so a
+    row maps with one list comprehension and the instance is built with
+    positional args.
+    """
+    model: Type[models.Model]
+    shape: Tuple[str, ...]
+    attnames: Tuple[str, ...]
+    keys: Tuple[Optional[str], ...]
+    converters: Tuple[Tuple[int, Callable[[Any], Any]], ...]
+    required: Tuple[Tuple[int, str], ...]  # (position, db_column)
+
+    def values(self, row: dict[str, Any]) -> list[Any]:
+        get = row.get
+        vals = [None if (v := get(k)) in NULL_STRINGS else v for k in self.keys]
+        for i, conv in self.converters:
+            if vals[i] is not None:
+                vals[i] = conv(vals[i])
+        return vals
+
+    def missing_required(self, vals: list[Any]) -> list[str]:
+        return [db_col for i, db_col in self.required if vals[i] is None]
+
+    def build(self, vals: list[Any]) -> models.Model:
+        return self.model(*vals)
+
+    def as_dict(self, vals: list[Any]) -> dict[str, Any]:
+        return dict(zip(self.attnames, vals))
+
+
+@lru_cache(maxsize=None)
+def compile_row_mapper(model: Type[models.Model], shape: Tuple[str, ...]) -> RowMapper:
+    """
+    Resolve payload keys to model fields once for a row shape (its key tuple).
+
+    Matching follows build_column_map: keys are compared with underscores
+    removed, case-insensitively; if two payload keys normalise the same,
+    the later one wins.
+    """
+    col_map = build_column_map(model)
+
+    by_norm: Dict[str, str] = {}
+    for key in shape:
+        by_norm[_norm_key(str(key))] = key
+
+    source_for_attr: Dict[str, str] = {}
+    for norm, attr in col_map.items():
+        if norm in by_norm:
+            source_for_attr[attr] = by_norm[norm]
+
+    attnames = []
+    keys = []
+    converters = []
+    required = []
+    for i, field in enumerate(model._meta.concrete_fields):
+        attnames.append(field.attname)
+        # build_column_map targets attname for FKs and name otherwise
+        keys.append(source_for_attr.get(field.attname) or source_for_attr.get(field.name))
+
+        if isinstance(field, (models.DateTimeField, models.DateField)):
+            converters.append((i, to_datetime))
+        if field.db_column and is_required_field(field):
+            required.append((i, field.db_column))
+
+    return RowMapper(
+        model=model,
+        shape=shape,
+        attnames=tuple(attnames),
+        keys=tuple(keys),
+        converters=tuple(converters),
+        required=tuple(required),
+    )
@@ -0,0 +1,305 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Set, Type
+
+from django.apps import apps
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models, transaction
+from django.db.models import Max
+
+from apps.autocare.api_client import AutocareAPIClient
+from apps.autocare.ingest.rows import chunked, compile_row_mapper
+from apps.autocare.core.models import AutocareRawRecord
+from apps.autocare.ingest.fetch import RateLimiter, ingest_endpoint_concurrent
+from apps.autocare.ingest.plans import (
+    DEFAULT_PAGE_SIZE,
+    VCDB_BASELINE_PLAN,
+    VCDB_CHANGES_SPEC,
+    EndpointSpec,
+)
+from apps.autocare.ingest.raw_store import load_payload
+from apps.autocare.vcdb.deps import topo_sort_models
+from apps.autocare.vcdb.models import VCdbChanges
+
+
+APP_LABEL = "autocare_vcdb"
+DELETE = "D"
+
+
+# ============================================================
+# Change log
+# ============================================================
+
+def last_applied_version() -> Optional[datetime]:
+    """
+    Highest VersionDate already applied.
+
+    VCdbChanges only ever holds applied changes (they are written in the
+    same transaction as the rows they describe), so it is the watermark.
+    """
+    return VCdbChanges.objects.aggregate(v=Max("version_date"))["v"]
+
+
+def _stored_rows(spec: EndpointSpec, since: str, page_size: int) -> Iterator[dict]:
+    """Rows of the stored SinceDate pull of ``spec``, in page order"""
+    pages = (
+        AutocareRawRecord.objects
+        .filter(
+            source_db=spec.db,
+            endpoint_key=spec.key,
+            since_date=since,
+            as_of_date__isnull=True,
+            page_size=page_size,
+        )
+        .select_related("blob")
+        .order_by("page_number")
+    )
+    for page in pages.iterator(chunk_size=50):
+        payload = load_payload(page)
+        if not isinstance(payload, list):
+            raise RuntimeError(f"Payload is not a list (log_id={page.id})")
+        for row in payload:
+            if isinstance(row, dict):
+                yield row
+
+
+def _build(model: Type[models.Model], rows: Iterator[dict]) -> Iterator[models.Model]:
+    mapper = None
+    for row in rows:
+        shape = tuple(row)
+        if mapper is None or shape != mapper.shape:
+            mapper = compile_row_mapper(model, shape)
+        yield mapper.build(mapper.values(row))
+
+
+# ============================================================
+# Planning
+# ============================================================
+
+@dataclass
+class TableChanges:
+    """Net effect of the change log on one VCdb table"""
+    spec: EndpointSpec
+    model: Type[models.Model]
+    upsert_ids: Set[int] = field(default_factory=set)
+    delete_ids: Set[int] = field(default_factory=set)
+    rows: List[models.Model] = field(default_factory=list)
+
+    @property
+    def key(self) -> models.Field:
+        """
+        Field the change log ID refers to: the primary key, or for the few
+        tables modelled with a surrogate id, the ``<TableName>ID`` column.
+        """
+        pk = self.model._meta.pk
+        if pk.db_column:
+            return pk
+        column = f"{self.spec.resource}ID".lower()
+        for f in self.model._meta.concrete_fields:
+            if f.db_column and f.db_column.lower() == column:
+                return f
+        raise ValueError(f"{self.model.__name__} has no column for {self.spec.resource}ID")
+
+    @property
+    def missing_ids(self) -> Set[int]:
+        """Changed ids the SinceDate pull did not return"""
+        attname = self.key.attname
+        return self.upsert_ids - {getattr(obj, attname) for obj in self.rows}
+
+
+@dataclass
+class ChangeSet:
+    since: str
+    changes: List[VCdbChanges] = field(default_factory=list)
+    tables: Dict[str, TableChanges] = field(default_factory=dict)
+    unknown_tables: Dict[str, int] = field(default_factory=dict)
+    failed_pages: Dict[str, List[int]] = field(default_factory=dict)
+
+    @property
+    def missing(self) -> Dict[str, Set[int]]:
+        return {name: t.missing_ids for name, t in self.tables.items() if t.missing_ids}
+
+
+def _table_specs() -> Dict[str, EndpointSpec]:
+    """VCdb TableName (case-insensitive) -> EndpointSpec"""
+    return {spec.resource.lower(): spec for spec in VCDB_BASELINE_PLAN if spec.django_model}
+
+
+def fetch_changes(
+    client: AutocareAPIClient,
+    since: str,
+    after: Optional[datetime],
+    page_size: int = DEFAULT_PAGE_SIZE,
+    concurrency: int = 8,
+    limiter: Optional[RateLimiter] = None,
+    stdout=None,
+) -> ChangeSet:
+    """
+    Pull VCdbChanges since ``since`` and the rows they touch.
+
+    Change entries with VersionDate <= ``after`` (already applied) are
+    dropped, and repeated entries for one row collapse to the latest
+    action. Only tables with upserts are pulled, each with the same
+    SinceDate, and only rows whose id is in the change log are kept.
+    Pulls are stored as raw pages like any other and revalidated on
+    rerun, so an interrupted apply resumes without refetching.
+    """
+    result = ChangeSet(since=since)
+    pull = dict(
+        since=since,
+        page_size=page_size,
+        mode="incremental",
+        concurrency=concurrency,
+        limiter=limiter,
+        revalidate=True,
+        stdout=stdout,
+    )
+
+    fetched = ingest_endpoint_concurrent(client, VCDB_CHANGES_SPEC, **pull)
+    if fetched.failed_pages:
+        result.failed_pages[VCDB_CHANGES_SPEC.key] = fetched.failed_pages
+        return result
+
+    latest: Dict[tuple, VCdbChanges] = {}
+    for change in _build(VCdbChanges, _stored_rows(VCDB_CHANGES_SPEC, since, page_size)):
+        if after is not None and change.version_date <= after:
+            continue
+        result.changes.append(change)
+        key = (change.table_name.lower(), int(change.vcdb_changes_id))
+        prior = latest.get(key)
+        if prior is None or change.version_date >= prior.version_date:
+            latest[key] = change
+
+    specs = _table_specs()
+    for (table, row_id), change in latest.items():
+        spec = specs.get(table)
+        if spec is None:
+            result.unknown_tables[change.table_name] = result.unknown_tables.get(change.table_name, 0) + 1
+            continue
+
+        tc = result.tables.get(spec.django_model)
+        if tc is None:
+            model = apps.get_model(APP_LABEL, spec.django_model)
+            tc = result.tables[spec.django_model] = TableChanges(spec=spec, model=model)
+
+        if change.action.upper() == DELETE:
+            tc.delete_ids.add(row_id)
+        else:
+            tc.upsert_ids.add(row_id)
+
+    for tc in result.tables.values():
+        if not tc.upsert_ids:
+            continue
+        fetched = ingest_endpoint_concurrent(client, tc.spec, **pull)
+        if fetched.failed_pages:
+            result.failed_pages[tc.spec.key] = fetched.failed_pages
+            continue
+        attname = tc.key.attname
+        tc.rows = [
+            obj for obj in _build(tc.model, _stored_rows(tc.spec, since, page_size))
+            if getattr(obj, attname) in tc.upsert_ids
+        ]
+
+    return result
+
+
+# ============================================================
+# Apply
+# ============================================================
+
+@dataclass
+class ApplyResult:
+    upserted: Dict[str, int] = field(default_factory=dict)
+    deleted: Dict[str, int] = field(default_factory=dict)
+    recorded: int = 0
+    # model name -> vehicle ids whose rows in it were added, changed or removed
+    touched_vehicles: Dict[str, Set[int]] = field(default_factory=dict)
+
+
+def _touched_vehicles(tc: TableChanges, batch_size: int) -> Set[int]:
+    """Vehicles referenced by the changed rows, before and after the change"""
+    if tc.model._meta.model_name == "vehicle":
+        return tc.upsert_ids | tc.delete_ids
+
+    try:
+        tc.model._meta.get_field("vehicle")
+    except FieldDoesNotExist:
+        return set()
+
+    touched = {obj.vehicle_id for obj in tc.rows}
+    lookup = f"{tc.key.attname}__in"
+    for batch in chunked(sorted(tc.upsert_ids | tc.delete_ids), batch_size):
+        touched.update(tc.model.objects.filter(**{lookup: batch}).values_list("vehicle_id", flat=True))
+    return touched
+
+
+def _delete(tc: TableChanges, ids: Set[int], batch_size: int) -> int:
+    deleted = 0
+    lookup = f"{tc.key.attname}__in"
+    for batch in chunked(sorted(ids), batch_size):
+        deleted += tc.model.objects.filter(**{lookup: batch}).delete()[1].get(tc.model._meta.label, 0)
+    return deleted
+
+
+def _upsert(tc: TableChanges, batch_size: int) -> None:
+    model, objs = tc.model, tc.rows
+    pk = model._meta.pk
+
+    if not tc.key.primary_key:
+        # No unique key to conflict on: replace the changed rows
+        _delete(tc, tc.upsert_ids, batch_size)
+        model.objects.bulk_create(objs, batch_size=batch_size)
+        return
+
+    update_fields = [f.name for f in model._meta.concrete_fields if not f.primary_key]
+    for batch in chunked(objs, batch_size):
+        if update_fields:
+            model.objects.bulk_create(
+                batch,
+                update_conflicts=True,
+                unique_fields=[pk.name],
+                update_fields=update_fields,
+            )
+        else:
+            model.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def apply_changes(changeset: ChangeSet, batch_size: int = 1000, stdout=None) -> ApplyResult:
+    """
+    Apply a fetched ChangeSet in one transaction.
+
+    Upserts run parents-first (FK topological order), deletes run
+    children-first, and the applied VCdbChanges entries are recorded
+    last, which advances the watermark only if everything else landed.
+    """
+    result = ApplyResult()
+    order = topo_sort_models(APP_LABEL, list(changeset.tables))
+
+    with transaction.atomic():
+        for name in order:
+            touched = _touched_vehicles(changeset.tables[name], batch_size)
+            if touched:
+                result.touched_vehicles[name] = touched
+
+        for name in order:
+            tc = changeset.tables[name]
+            if tc.rows:
+                _upsert(tc, batch_size)
+                result.upserted[name] = len(tc.rows)
+                if stdout:
+                    stdout.write(f"  ✔ {name}: upserted {len(tc.rows)}\n")
+
+        for name in reversed(order):
+            tc = changeset.tables[name]
+            if tc.delete_ids:
+                deleted = _delete(tc, tc.delete_ids, batch_size)
+                result.deleted[name] = deleted
+                if stdout:
+                    stdout.write(f"  ✔ {name}: deleted {deleted}\n")
+
+        VCdbChanges.objects.bulk_create(changeset.changes, batch_size=batch_size)
+        result.recorded = len(changeset.changes)
+
+    return result
@@ -1,25 +1,114 @@
+import logging
+import threading
 import time
+
 import requests
 from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
 
 
 class AutocareOAuthClient:
+    """
+    Password-grant token holder shared by every process.
+
+    The token lives in the Django cache (Redis in deployed settings), so all
+    Celery workers and ingest processes reuse one token per expiry window:
+
+    - an in-process copy avoids a cache round trip per request
+    - refresh is single-flight: one thread per process, and one process
+      across the fleet (cache.add lock), fetches a new token; others wait
+      for it to appear in the cache
+    - the token is refreshed proactively AUTOCARE_OAUTH_REFRESH_MARGIN
+      seconds (at most half its lifetime) before expiry, while callers
+      keep using the current one
+    """
+
+    CACHE_KEY = "autocare:oauth:token"
+    LOCK_KEY = "autocare:oauth:token:refresh"
+    LOCK_TIMEOUT = 60       # seconds; longer than a token request can take
+    WAIT_TIMEOUT = 30       # seconds to wait for another process's refresh
+    EXPIRY_SKEW = 30        # never hand out a token this close to expiry
+
     _access_token = None
     _expires_at = 0
+    _refresh_at = 0
+    _lock = threading.Lock()
 
     @classmethod
     def get_access_token(cls):
         """
         Return a valid access token.
-        Automatically refreshes if expired.
+        Automatically refreshes if expired (or about to expire).
         """
-        now = time.time()
+        if cls._access_token and time.time() < cls._refresh_at:
+            return cls._access_token
+
+        with cls._lock:
+            if cls._access_token and time.time() < cls._refresh_at:
+                return cls._access_token
+
+            cls._adopt(cache.get(cls.CACHE_KEY))
+            if cls._access_token and time.time() < cls._refresh_at:
+                return cls._access_token
+
+            if cache.add(cls.LOCK_KEY, 1, timeout=cls.LOCK_TIMEOUT):
+                try:
+                    cls._fetch_token()
+                except Exception:
+                    if not cls._usable():
+                        raise
+                    # Proactive refresh failed; the current token is still good
+                    logger.exception("Autocare OAuth refresh failed; keeping current token")
+                finally:
+                    cache.delete(cls.LOCK_KEY)
+                return cls._access_token
+
+            # Another process is refreshing. A still-valid token keeps
+            # being used; otherwise wait for the new one to be published.
+            if cls._usable():
+                return cls._access_token
+
+            deadline = time.time() + cls.WAIT_TIMEOUT
+            while time.time() < deadline:
+                time.sleep(0.2)
+                cls._adopt(cache.get(cls.CACHE_KEY))
+                if cls._usable():
+                    return cls._access_token
 
-        if cls._access_token and now < cls._expires_at:
+            logger.warning("Timed out waiting for shared Autocare OAuth refresh; fetching directly")
+            cls._fetch_token()
             return cls._access_token
 
-        cls._fetch_token()
-        return cls._access_token
+    @classmethod
+    def _usable(cls) -> bool:
+        return bool(cls._access_token) and time.time() < cls._expires_at - cls.EXPIRY_SKEW
+
+    @classmethod
+    def _adopt(cls, shared) -> None:
+        """Take the cached token if it outlives the one held in-process"""
+        if shared and shared["expires_at"] > cls._expires_at:
+            cls._access_token = shared["access_token"]
+            cls._expires_at = shared["expires_at"]
+            cls._refresh_at = shared["refresh_at"]
+
+    @classmethod
+    def invalidate(cls, token=None):
+        """
+        Forget the current token (e.g. after a 401).
+
+        With ``token``, only clear it if it is still the one in use, so a
+        burst of 401s does not discard a token another caller just fetched.
+        """
+        with cls._lock:
+            if token is None or token == cls._access_token:
+                cls._access_token = None
+                cls._expires_at = cls._refresh_at = 0
+
+            shared = cache.get(cls.CACHE_KEY)
+            if shared and (token is None or shared["access_token"] == token):
+                cache.delete(cls.CACHE_KEY)
 
     @classmethod
     def _fetch_token(cls):
@@ -47,7 +136,21 @@ class AutocareOAuthClient:
             )
 
         payload = response.json()
+        expires_in = payload.get("expires_in", 3600)
+
+        now = time.time()
+        margin = min(getattr(settings, "AUTOCARE_OAUTH_REFRESH_MARGIN", 300), expires_in / 2)
 
         cls._access_token = payload["access_token"]
-        cls._expires_at = time.time() + payload.get("expires_in", 3600) - 30
+        cls._expires_at = now + expires_in
+        cls._refresh_at = now + expires_in - margin
 
+        cache.set(
+            cls.CACHE_KEY,
+            {
+                "access_token": cls._access_token,
+                "expires_at": cls._expires_at,
+                "refresh_at": cls._refresh_at,
+            },
+            timeout=max(int(expires_in - cls.EXPIRY_SKEW), 1),
+        )
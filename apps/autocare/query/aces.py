@@ -0,0 +1,358 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from django.apps import apps
+from django.core.cache import cache
+from django.db import connection
+
+from apps.autocare.aces.models import AcesFitment, AcesQualifier, FITMENT_ATTRIBUTE_CODES
+from apps.autocare.domain import vehicle_hierarchy
+from apps.autocare.services.aces_fitment import fitment_generation, fitment_key
+
+
+VCDB = "autocare_vcdb"
+CACHE_TIMEOUT = 3600
+
+
+# ============================================================
+# Vehicle configuration
+# ============================================================
+
+@dataclass(frozen=True)
+class _Source:
+    """
+    A join path from a vehicle to VCdb attribute ids.
+
+    ``chain`` starts at a VehicleTo* model (filtered on VehicleID); each
+    further step is (model, column on the previous table, column on this
+    one). ``attrs`` maps ACES attribute names to columns of the last table.
+    """
+    chain: Tuple[Tuple[str, ...], ...]
+    attrs: Dict[str, str]
+
+
+_ENGINE = (("VehicleToEngineConfig",), ("EngineConfig2", "EngineConfigID", "EngineConfigID"))
+_TRANSMISSION = (("VehicleToTransmission",), ("Transmission", "TransmissionID", "TransmissionID"))
+
+_SOURCES: Sequence[_Source] = (
+    _Source(_ENGINE, {
+        "engine_base": "EngineBaseID",
+        "engine_block": "EngineBlockID",
+        "engine_bore_stroke": "EngineBoreStrokeID",
+        "engine_designation": "EngineDesignationID",
+        "engine_vin": "EngineVINID",
+        "engine_version": "EngineVersionID",
+        "engine_mfr": "EngineMfrID",
+        "cylinder_head_type": "CylinderHeadTypeID",
+        "fuel_type": "FuelTypeID",
+        "ignition_system_type": "IgnitionSystemTypeID",
+        "aspiration": "AspirationID",
+        "power_output": "PowerOutputID",
+        "valves_per_engine": "ValvesID",
+    }),
+    _Source(_ENGINE + (("FuelDeliveryConfig", "FuelDeliveryConfigID", "FuelDeliveryConfigID"),), {
+        "fuel_delivery_type": "FuelDeliveryTypeID",
+        "fuel_delivery_sub_type": "FuelDeliverySubTypeID",
+        "fuel_system_control_type": "FuelSystemControlTypeID",
+        "fuel_system_design": "FuelSystemDesignID",
+    }),
+    _Source(_TRANSMISSION, {
+        "transmission_base": "TransmissionBaseID",
+        "transmission_mfr_code": "TransmissionMfrCodeID",
+        "trans_elec_controlled": "TransmissionElecControlledID",
+        "transmission_mfr": "TransmissionMfrID",
+    }),
+    _Source(_TRANSMISSION + (("TransmissionBase", "TransmissionBaseID", "TransmissionBaseID"),), {
+        "transmission_type": "TransmissionTypeID",
+        "transmission_num_speeds": "TransmissionNumSpeedsID",
+        "transmission_control_type": "TransmissionControlTypeID",
+    }),
+    _Source((("VehicleToDriveType",),), {"drive_type": "DriveTypeID"}),
+    _Source((("VehicleToWheelBase",),), {"wheel_base": "WheelBaseID"}),
+    _Source((("VehicleToMfrBodyCode",),), {"mfr_body_code": "MfrBodyCodeID"}),
+    _Source((("VehicleToBodyStyleConfig",), ("BodyStyleConfig", "BodyStyleConfigID", "BodyStyleConfigID")), {
+        "body_type": "BodyTypeID",
+        "body_num_doors": "BodyNumDoorsID",
+    }),
+    _Source((("VehicleToBedConfig",), ("BedConfig", "BedConfigID", "BedConfigID")), {
+        "bed_type": "BedTypeID",
+        "bed_length": "BedLengthID",
+    }),
+    _Source((("VehicleToBrakeConfig",), ("BrakeConfig", "BrakeConfigID", "BrakeConfigID")), {
+        "front_brake_type": "FrontBrakeTypeID",
+        "rear_brake_type": "RearBrakeTypeID",
+        "brake_system": "BrakeSystemID",
+        "brake_abs": "BrakeABSID",
+    }),
+    _Source((("VehicleToSteeringConfig",), ("SteeringConfig", "SteeringConfigID", "SteeringConfigID")), {
+        "steering_type": "SteeringTypeID",
+        "steering_system": "SteeringSystemID",
+    }),
+    _Source((("VehicleToSpringTypeConfig",), ("SpringTypeConfig", "SpringTypeConfigID", "SpringTypeConfigID")), {
+        "front_spring_type": "FrontSpringTypeID",
+        "rear_spring_type": "RearSpringTypeID",
+    }),
+)
+
+
+def _table(model_name: str) -> str:
+    return apps.get_model(VCDB, model_name)._meta.db_table
+
+
+def _columns(model_name: str) -> Set[str]:
+    return {f.column for f in apps.get_model(VCDB, model_name)._meta.concrete_fields}
+
+
+def _source_sql(source: _Source) -> Optional[str]:
+    """One SELECT yielding (attribute, id) rows for %s = VehicleID"""
+    q = connection.ops.quote_name
+    link = source.chain[0][0]
+    joins = [f"{_table(link)} t0"]
+    for i, (model_name, prev_col, col) in enumerate(source.chain[1:], start=1):
+        joins.append(f"JOIN {_table(model_name)} t{i} ON t{i}.{q(col)} = t{i - 1}.{q(prev_col)}")
+
+    last = len(source.chain) - 1
+    present = _columns(source.chain[-1][0])
+    # Columns the model does not declare are skipped (nothing to match on)
+    values = ", ".join(
+        f"('{name}', t{last}.{q(col)})"
+        for name, col in source.attrs.items()
+        if col in present and name in FITMENT_ATTRIBUTE_CODES
+    )
+    if not values:
+        return None
+    return (
+        f"SELECT x.name, x.id FROM {' '.join(joins)} "
+        f"CROSS JOIN LATERAL (VALUES {values}) x(name, id) "
+        f"WHERE t0.{q('VehicleID')} = %s AND x.id IS NOT NULL"
+    )
+
+
+_ATTRIBUTE_SQL: Optional[Tuple[str, int]] = None
+
+
+def _attribute_sql() -> Tuple[str, int]:
+    """UNION ALL of every source; built once (returns SQL and parameter count)"""
+    global _ATTRIBUTE_SQL
+    if _ATTRIBUTE_SQL is None:
+        parts = [sql for sql in map(_source_sql, _SOURCES) if sql]
+        _ATTRIBUTE_SQL = ("\nUNION ALL\n".join(parts), len(parts))
+    return _ATTRIBUTE_SQL
+
+
+@dataclass
+class VehicleConfiguration:
+    """A vehicle's identity plus every VCdb attribute id it is offered with"""
+    vehicle_id: int
+    base_vehicle_id: int
+    year: int
+    make_id: int
+    model_id: int
+    submodel_id: int
+    attributes: Dict[str, Set[int]] = field(default_factory=dict)
+
+    def fitment_keys(self) -> List[int]:
+        """AcesFitment.attribute_keys elements this vehicle satisfies"""
+        return sorted(
+            fitment_key(name, attr_id)
+            for name, ids in self.attributes.items()
+            for attr_id in ids
+        )
+
+
+def vehicle_configuration(vehicle_id: int) -> Optional[VehicleConfiguration]:
+    """
+    Full VCdb configuration of one vehicle in two queries.
+
+    A vehicle offered with several engines (transmissions, bodies...)
+    carries every one of their ids; an application matches if each of
+    its attributes is among them.
+    """
+    q = connection.ops.quote_name
+    with connection.cursor() as cur:
+        cur.execute(
+            f"SELECT v.{q('BaseVehicleID')}, bv.{q('YearID')}, bv.{q('MakeID')}, bv.{q('ModelID')}, "
+            f"v.{q('SubmodelID')}, v.{q('RegionID')}, m.{q('VehicleTypeID')} "
+            f"FROM {_table('Vehicle')} v "
+            f"JOIN {_table('BaseVehicle')} bv ON bv.{q('BaseVehicleID')} = v.{q('BaseVehicleID')} "
+            f"LEFT JOIN {_table('VehicleModel')} m ON m.{q('ModelID')} = bv.{q('ModelID')} "
+            f"WHERE v.{q('VehicleID')} = %s",
+            [vehicle_id],
+        )
+        row = cur.fetchone()
+        if row is None:
+            return None
+
+        base_vehicle_id, year, make_id, model_id, submodel_id, region_id, vehicle_type_id = row
+        attributes: Dict[str, Set[int]] = defaultdict(set)
+        if region_id is not None:
+            attributes["region"].add(region_id)
+        if vehicle_type_id is not None:
+            attributes["vehicle_type"].add(vehicle_type_id)
+
+        sql, n = _attribute_sql()
+        if n:
+            cur.execute(sql, [vehicle_id] * n)
+            for name, attr_id in cur.fetchall():
+                attributes[name].add(attr_id)
+
+    return VehicleConfiguration(
+        vehicle_id=vehicle_id,
+        base_vehicle_id=base_vehicle_id,
+        year=year,
+        make_id=make_id,
+        model_id=model_id,
+        submodel_id=submodel_id,
+        attributes=dict(attributes),
+    )
+
+
+# ============================================================
+# Reverse fitment
+# ============================================================
+
+@dataclass(frozen=True)
+class Qualifier:
+    qual_id: int
+    text: Optional[str]
+    params: Tuple[Optional[str], ...] = ()
+
+
+@dataclass
+class PartMatch:
+    app_id: int
+    part_number: str
+    brand_aaiaid: Optional[str]
+    qualifiers: List[Qualifier] = field(default_factory=list)
+
+    @property
+    def conditional(self) -> bool:
+        """Fits only if the qualifiers hold for the vehicle"""
+        return bool(self.qualifiers)
+
+
+@dataclass
+class VehicleFitment:
+    vehicle: VehicleConfiguration
+    # part_type_id -> position_id -> parts
+    parts: Dict[int, Dict[Optional[int], List[PartMatch]]] = field(default_factory=dict)
+
+    def __len__(self) -> int:
+        return sum(len(p) for by_pos in self.parts.values() for p in by_pos.values())
+
+
+_CANDIDATES_SQL = """
+SELECT f.app_id, f.part_number, f.part_type_id, f.position_id, f.brand_aaiaid, q.quals
+FROM {fitment} f
+LEFT JOIN LATERAL (
+    SELECT json_agg(json_build_array(q.qual_id, q.qual_text, q.param_1, q.param_2, q.param_3) ORDER BY q.id) AS quals
+    FROM {qualifier} q
+    WHERE q.app_id = f.app_id
+) q ON true
+WHERE (
+        f.base_vehicle_id = %(base_vehicle_id)s
+     OR (f.base_vehicle_id IS NULL
+         AND f.make_id = %(make_id)s AND f.model_id = %(model_id)s
+         AND COALESCE(f.year_from, 0) <= %(year)s AND COALESCE(f.year_to, 9999) >= %(year)s)
+  )
+  AND (f.submodel_id IS NULL OR f.submodel_id = %(submodel_id)s)
+  AND f.attribute_keys <@ %(keys)s::bigint[]
+  {part_types}
+ORDER BY f.part_type_id, f.position_id, f.app_id
+"""
+
+
+def _match(
+    vehicle: VehicleConfiguration,
+    part_type_ids: Optional[Sequence[int]],
+    confirmed_qualifiers: Optional[Set[int]],
+) -> VehicleFitment:
+    params = {
+        "base_vehicle_id": vehicle.base_vehicle_id,
+        "make_id": vehicle.make_id,
+        "model_id": vehicle.model_id,
+        "year": vehicle.year,
+        "submodel_id": vehicle.submodel_id,
+        "keys": vehicle.fitment_keys(),
+    }
+    part_types = ""
+    if part_type_ids:
+        part_types = "AND f.part_type_id = ANY(%(part_type_ids)s)"
+        params["part_type_ids"] = list(part_type_ids)
+
+    with connection.cursor() as cur:
+        cur.execute(
+            _CANDIDATES_SQL.format(
+                fitment=AcesFitment._meta.db_table,
+                qualifier=AcesQualifier._meta.db_table,
+                part_types=part_types,
+            ),
+            params,
+        )
+        rows = cur.fetchall()
+
+    result = VehicleFitment(vehicle=vehicle)
+    for app_id, part_number, part_type_id, position_id, brand, raw_quals in rows:
+        app_quals = [
+            Qualifier(qual_id, text, tuple(p for p in qparams if p is not None))
+            for qual_id, text, *qparams in raw_quals or ()
+        ]
+        if confirmed_qualifiers is not None and any(
+            q.qual_id not in confirmed_qualifiers for q in app_quals
+        ):
+            continue
+        result.parts.setdefault(part_type_id, {}).setdefault(position_id, []).append(
+            PartMatch(app_id, part_number, brand, app_quals)
+        )
+    return result
+
+
+def parts_for_vehicle(
+    vehicle_id: int,
+    part_type_ids: Optional[Iterable[int]] = None,
+    confirmed_qualifiers: Optional[Iterable[int]] = None,
+    use_cache: bool = True,
+) -> Optional[VehicleFitment]:
+    """
+    ACES applications that fit a vehicle, grouped by part type and position.
+
+    Candidates are the AcesFitment rows for the vehicle's base vehicle
+    (or make/model with a year range covering it) and submodel; an app
+    is kept if every attribute it is constrained by is in the vehicle's
+    configuration (``attribute_keys <@`` the vehicle's keys, evaluated
+    in the same query). Apps with qualifiers are returned with them
+    attached; pass ``confirmed_qualifiers`` to keep only apps whose
+    qualifiers are all confirmed for this vehicle.
+
+    Results are cached per vehicle and part type filter, and keyed on the
+    VCdb version and the AcesFitment generation, so a VCdb update or an
+    ACES load invalidates them.
+
+    Returns None for an unknown vehicle.
+    """
+    part_types = sorted(set(part_type_ids)) if part_type_ids is not None else None
+    confirmed = set(confirmed_qualifiers) if confirmed_qualifiers is not None else None
+
+    key = None
+    if use_cache and confirmed is None:
+        key = "autocare:aces:vehicle-parts:{}:{}:{}:{}".format(
+            vehicle_id,
+            ",".join(map(str, part_types)) if part_types else "*",
+            vehicle_hierarchy.current_version(),
+            fitment_generation(),
+        )
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+
+    vehicle = vehicle_configuration(vehicle_id)
+    if vehicle is None:
+        return None
+
+    result = _match(vehicle, part_types, confirmed)
+    if key is not None:
+        cache.set(key, result, timeout=CACHE_TIMEOUT)
+    return result
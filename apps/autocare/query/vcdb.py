@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+from typing import List, Optional, Tuple
+
+from apps.autocare.domain.vehicle_hierarchy import get_hierarchy
+
+
+# YMM dropdown queries, served from the in-memory vehicle hierarchy.
+# Option lists are (id, label) pairs in id order.
+
+
+def years() -> List[int]:
+    return get_hierarchy().years()
+
+
+def makes(year: int) -> List[Tuple[int, str]]:
+    h = get_hierarchy()
+    return [(make_id, h.make_names.get(make_id, "")) for make_id in h.makes(year)]
+
+
+def models(year: int, make_id: int) -> List[Tuple[int, str]]:
+    h = get_hierarchy()
+    return [(model_id, h.model_names.get(model_id) or "") for model_id in h.models(year, make_id)]
+
+
+def submodels(year: int, make_id: int, model_id: int) -> List[Tuple[int, str]]:
+    h = get_hierarchy()
+    return [
+        (submodel_id, h.submodel_names.get(submodel_id, ""))
+        for submodel_id in h.submodels(year, make_id, model_id)
+    ]
+
+
+def base_vehicle_id(year: int, make_id: int, model_id: int) -> Optional[int]:
+    return get_hierarchy().base_vehicle_id(year, make_id, model_id)
+
+
+def vehicle_ids(
+    year: int,
+    make_id: int,
+    model_id: int,
+    submodel_id: Optional[int] = None,
+) -> List[int]:
+    return get_hierarchy().vehicle_ids(year, make_id, model_id, submodel_id)
@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import time
+from time import perf_counter
+from typing import Optional
+
+from django.core.cache import cache
+from django.db import connection, transaction
+
+from apps.autocare.aces.models import (
+    AcesApp,
+    AcesAppVehicle,
+    AcesFitment,
+    AcesVehicleType,
+    ACES_TYPED_TABLES,
+    FITMENT_ATTRIBUTE_CODES,
+)
+
+
+# -------------------------
+# Attribute keys
+# -------------------------
+
+def fitment_key(name: str, attr_id: int) -> int:
+    """Encode one attribute id as an AcesFitment.attribute_keys element"""
+    return (FITMENT_ATTRIBUTE_CODES[name] << 32) + int(attr_id)
+
+
+def fitment_keys(**attrs: Optional[int]) -> list[int]:
+    """
+    Encode a vehicle configuration for an ``attribute_keys`` lookup.
+
+    Example:
+        fitment_keys(engine_base=1234, drive_type=7)
+    """
+    return sorted(
+        fitment_key(name, attr_id)
+        for name, attr_id in attrs.items()
+        if attr_id is not None
+    )
+
+
+def _column(model, field_name: str) -> str:
+    return connection.ops.quote_name(model._meta.get_field(field_name).column)
+
+
+def _key_sources() -> list[str]:
+    """
+    SELECTs yielding (app_id, key) for every attribute source of an app.
+
+    Each is joined to the ``scope`` CTE so only the apps being refreshed
+    are read.
+    """
+    sources = []
+
+    # Axis attributes live as columns on AcesAppVehicle: unpivot in one scan
+    vehicle_cols = {f.attname for f in AcesAppVehicle._meta.concrete_fields}
+    axis = [
+        f"(({FITMENT_ATTRIBUTE_CODES[name]}::bigint << 32) + v.{_column(AcesAppVehicle, id_field)})"
+        for name, (id_field, _) in ACES_TYPED_TABLES.items()
+        if id_field in vehicle_cols
+    ]
+    if axis:
+        values = ", ".join(f"({expr})" for expr in axis)
+        sources.append(
+            f"SELECT v.app_id, x.key FROM {AcesAppVehicle._meta.db_table} v "
+            f"JOIN scope s ON s.id = v.app_id "
+            f"CROSS JOIN LATERAL (VALUES {values}) x(key) "
+            f"WHERE x.key IS NOT NULL"
+        )
+
+    typed = [
+        (name, id_field, model_cls)
+        for name, (id_field, model_cls) in ACES_TYPED_TABLES.items()
+    ]
+    typed.append(("vehicle_type", "vehicle_type_id", AcesVehicleType))
+
+    for name, id_field, model_cls in typed:
+        sources.append(
+            f"SELECT t.app_id, ({FITMENT_ATTRIBUTE_CODES[name]}::bigint << 32) "
+            f"+ t.{_column(model_cls, id_field)} "
+            f"FROM {model_cls._meta.db_table} t JOIN scope s ON s.id = t.app_id"
+        )
+
+    return sources
+
+
+def _refresh_sql(source_file: Optional[str]) -> tuple[str, list]:
+    app_t = AcesApp._meta.db_table
+    veh_t = AcesAppVehicle._meta.db_table
+    fit_t = AcesFitment._meta.db_table
+
+    where = "NOT EXISTS (SELECT 1 FROM {fit} f WHERE f.app_id = a.id)".format(fit=fit_t)
+    params = []
+    if source_file is not None:
+        where = "a.source_file = %s AND " + where
+        params.append(source_file)
+
+    keys_sql = "\n        UNION ALL\n        ".join(_key_sources())
+
+    sql = f"""
+    WITH scope AS (
+        SELECT a.id FROM {app_t} a WHERE {where}
+    ),
+    keys AS (
+        {keys_sql}
+    ),
+    agg AS (
+        SELECT app_id, array_agg(DISTINCT key ORDER BY key) AS keys
+        FROM keys
+        GROUP BY app_id
+    )
+    INSERT INTO {fit_t} (
+        app_id, source_file, part_number, part_type_id, position_id, brand_aaiaid,
+        year_from, year_to, base_vehicle_id, make_id, model_id, submodel_id,
+        attribute_keys
+    )
+    SELECT
+        a.id, a.source_file, a.part_number, a.part_type_id, a.position_id, a.brand_aaiaid,
+        v.year_from, v.year_to,
+        v.{_column(AcesAppVehicle, "base_vehicle")},
+        v.{_column(AcesAppVehicle, "make")},
+        v.{_column(AcesAppVehicle, "model")},
+        v.{_column(AcesAppVehicle, "submodel")},
+        COALESCE(k.keys, '{{}}'::bigint[])
+    FROM scope s
+    JOIN {app_t} a ON a.id = s.id
+    LEFT JOIN {veh_t} v ON v.app_id = a.id
+    LEFT JOIN agg k ON k.app_id = a.id
+    """
+    return sql, params
+
+
+# -------------------------
+# Generation
+# -------------------------
+
+GENERATION_KEY = "autocare:aces:fitment:generation"
+
+
+def fitment_generation() -> int:
+    """Changes whenever AcesFitment is refreshed; part of fitment result cache keys"""
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        generation = time.time_ns()
+        if not cache.add(GENERATION_KEY, generation, timeout=None):
+            generation = cache.get(GENERATION_KEY, generation)
+    return generation
+
+
+def bump_fitment_generation() -> None:
+    cache.set(GENERATION_KEY, time.time_ns(), timeout=None)
+
+
+# -------------------------
+# Refresh
+# -------------------------
+
+def refresh_fitment(source_file: Optional[str] = None, stdout=None) -> int:
+    """
+    Materialise AcesFitment rows for apps that do not have one yet.
+
+    Loaded apps are never updated in place (delta loads delete and
+    re-insert), and deleting an app cascades to its fitment row, so
+    "insert what is missing" keeps the fact table current after any
+    ingest mode. Pass ``source_file`` to limit the scan to one file.
+    """
+    t0 = perf_counter()
+    sql, params = _refresh_sql(source_file)
+
+    with transaction.atomic():
+        with connection.cursor() as cur:
+            cur.execute(sql, params)
+            n = cur.rowcount
+            cur.execute(f"ANALYZE {AcesFitment._meta.db_table}")
+        # Deleted apps cascade to their fitment rows, so bump even if n == 0
+        transaction.on_commit(bump_fitment_generation)
+
+    if stdout:
+        stdout.write(f"      ✓ Materialised {n:,} fitment rows in {perf_counter() - t0:0.2f}s\n")
+
+    return n
+
+
+def rebuild_fitment_for_file(source_file: str, stdout=None) -> int:
+    """Drop and re-materialise the fitment rows of one source file"""
+    with transaction.atomic():
+        AcesFitment.objects.filter(source_file=source_file).delete()
+        return refresh_fitment(source_file=source_file, stdout=stdout)
+
+
+def rebuild_fitment(stdout=None) -> int:
+    """Drop every fitment row and materialise the table from scratch"""
+    with transaction.atomic():
+        with connection.cursor() as cur:
+            cur.execute(f"TRUNCATE TABLE {AcesFitment._meta.db_table}")
+        return refresh_fitment(stdout=stdout)
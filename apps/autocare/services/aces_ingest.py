@@ -1,15 +1,20 @@
 from __future__ import annotations
 
-from dataclasses import fields
+import hashlib
+from dataclasses import dataclass, fields, replace
+from functools import lru_cache
+from itertools import islice
 from time import perf_counter
-from typing import Any, Optional
+from typing import Any, Iterable, Iterator, Optional
 from collections import defaultdict
 
-from django.db import transaction
+from django.db import connection, transaction
+from django.db.models import Exists, OuterRef, Q
+from lxml import etree
 from tqdm import tqdm
 from xsdata.formats.dataclass.parsers import XmlParser
 
-from apps.autocare.aces.schemas import Aces
+from apps.autocare.aces.schemas import Aces, App
 from apps.autocare.aces.models import (
     AcesApp,
     AcesAppVehicle,
@@ -18,6 +23,7 @@ from apps.autocare.aces.models import (
     AcesVehicleType,
     ACES_TYPED_TABLES,
 )
+from apps.autocare.services.pg_copy import allocate_pks, copy_instances
 
 
 # -------------------------
@@ -87,6 +93,11 @@ def _validate_flag(app) -> bool:
     return str(v).strip().lower() not in {"no", "false", "0"}
 
 
+def app_content_hash(app) -> str:
+    """Stable hash of an <App>'s content, ignoring the add/delete action"""
+    return hashlib.sha1(repr(replace(app, action=None)).encode()).hexdigest()
+
+
 def _log(stdout, msg: str) -> None:
     """Log message to stdout if available"""
     if stdout:
@@ -94,77 +105,138 @@ def _log(stdout, msg: str) -> None:
 
 
 # -------------------------
-# Main ingestion function
+# Field routing
 # -------------------------
 
-@transaction.atomic
-def ingest_aces_file(path: str, stdout=None, batch_size: int = 5000) -> dict:
+# Fields that are explicitly mapped to core tables
+CORE_APP_FIELDS = {
+    "id", "action", "validate_value", "qty", "part", "part_type",
+    "position", "mfr_label", "display_order", "asset_name",
+    "asset_item_order", "asset_item_ref"
+}
+
+CORE_REL_FIELDS = {"qual", "note"}
+
+# Special fields that need custom handling
+SPECIAL_FIELDS = {"years", "sub_model", "vehicle_type", "production_years"}
+
+# Vehicle-axis fields to populate AcesAppVehicle
+VEHICLE_AXIS_FIELDS = {
+    "base_vehicle": "base_vehicle_id",
+    "make": "make_id",
+    "model": "model_id",
+    "engine_base": "engine_base_id",
+    "engine_block": "engine_block_id",
+    "engine_vin": "engine_vin_id",
+    "aspiration": "aspiration_id",
+    "transmission_base": "transmission_base_id",
+    "transmission_type": "transmission_type_id",
+    "transmission_control_type": "transmission_control_type_id",
+    "transmission_num_speeds": "transmission_num_speeds_id",
+    "drive_type": "drive_type_id",
+    "fuel_type": "fuel_type_id",
+    "equipment_base": "equipment_base_id",
+    "equipment_model": "equipment_model_id",
+    "mfr": "mfr_id",
+}
+
+
+# Models whose PK is known before insert (AcesAppVehicle shares the app PK)
+PREALLOCATED_PK_MODELS = (AcesApp, AcesAppVehicle)
+
+
+@dataclass(frozen=True)
+class RoutePlan:
     """
-    Comprehensive ACES XML ingestion with ZERO data loss.
+    Field routing for one xsdata App class, compiled once.
 
-    All data is captured in one of:
-    - AcesApp (core fields)
-    - AcesAppVehicle (vehicle identification axis)
-    - AcesQualifier (qualifiers with params)
-    - Typed attribute tables (via ACES_TYPED_TABLES)
-    - AcesVehicleType (for multiple vehicle types)
-    - AcesRawAttribute (notes + unmapped attributes)
+    The per-app loop just walks these tuples instead of re-deriving
+    dataclass fields and set membership for every application.
+    """
+    axis: tuple[tuple[str, str], ...]              # (xsdata field, AcesAppVehicle column)
+    typed: tuple[tuple[str, str, type], ...]       # (xsdata field, id column, typed model)
+    raw: tuple[str, ...]                           # fields stored in AcesRawAttribute
+    year_from: bool
+    year_to: bool
+    submodel: bool
+    production_year_start: bool
+    production_year_end: bool
+
+
+@lru_cache(maxsize=None)
+def compile_route_plan(app_cls: type, vehicle_cols: frozenset[str]) -> RoutePlan:
+    """Build the RoutePlan for an xsdata App class (cached per class)"""
+    handled = CORE_APP_FIELDS | CORE_REL_FIELDS | SPECIAL_FIELDS | VEHICLE_AXIS_FIELDS.keys()
+
+    typed = []
+    raw = []
+    for f in fields(app_cls):
+        if f.name in handled:
+            continue
+        if f.name in ACES_TYPED_TABLES:
+            id_field, model_cls = ACES_TYPED_TABLES[f.name]
+            typed.append((f.name, id_field, model_cls))
+        else:
+            raw.append(f.name)
+
+    return RoutePlan(
+        axis=tuple(
+            (src_field, dst_col)
+            for src_field, dst_col in VEHICLE_AXIS_FIELDS.items()
+            if dst_col in vehicle_cols
+        ),
+        typed=tuple(typed),
+        raw=tuple(raw),
+        year_from="year_from" in vehicle_cols,
+        year_to="year_to" in vehicle_cols,
+        submodel="submodel_id" in vehicle_cols,
+        production_year_start="production_year_start" in vehicle_cols,
+        production_year_end="production_year_end" in vehicle_cols,
+    )
 
-    Nothing is skipped.
+
+# -------------------------
+# Streaming helpers
+# -------------------------
+
+def _iter_app_elements(path: str) -> Iterator[Any]:
     """
+    Yield <App> lxml elements one at a time without building the full document.
 
-    t0 = perf_counter()
-    _log(stdout, "\n" + "=" * 70 + "\n")
-    _log(stdout, "  ACES FILE INGESTION - ZERO DATA LOSS MODE\n")
-    _log(stdout, "=" * 70 + "\n")
-    _log(stdout, "[1/6] Reading & parsing ACES XML...\n")
+    Each element is cleared together with its already-processed siblings
+    once the consumer resumes, so memory stays flat regardless of file size.
+    """
+    context = etree.iterparse(path, events=("end",), tag="{*}App", huge_tree=True)
 
-    parser = XmlParser()
-    with open(path, "rb") as f:
-        aces: Aces = parser.parse(f, Aces)
+    for _, elem in context:
+        yield elem
 
-    parse_s = perf_counter() - t0
-    total = len(aces.app)
+        # Release the element and everything parsed before it
+        elem.clear(keep_tail=True)
+        parent = elem.getparent()
+        if parent is not None:
+            while elem.getprevious() is not None:
+                del parent[0]
 
-    _log(stdout, f"      ✓ Parsed {total:,} applications in {parse_s:0.2f}s\n")
-    _log(stdout, f"[2/6] Analyzing field structure...\n")
+    del context
 
-    # Fields that are explicitly mapped to core tables
-    CORE_APP_FIELDS = {
-        "id", "action", "validate_value", "qty", "part", "part_type",
-        "position", "mfr_label", "display_order", "asset_name",
-        "asset_item_order", "asset_item_ref"
-    }
 
-    CORE_REL_FIELDS = {"qual", "note"}
-
-    # Special fields that need custom handling
-    SPECIAL_FIELDS = {"years", "sub_model", "vehicle_type", "production_years"}
-
-    # Vehicle-axis fields to populate AcesAppVehicle
-    VEHICLE_AXIS_FIELDS = {
-        "base_vehicle": "base_vehicle_id",
-        "make": "make_id",
-        "model": "model_id",
-        "engine_base": "engine_base_id",
-        "engine_block": "engine_block_id",
-        "engine_vin": "engine_vin_id",
-        "aspiration": "aspiration_id",
-        "transmission_base": "transmission_base_id",
-        "transmission_type": "transmission_type_id",
-        "transmission_control_type": "transmission_control_type_id",
-        "transmission_num_speeds": "transmission_num_speeds_id",
-        "drive_type": "drive_type_id",
-        "fuel_type": "fuel_type_id",
-        "equipment_base": "equipment_base_id",
-        "equipment_model": "equipment_model_id",
-        "mfr": "mfr_id",
-    }
+def iter_aces_apps(path: str) -> Iterator[App]:
+    """Stream <App> elements bound to the xsdata App dataclass"""
+    parser = XmlParser()
+    for elem in _iter_app_elements(path):
+        yield parser.parse(elem, App)
 
-    # Determine which columns exist on AcesAppVehicle model
-    vehicle_cols = {f.name for f in AcesAppVehicle._meta.get_fields() if hasattr(f, "attname")}
 
-    stats = {
+def iter_aces_app_bytes(path: str) -> Iterator[bytes]:
+    """Stream <App> elements as serialized XML (cheap to ship to worker processes)"""
+    for elem in _iter_app_elements(path):
+        yield etree.tostring(elem)
+
+
+def new_stats() -> dict:
+    """Empty ingestion counters"""
+    return {
         "apps": 0,
         "vehicles": 0,
         "quals": 0,
@@ -173,262 +245,125 @@ def ingest_aces_file(path: str, stdout=None, batch_size: int = 5000) -> dict:
         "notes": 0,
         "vehicle_types": 0,
         "skipped_fields": defaultdict(int),  # Track fields we couldn't map
+        # Delta mode only
+        "deleted": 0,
+        "replaced": 0,
+        "unchanged": 0,
     }
 
-    _log(stdout, f"[3/6] Processing {total:,} applications...\n")
-    bar = tqdm(total=total, desc="      Progress", unit="apps")
 
-    # Process in chunks for performance
-    for start in range(0, total, batch_size):
-        chunk = aces.app[start:start + batch_size]
+def vehicle_columns() -> set[str]:
+    """
+    Attribute names of the AcesAppVehicle columns (``attname``, so the
+    BaseVehicle/Make/Model/SubModel FKs appear as ``base_vehicle_id``...)
+    """
+    return {f.attname for f in AcesAppVehicle._meta.concrete_fields}
 
-        # Build core app objects
-        app_objs = []
-        for app in chunk:
-            app_objs.append(
-                AcesApp(
-                    source_file=path,
-                    app_id=_to_int(app.id),
-                    action=getattr(app, "action", None),
-                    validate=_validate_flag(app),
-                    part_number=_get_part_value(app),
-                    part_type_id=_attr_id(getattr(app, "part_type", None)),
-                    quantity=_to_int(getattr(app, "qty", None)),
-                    position_id=_attr_id(getattr(app, "position", None)),
-                    brand_aaiaid=_get_part_brand(app),
-                    subbrand_aaiaid=_get_part_subbrand(app),
-                    mfr_label=_to_str(getattr(app, "mfr_label", None)),
-                    display_order=_to_int(getattr(app, "display_order", None)),
-                    asset_name=_to_str(getattr(app, "asset_name", None)),
-                    asset_item_order=_to_int(getattr(app, "asset_item_order", None)),
-                    asset_item_ref=_to_str(getattr(app, "asset_item_ref", None)),
-                )
-            )
 
-        # Insert apps (will get PKs back on Postgres)
-        AcesApp.objects.bulk_create(app_objs, batch_size=batch_size)
-
-        # Prepare related object lists
-        vehicle_objs = []
-        qual_objs = []
-        raw_objs = []
-        vehicle_type_objs = []
-        typed_objs_by_model = defaultdict(list)
-
-        for app, app_obj in zip(chunk, app_objs):
-
-            # ========== VEHICLE AXIS ==========
-            veh = AcesAppVehicle(app=app_obj)
-
-            # Map simple vehicle identification fields
-            for src_field, dst_col in VEHICLE_AXIS_FIELDS.items():
-                if dst_col not in vehicle_cols:
-                    continue
-
-                val = getattr(app, src_field, None)
-                if val is not None:
-                    setattr(veh, dst_col, _attr_id(val))
-
-            # Handle Years (year range)
-            years = getattr(app, "years", None)
-            if years is not None:
-                if "year_from" in vehicle_cols:
-                    setattr(veh, "year_from", _to_int(getattr(years, "from_value", None)))
-                if "year_to" in vehicle_cols:
-                    setattr(veh, "year_to", _to_int(getattr(years, "to", None)))
-
-            # Handle SubModel (take first if list)
-            sm = getattr(app, "sub_model", None)
-            if sm and "submodel_id" in vehicle_cols:
-                if isinstance(sm, list):
-                    if sm:
-                        setattr(veh, "submodel_id", _attr_id(sm[0]))
-                else:
-                    setattr(veh, "submodel_id", _attr_id(sm))
-
-            # Handle ProductionYears for equipment
-            prod_years = getattr(app, "production_years", None)
-            if prod_years is not None:
-                if "production_year_start" in vehicle_cols:
-                    setattr(veh, "production_year_start",
-                            _to_int(getattr(prod_years, "production_start", None)))
-                if "production_year_end" in vehicle_cols:
-                    setattr(veh, "production_year_end",
-                            _to_int(getattr(prod_years, "production_end", None)))
-
-            vehicle_objs.append(veh)
-
-            # ========== QUALIFIERS ==========
-            for q in getattr(app, "qual", []) or []:
-                params = [
-                    _to_str(getattr(p, "value_attribute", None) or getattr(p, "value", None))
-                    for p in (q.param or [])
-                ]
-                qual_objs.append(
-                    AcesQualifier(
-                        app=app_obj,
-                        qual_id=_to_int(getattr(q, "id", None)),
-                        qual_text=_to_str(getattr(q, "text", None)),
-                        param_1=params[0] if len(params) > 0 else None,
-                        param_2=params[1] if len(params) > 1 else None,
-                        param_3=params[2] if len(params) > 2 else None,
-                    )
-                )
+def _chunked(items: Iterable[Any], size: int) -> Iterator[list[Any]]:
+    """Group an iterable into lists of at most ``size`` items"""
+    it = iter(items)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
 
-            # ========== NOTES (explicit capture) ==========
-            for i, n in enumerate(getattr(app, "note", []) or []):
-                note_val = _to_str(getattr(n, "value", None)) or _to_str(n)
-                note_id = _to_int(getattr(n, "id", None))
 
-                raw_objs.append(
-                    AcesRawAttribute(
-                        app=app_obj,
-                        attr_name="note",
-                        attr_id=note_id,
-                        attr_value=note_val,
-                        idx=i,
-                    )
-                )
+# -------------------------
+# Main ingestion function
+# -------------------------
 
-            # ========== VEHICLE TYPES (can be multiple) ==========
-            vt_list = getattr(app, "vehicle_type", None)
-            if vt_list:
-                if not isinstance(vt_list, list):
-                    vt_list = [vt_list]
-
-                for i, vt in enumerate(vt_list):
-                    vt_id = _attr_id(vt)
-                    if vt_id is not None:
-                        vehicle_type_objs.append(
-                            AcesVehicleType(
-                                app=app_obj,
-                                vehicle_type_id=vt_id,
-                                idx=i
-                            )
-                        )
+@transaction.atomic
+def ingest_aces_file(
+    path: str,
+    stdout=None,
+    batch_size: int = 5000,
+    stream: bool = False,
+    use_copy: bool = False,
+    delta: bool = False,
+) -> dict:
+    """
+    Comprehensive ACES XML ingestion with ZERO data loss.
 
-            # ========== TYPED ATTRIBUTES + RAW FALLBACK ==========
-            # Iterate through ALL fields on the xsdata app object
-            for f in fields(type(app)):
-                name = f.name
-                val = getattr(app, name, None)
-
-                if val is None:
-                    continue
-
-                # Skip fields we've already handled
-                if name in CORE_APP_FIELDS or name in CORE_REL_FIELDS:
-                    continue
-                if name in VEHICLE_AXIS_FIELDS or name in SPECIAL_FIELDS:
-                    continue
-
-                # Try typed routing first
-                if name in ACES_TYPED_TABLES:
-                    id_field, model_cls = ACES_TYPED_TABLES[name]  # CORRECT ORDER!
-                    vid = _attr_id(val)
-
-                    if vid is not None:
-                        typed_objs_by_model[model_cls].append(
-                            model_cls(app=app_obj, **{id_field: vid})
-                        )
-                        continue  # Successfully routed to typed table
+    All data is captured in one of:
+    - AcesApp (core fields)
+    - AcesAppVehicle (vehicle identification axis)
+    - AcesQualifier (qualifiers with params)
+    - Typed attribute tables (via ACES_TYPED_TABLES)
+    - AcesVehicleType (for multiple vehicle types)
+    - AcesRawAttribute (notes + unmapped attributes)
 
-                # Fallback to raw attributes (ensures nothing is lost!)
-                if hasattr(val, "id"):
-                    # Has an ID attribute
-                    raw_objs.append(
-                        AcesRawAttribute(
-                            app=app_obj,
-                            attr_name=name,
-                            attr_id=_attr_id(val),
-                            attr_value=None,
-                            idx=0
-                        )
-                    )
-                    stats["skipped_fields"][name] += 1
+    Nothing is skipped.
 
-                elif hasattr(val, "value"):
-                    # Has a value attribute
-                    raw_objs.append(
-                        AcesRawAttribute(
-                            app=app_obj,
-                            attr_name=name,
-                            attr_value=_to_str(val.value),
-                            attr_id=None,
-                            idx=0
-                        )
-                    )
-                    stats["skipped_fields"][name] += 1
-
-                elif isinstance(val, list):
-                    # List of values
-                    for i, item in enumerate(val):
-                        if item is None:
-                            continue
-                        if hasattr(item, "id"):
-                            raw_objs.append(
-                                AcesRawAttribute(
-                                    app=app_obj,
-                                    attr_name=name,
-                                    attr_id=_attr_id(item),
-                                    attr_value=None,
-                                    idx=i
-                                )
-                            )
-                        else:
-                            raw_objs.append(
-                                AcesRawAttribute(
-                                    app=app_obj,
-                                    attr_name=name,
-                                    attr_value=_to_str(item),
-                                    attr_id=None,
-                                    idx=i
-                                )
-                            )
-                    stats["skipped_fields"][name] += len(val)
-
-                else:
-                    # Simple value
-                    raw_objs.append(
-                        AcesRawAttribute(
-                            app=app_obj,
-                            attr_name=name,
-                            attr_value=_to_str(val),
-                            attr_id=None,
-                            idx=0
-                        )
-                    )
-                    stats["skipped_fields"][name] += 1
+    With ``stream=True`` the file is read <App> by <App> (see
+    ``iter_aces_apps``) so peak memory is bounded by ``batch_size``
+    instead of file size. The total app count is not known up front.
 
-        # ========== BULK INSERT ALL RELATED DATA ==========
-        AcesAppVehicle.objects.bulk_create(vehicle_objs, batch_size=batch_size)
+    With ``use_copy=True`` each chunk is loaded with PostgreSQL COPY:
+    AcesApp ids are reserved from the sequence first, then every table
+    for the chunk is streamed on one cursor instead of per-model INSERTs.
 
-        if qual_objs:
-            AcesQualifier.objects.bulk_create(qual_objs, batch_size=batch_size)
+    With ``delta=True`` apps are matched to already-loaded rows by
+    (brand_aaiaid, app_id): action="D" deletes them, apps whose content
+    hash is unchanged are skipped, and changed apps replace the old row.
+    Content hashes are only stored by delta loads, so the first delta run
+    after a full load replaces every app it mentions.
 
-        if raw_objs:
-            AcesRawAttribute.objects.bulk_create(raw_objs, batch_size=batch_size)
+    BaseVehicle/Make/Model/SubModel ids are stored even when the local
+    VCdb does not have them (yet); ``stats["unknown_vehicle_ids"]`` lists
+    them per column (see ``unknown_vehicle_ids``).
+    """
 
-        if vehicle_type_objs:
-            AcesVehicleType.objects.bulk_create(vehicle_type_objs, batch_size=batch_size)
+    t0 = perf_counter()
+    _log(stdout, "\n" + "=" * 70 + "\n")
+    _log(stdout, "  ACES FILE INGESTION - ZERO DATA LOSS MODE\n")
+    _log(stdout, "=" * 70 + "\n")
+
+    if stream:
+        _log(stdout, "[1/6] Streaming ACES XML (constant memory)...\n")
+        apps_iter: Iterable[App] = iter_aces_apps(path)
+        total = None
+    else:
+        _log(stdout, "[1/6] Reading & parsing ACES XML...\n")
+
+        parser = XmlParser()
+        with open(path, "rb") as f:
+            aces: Aces = parser.parse(f, Aces)
+
+        parse_s = perf_counter() - t0
+        apps_iter = aces.app
+        total = len(aces.app)
 
-        for model_cls, rows in typed_objs_by_model.items():
-            if rows:
-                model_cls.objects.bulk_create(rows, batch_size=batch_size)
+        _log(stdout, f"      ✓ Parsed {total:,} applications in {parse_s:0.2f}s\n")
 
-        # Update stats
-        stats["apps"] += len(app_objs)
-        stats["vehicles"] += len(vehicle_objs)
-        stats["quals"] += len(qual_objs)
-        stats["notes"] += sum(1 for r in raw_objs if r.attr_name == "note")
-        stats["raw_attrs"] += sum(1 for r in raw_objs if r.attr_name != "note")
-        stats["typed"] += sum(len(v) for v in typed_objs_by_model.values())
-        stats["vehicle_types"] += len(vehicle_type_objs)
+    _log(stdout, f"[2/6] Analyzing field structure...\n")
+
+    vehicle_cols = vehicle_columns()
+
+    stats = new_stats()
 
+    if total is None:
+        _log(stdout, "[3/6] Processing applications...\n")
+    else:
+        _log(stdout, f"[3/6] Processing {total:,} applications...\n")
+    bar = tqdm(total=total, desc="      Progress", unit="apps")
+
+    # Process in chunks for performance
+    for chunk in _chunked(apps_iter, batch_size):
+        _ingest_chunk(chunk, path, stats, vehicle_cols, batch_size, use_copy=use_copy, delta=delta)
         bar.update(len(chunk))
 
     bar.close()
 
+    stats["unknown_vehicle_ids"] = unknown_vehicle_ids(path)
+    _log_summary(stdout, stats, t0)
+
+    return stats
+
+
+def _log_summary(stdout, stats: dict, t0: float) -> None:
+    """Print the data-capture report and final counts (steps 4-6)"""
     _log(stdout, "\n[4/6] Analyzing data capture...\n")
 
     # Check for any fields that ended up in raw attributes
@@ -441,6 +376,7 @@ def ingest_aces_file(path: str, stdout=None, batch_size: int = 5000) -> dict:
         _log(stdout, "      ✓ All fields were mapped to typed tables!\n")
 
     _log(stdout, "\n[5/6] Verifying data integrity...\n")
+    _log_unknown_vehicle_ids(stdout, stats.get("unknown_vehicle_ids"))
     _log(stdout, "      ✓ All applications have vehicle records\n")
     _log(stdout, "      ✓ All qualifiers captured\n")
     _log(stdout, "      ✓ All notes preserved\n")
@@ -455,8 +391,465 @@ def ingest_aces_file(path: str, stdout=None, batch_size: int = 5000) -> dict:
     _log(stdout, f"  Typed attributes   : {stats['typed']:,}\n")
     _log(stdout, f"  Notes              : {stats['notes']:,}\n")
     _log(stdout, f"  Raw attributes     : {stats['raw_attrs']:,}\n")
+    if stats["deleted"] or stats["replaced"] or stats["unchanged"]:
+        _log(stdout, f"  Deleted (delta)    : {stats['deleted']:,}\n")
+        _log(stdout, f"  Replaced (delta)   : {stats['replaced']:,}\n")
+        _log(stdout, f"  Unchanged (delta)  : {stats['unchanged']:,}\n")
     _log(stdout, "=" * 70 + "\n")
     _log(stdout, f"  Total runtime      : {perf_counter() - t0:0.2f}s\n")
     _log(stdout, "=" * 70 + "\n")
 
-    return stats
\ No newline at end of file
+
+def _ingest_chunk(
+    chunk: list[App],
+    path: str,
+    stats: dict,
+    vehicle_cols: set[str],
+    batch_size: int,
+    use_copy: bool = False,
+    delta: bool = False,
+) -> None:
+    """Insert one chunk of xsdata App objects and all of their child rows"""
+    content_hashes = None
+    if delta:
+        chunk, content_hashes = _apply_delta(chunk, stats)
+        if not chunk:
+            return
+
+    if use_copy:
+        # Reserve PKs up front so child rows can reference them in COPY
+        app_pks = allocate_pks(AcesApp, len(chunk))
+        objs_by_model = build_chunk_objects(
+            chunk, path, stats, vehicle_cols, app_pks, content_hashes=content_hashes
+        )
+
+        with connection.cursor() as cur:
+            for model_cls, objs in objs_by_model.items():
+                copy_instances(cur, model_cls, objs, include_pk=model_cls in PREALLOCATED_PK_MODELS)
+        return
+
+    objs_by_model = build_chunk_objects(
+        chunk, path, stats, vehicle_cols, content_hashes=content_hashes
+    )
+
+    # AcesApp is first, so children pick up the parent PKs on bulk_create
+    for model_cls, objs in objs_by_model.items():
+        if objs:
+            model_cls.objects.bulk_create(objs, batch_size=batch_size)
+
+
+def _is_delete(app) -> bool:
+    return str(getattr(app, "action", "") or "").strip().upper() == "D"
+
+
+def _apply_delta(chunk: list[App], stats: dict) -> tuple[list[App], list[str]]:
+    """
+    Resolve a delta chunk against apps already loaded, keyed by (brand_aaiaid, app_id).
+
+    The chunk is first collapsed to the last action per key in file order,
+    so a D followed by an A (or two As) for one app resolves to the final
+    one. Then, against the loaded rows:
+
+    - action="D": delete the existing app (child rows cascade)
+    - same content hash: skip entirely
+    - changed content: delete the old app so the new version replaces it
+
+    Returns the apps that still need inserting, with their content hashes.
+    """
+    last: dict[tuple, App] = {}
+    for pos, app in enumerate(chunk):
+        app_id = _to_int(app.id)
+        # Apps without an id cannot be matched; each one stands alone
+        key = (_get_part_brand(app), app_id) if app_id is not None else (None, None, pos)
+        last.pop(key, None)  # re-insert so dict order is the final action's position
+        last[key] = app
+
+    ids_by_brand: dict[Optional[str], set[int]] = defaultdict(set)
+    for key in last:
+        if len(key) == 2:
+            ids_by_brand[key[0]].add(key[1])
+
+    existing = defaultdict(list)  # key -> [(pk, content_hash)]
+    if ids_by_brand:
+        match = Q()
+        for brand, app_ids in ids_by_brand.items():
+            brand_q = Q(brand_aaiaid__isnull=True) if brand is None else Q(brand_aaiaid=brand)
+            match |= brand_q & Q(app_id__in=app_ids)
+        rows = AcesApp.objects.filter(match).values_list("id", "brand_aaiaid", "app_id", "content_hash")
+        for pk, brand, app_id, content_hash in rows:
+            existing[(brand, app_id)].append((pk, content_hash))
+
+    to_delete: list[int] = []
+    keep_apps: list[App] = []
+    keep_hashes: list[str] = []
+
+    for key, app in last.items():
+        matches = existing.get(key, [])
+
+        if _is_delete(app):
+            to_delete.extend(pk for pk, _ in matches)
+            stats["deleted"] += len(matches)
+            continue
+
+        content_hash = app_content_hash(app)
+        if matches and all(h == content_hash for _, h in matches):
+            stats["unchanged"] += 1
+            continue
+
+        if matches:
+            to_delete.extend(pk for pk, _ in matches)
+            stats["replaced"] += 1
+
+        keep_apps.append(app)
+        keep_hashes.append(content_hash)
+
+    if to_delete:
+        AcesApp.objects.filter(pk__in=to_delete).delete()
+
+    return keep_apps, keep_hashes
+
+
+def build_chunk_objects(
+    chunk: list[App],
+    path: str,
+    stats: dict,
+    vehicle_cols: set[str],
+    app_pks: Optional[list[int]] = None,
+    content_hashes: Optional[list[str]] = None,
+) -> dict[type, list]:
+    """
+    Build unsaved model instances for one chunk, keyed by model class.
+
+    AcesApp is always the first key. When ``app_pks`` is given the apps get
+    those ids; otherwise children reference unsaved apps and Django fills in
+    ``app_id`` once the apps are bulk-created. Does not touch the database,
+    so it is safe to run in worker processes.
+    """
+    if content_hashes is None:
+        # Hashes are only compared by delta loads; full loads skip them
+        content_hashes = [None] * len(chunk)
+
+    # Build core app objects
+    app_objs = []
+    for app, content_hash in zip(chunk, content_hashes):
+        app_objs.append(
+            AcesApp(
+                source_file=path,
+                app_id=_to_int(app.id),
+                action=getattr(app, "action", None),
+                validate=_validate_flag(app),
+                part_number=_get_part_value(app),
+                part_type_id=_attr_id(getattr(app, "part_type", None)),
+                quantity=_to_int(getattr(app, "qty", None)),
+                position_id=_attr_id(getattr(app, "position", None)),
+                brand_aaiaid=_get_part_brand(app),
+                subbrand_aaiaid=_get_part_subbrand(app),
+                mfr_label=_to_str(getattr(app, "mfr_label", None)),
+                display_order=_to_int(getattr(app, "display_order", None)),
+                asset_name=_to_str(getattr(app, "asset_name", None)),
+                asset_item_order=_to_int(getattr(app, "asset_item_order", None)),
+                asset_item_ref=_to_str(getattr(app, "asset_item_ref", None)),
+                content_hash=content_hash,
+            )
+        )
+
+    if app_pks is not None:
+        for app_obj, pk in zip(app_objs, app_pks):
+            app_obj.pk = pk
+
+    # Prepare related object lists
+    vehicle_objs = []
+    qual_objs = []
+    raw_objs = []
+    vehicle_type_objs = []
+    typed_objs_by_model = defaultdict(list)
+
+    plans: dict[type, RoutePlan] = {}
+    frozen_cols = frozenset(vehicle_cols)
+
+    for app, app_obj in zip(chunk, app_objs):
+        app_cls = type(app)
+        plan = plans.get(app_cls)
+        if plan is None:
+            plan = plans[app_cls] = compile_route_plan(app_cls, frozen_cols)
+
+        # ========== VEHICLE AXIS ==========
+        veh = AcesAppVehicle(app=app_obj)
+
+        # Map simple vehicle identification fields
+        for src_field, dst_col in plan.axis:
+            val = getattr(app, src_field, None)
+            if val is not None:
+                setattr(veh, dst_col, _attr_id(val))
+
+        # Handle Years (year range)
+        years = getattr(app, "years", None)
+        if years is not None:
+            if plan.year_from:
+                veh.year_from = _to_int(getattr(years, "from_value", None))
+            if plan.year_to:
+                veh.year_to = _to_int(getattr(years, "to", None))
+
+        # Handle SubModel (take first if list)
+        sm = getattr(app, "sub_model", None)
+        if sm and plan.submodel:
+            if isinstance(sm, list):
+                if sm:
+                    setattr(veh, "submodel_id", _attr_id(sm[0]))
+            else:
+                setattr(veh, "submodel_id", _attr_id(sm))
+
+        # Handle ProductionYears for equipment
+        prod_years = getattr(app, "production_years", None)
+        if prod_years is not None:
+            if plan.production_year_start:
+                veh.production_year_start = _to_int(getattr(prod_years, "production_start", None))
+            if plan.production_year_end:
+                veh.production_year_end = _to_int(getattr(prod_years, "production_end", None))
+
+        vehicle_objs.append(veh)
+
+        # ========== QUALIFIERS ==========
+        for q in getattr(app, "qual", []) or []:
+            params = [
+                _to_str(getattr(p, "value_attribute", None) or getattr(p, "value", None))
+                for p in (q.param or [])
+            ]
+            qual_objs.append(
+                AcesQualifier(
+                    app=app_obj,
+                    qual_id=_to_int(getattr(q, "id", None)),
+                    qual_text=_to_str(getattr(q, "text", None)),
+                    param_1=params[0] if len(params) > 0 else None,
+                    param_2=params[1] if len(params) > 1 else None,
+                    param_3=params[2] if len(params) > 2 else None,
+                )
+            )
+
+        # ========== NOTES (explicit capture) ==========
+        for i, n in enumerate(getattr(app, "note", []) or []):
+            note_val = _to_str(getattr(n, "value", None)) or _to_str(n)
+            note_id = _to_int(getattr(n, "id", None))
+
+            raw_objs.append(
+                AcesRawAttribute(
+                    app=app_obj,
+                    attr_name="note",
+                    attr_id=note_id,
+                    attr_value=note_val,
+                    idx=i,
+                )
+            )
+
+        # ========== VEHICLE TYPES (can be multiple) ==========
+        vt_list = getattr(app, "vehicle_type", None)
+        if vt_list:
+            if not isinstance(vt_list, list):
+                vt_list = [vt_list]
+
+            for i, vt in enumerate(vt_list):
+                vt_id = _attr_id(vt)
+                if vt_id is not None:
+                    vehicle_type_objs.append(
+                        AcesVehicleType(
+                            app=app_obj,
+                            vehicle_type_id=vt_id,
+                            idx=i
+                        )
+                    )
+
+        # ========== TYPED ATTRIBUTES + RAW FALLBACK ==========
+        for name, id_field, model_cls in plan.typed:
+            val = getattr(app, name)
+            if val is None:
+                continue
+
+            vid = _attr_id(val)
+            if vid is not None:
+                typed_objs_by_model[model_cls].append(
+                    model_cls(app=app_obj, **{id_field: vid})
+                )
+            else:
+                _append_raw_attribute(raw_objs, app_obj, name, val, stats)
+
+        for name in plan.raw:
+            val = getattr(app, name)
+            if val is not None:
+                _append_raw_attribute(raw_objs, app_obj, name, val, stats)
+
+    # Update stats
+    stats["apps"] += len(app_objs)
+    stats["vehicles"] += len(vehicle_objs)
+    stats["quals"] += len(qual_objs)
+    stats["notes"] += sum(1 for r in raw_objs if r.attr_name == "note")
+    stats["raw_attrs"] += sum(1 for r in raw_objs if r.attr_name != "note")
+    stats["typed"] += sum(len(v) for v in typed_objs_by_model.values())
+    stats["vehicle_types"] += len(vehicle_type_objs)
+
+    return {
+        AcesApp: app_objs,
+        AcesAppVehicle: vehicle_objs,
+        AcesQualifier: qual_objs,
+        AcesRawAttribute: raw_objs,
+        AcesVehicleType: vehicle_type_objs,
+        **typed_objs_by_model,
+    }
+
+
+# -------------------------
+# Vehicle axis backfill
+# -------------------------
+
+# AcesAppVehicle FK columns, by xsdata App field
+VEHICLE_FK_AXIS = {
+    "base_vehicle": "base_vehicle_id",
+    "make": "make_id",
+    "model": "model_id",
+    "sub_model": "submodel_id",
+}
+
+
+def _vehicle_fk_ids(app) -> dict[str, Optional[int]]:
+    values = {}
+    for src_field, dst_col in VEHICLE_FK_AXIS.items():
+        val = getattr(app, src_field, None)
+        if isinstance(val, list):
+            # SubModel: take first, as build_chunk_objects does
+            val = val[0] if val else None
+        values[dst_col] = _attr_id(val)
+    return values
+
+
+def backfill_vehicle_axis(path: str, stdout=None, batch_size: int = 5000) -> int:
+    """
+    Fill the BaseVehicle/Make/Model/SubModel columns of AcesAppVehicle for
+    apps already loaded from ``path``.
+
+    Loads before the columns were routed by attname left them NULL (the
+    values are not kept anywhere else), so the file is re-read and its
+    apps are matched by (brand_aaiaid, app_id). Callers should rebuild
+    the file's fitment rows afterwards. Returns the rows updated.
+    """
+    t0 = perf_counter()
+    loaded = defaultdict(list)
+    for pk, brand, app_id in AcesApp.objects.filter(source_file=path).values_list(
+        "id", "brand_aaiaid", "app_id"
+    ):
+        loaded[(brand, app_id)].append(pk)
+
+    updated = 0
+    fields_ = list(VEHICLE_FK_AXIS.values())
+    for chunk in _chunked(iter_aces_apps(path), batch_size):
+        rows = []
+        for app in chunk:
+            values = _vehicle_fk_ids(app)
+            for pk in loaded.get((_get_part_brand(app), _to_int(app.id)), ()):
+                rows.append(AcesAppVehicle(app_id=pk, **values))
+        if rows:
+            updated += AcesAppVehicle.objects.bulk_update(rows, fields_, batch_size=batch_size)
+
+    _log(stdout, f"      ✓ Backfilled vehicle axis of {updated:,} apps in {perf_counter() - t0:0.2f}s\n")
+    _log_unknown_vehicle_ids(stdout, unknown_vehicle_ids(path))
+    return updated
+
+
+def unknown_vehicle_ids(path: str) -> dict[str, list[int]]:
+    """
+    BaseVehicle/Make/Model/SubModel ids of apps loaded from ``path`` that
+    the local VCdb does not have, per AcesAppVehicle column.
+
+    The columns are not constrained (the file may be newer than the VCdb),
+    so this is how such ids are found; one anti-join per column.
+    """
+    unknown = {}
+    loaded = AcesAppVehicle.objects.filter(app__source_file=path)
+    for column in VEHICLE_FK_AXIS.values():
+        field = AcesAppVehicle._meta.get_field(column.removesuffix("_id"))
+        target = field.remote_field.model.objects.filter(
+            **{field.target_field.attname: OuterRef(column)}
+        )
+        ids = list(
+            loaded.filter(**{f"{column}__isnull": False})
+            .exclude(Exists(target))
+            .order_by(column)
+            .values_list(column, flat=True)
+            .distinct()
+        )
+        if ids:
+            unknown[column] = ids
+    return unknown
+
+
+def _log_unknown_vehicle_ids(stdout, unknown: Optional[dict[str, list[int]]]) -> None:
+    for column, ids in (unknown or {}).items():
+        sample = ", ".join(map(str, ids[:10])) + (", ..." if len(ids) > 10 else "")
+        _log(stdout, f"      ⚠ {len(ids):,} {column} values not in the local VCdb: {sample}\n")
+
+
+def _append_raw_attribute(raw_objs: list, app_obj: AcesApp, name: str, val: Any, stats: dict) -> None:
+    """Fallback to raw attributes (ensures nothing is lost!)"""
+    if hasattr(val, "id"):
+        # Has an ID attribute
+        raw_objs.append(
+            AcesRawAttribute(
+                app=app_obj,
+                attr_name=name,
+                attr_id=_attr_id(val),
+                attr_value=None,
+                idx=0
+            )
+        )
+        stats["skipped_fields"][name] += 1
+
+    elif hasattr(val, "value"):
+        # Has a value attribute
+        raw_objs.append(
+            AcesRawAttribute(
+                app=app_obj,
+                attr_name=name,
+                attr_value=_to_str(val.value),
+                attr_id=None,
+                idx=0
+            )
+        )
+        stats["skipped_fields"][name] += 1
+
+    elif isinstance(val, list):
+        # List of values
+        for i, item in enumerate(val):
+            if item is None:
+                continue
+            if hasattr(item, "id"):
+                raw_objs.append(
+                    AcesRawAttribute(
+                        app=app_obj,
+                        attr_name=name,
+                        attr_id=_attr_id(item),
+                        attr_value=None,
+                        idx=i
+                    )
+                )
+            else:
+                raw_objs.append(
+                    AcesRawAttribute(
+                        app=app_obj,
+                        attr_name=name,
+                        attr_value=_to_str(item),
+                        attr_id=None,
+                        idx=i
+                    )
+                )
+        stats["skipped_fields"][name] += len(val)
+
+    else:
+        # Simple value
+        raw_objs.append(
+            AcesRawAttribute(
+                app=app_obj,
+                attr_name=name,
+                attr_value=_to_str(val),
+                attr_id=None,
+                idx=0
+            )
+        )
+        stats["skipped_fields"][name] += 1
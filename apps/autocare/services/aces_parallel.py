@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+import multiprocessing
+import os
+from collections import deque
+from time import perf_counter
+from typing import Any
+
+from django.db import connection, connections, transaction
+from tqdm import tqdm
+from xsdata.formats.dataclass.parsers import XmlParser
+
+from apps.autocare.aces.schemas import App
+from apps.autocare.aces.models import (
+    AcesApp,
+    AcesAppVehicle,
+    AcesQualifier,
+    AcesRawAttribute,
+    AcesVehicleType,
+    ACES_TYPED_TABLES,
+)
+from apps.autocare.services.aces_ingest import (
+    PREALLOCATED_PK_MODELS,
+    build_chunk_objects,
+    iter_aces_app_bytes,
+    new_stats,
+    unknown_vehicle_ids,
+    vehicle_columns,
+    _chunked,
+    _log,
+    _log_summary,
+)
+from apps.autocare.services.pg_copy import (
+    allocate_pks,
+    copy_columns,
+    copy_rows,
+    instance_rows,
+    quote_columns,
+)
+
+
+# -------------------------
+# Staging schema
+# -------------------------
+
+STAGING_SCHEMA_PREFIX = "autocare_aces_stage"
+
+
+def aces_models() -> list[type]:
+    """Every ACES table written by ingestion, parents first"""
+    return [
+        AcesApp,
+        AcesAppVehicle,
+        AcesQualifier,
+        AcesRawAttribute,
+        AcesVehicleType,
+        *(model_cls for _, model_cls in ACES_TYPED_TABLES.values()),
+    ]
+
+
+def _staged_columns(model) -> list[str]:
+    include_pk = model in PREALLOCATED_PK_MODELS
+    return [f.column for f in copy_columns(model, include_pk=include_pk)]
+
+
+def _staging_table(schema: str, model) -> str:
+    """'"autocare_aces"."app"' -> '"<schema>"."app"'"""
+    table = model._meta.db_table.split(".")[-1].strip('"')
+    return f'"{schema}"."{table}"'
+
+
+def _create_staging_schema(schema: str) -> None:
+    """
+    Create UNLOGGED column-only copies of the ACES tables.
+
+    No constraints or indexes: those are enforced once, when rows are moved
+    into the live tables.
+    """
+    with connection.cursor() as cur:
+        cur.execute(f'DROP SCHEMA IF EXISTS "{schema}" CASCADE')
+        cur.execute(f'CREATE SCHEMA "{schema}"')
+        for model in aces_models():
+            cols = quote_columns(_staged_columns(model))
+            cur.execute(
+                f"CREATE UNLOGGED TABLE {_staging_table(schema, model)} AS "
+                f"SELECT {cols} FROM {model._meta.db_table} WITH NO DATA"
+            )
+
+
+def _drop_staging_schema(schema: str) -> None:
+    with connection.cursor() as cur:
+        cur.execute(f'DROP SCHEMA IF EXISTS "{schema}" CASCADE')
+
+
+def _swap_in_staging(schema: str) -> None:
+    """Move every staged row into autocare_aces in one transaction"""
+    with transaction.atomic():
+        with connection.cursor() as cur:
+            for model in aces_models():
+                cols = quote_columns(_staged_columns(model))
+                cur.execute(
+                    f"INSERT INTO {model._meta.db_table} ({cols}) "
+                    f"SELECT {cols} FROM {_staging_table(schema, model)}"
+                )
+
+
+# -------------------------
+# Worker side
+# -------------------------
+
+def _transform_chunk(
+    path: str,
+    vehicle_cols: set[str],
+    app_pks: list[int],
+    xml_chunk: list[bytes],
+) -> tuple[dict[type, tuple[list[str], list[list[Any]]]], dict]:
+    """
+    Bind serialized <App> elements and turn them into COPY rows.
+
+    Runs in a worker process; never touches the database.
+    """
+    parser = XmlParser()
+    chunk = [parser.from_bytes(b, App) for b in xml_chunk]
+
+    stats = new_stats()
+    objs_by_model = build_chunk_objects(chunk, path, stats, vehicle_cols, app_pks)
+
+    rows_by_model = {
+        model_cls: instance_rows(model_cls, objs, include_pk=model_cls in PREALLOCATED_PK_MODELS)
+        for model_cls, objs in objs_by_model.items()
+        if objs
+    }
+    return rows_by_model, stats
+
+
+def _merge_stats(total: dict, part: dict) -> None:
+    for key, value in part.items():
+        if key == "skipped_fields":
+            for name, count in value.items():
+                total[key][name] += count
+        else:
+            total[key] += value
+
+
+# -------------------------
+# Main parallel ingestion
+# -------------------------
+
+def ingest_aces_file_parallel(
+    path: str,
+    stdout=None,
+    batch_size: int = 5000,
+    workers: int = 4,
+) -> dict:
+    """
+    Multi-process ACES ingestion with all-or-nothing semantics.
+
+    The parent streams <App> elements, reserves AcesApp ids per chunk and
+    hands serialized chunks to a process pool. Workers build COPY rows; the
+    parent streams them into a private UNLOGGED staging schema. When every
+    chunk has loaded, all staged rows are moved into autocare_aces in a
+    single transaction. Any failure drops the staging schema and leaves the
+    live tables untouched.
+    """
+    t0 = perf_counter()
+    _log(stdout, "\n" + "=" * 70 + "\n")
+    _log(stdout, f"  ACES FILE INGESTION - PARALLEL MODE ({workers} workers)\n")
+    _log(stdout, "=" * 70 + "\n")
+
+    schema = f"{STAGING_SCHEMA_PREFIX}_{os.getpid()}"
+
+    _log(stdout, f"[1/6] Creating staging schema {schema}...\n")
+    _create_staging_schema(schema)
+
+    _log(stdout, "[2/6] Analyzing field structure...\n")
+    vehicle_cols = vehicle_columns()
+    stats = new_stats()
+
+    # Forked workers must not inherit open DB sockets
+    connections.close_all()
+    pool = multiprocessing.get_context("fork").Pool(processes=workers)
+
+    def _load(result) -> None:
+        rows_by_model, chunk_stats = result.get()
+        with connection.cursor() as cur:
+            for model_cls, (columns, rows) in rows_by_model.items():
+                copy_rows(cur, _staging_table(schema, model_cls), columns, rows)
+        _merge_stats(stats, chunk_stats)
+        bar.update(chunk_stats["apps"])
+
+    try:
+        _log(stdout, "[3/6] Streaming applications into staging...\n")
+        bar = tqdm(desc="      Progress", unit="apps")
+
+        # Bounded in-flight queue keeps memory proportional to workers * batch_size
+        pending = deque()
+        for chunk in _chunked(iter_aces_app_bytes(path), batch_size):
+            app_pks = allocate_pks(AcesApp, len(chunk))
+            pending.append(pool.apply_async(_transform_chunk, (path, vehicle_cols, app_pks, chunk)))
+            if len(pending) >= workers * 2:
+                _load(pending.popleft())
+
+        while pending:
+            _load(pending.popleft())
+
+        bar.close()
+        pool.close()
+        pool.join()
+
+        _log(stdout, "      Swapping staged rows into autocare_aces...\n")
+        _swap_in_staging(schema)
+    except BaseException:
+        pool.terminate()
+        raise
+    finally:
+        _drop_staging_schema(schema)
+
+    stats["unknown_vehicle_ids"] = unknown_vehicle_ids(path)
+    _log_summary(stdout, stats, t0)
+
+    return stats
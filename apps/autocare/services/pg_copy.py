@@ -0,0 +1,229 @@
+from __future__ import annotations
+
+import json
+from typing import Any, Iterable, Sequence, Type
+
+from django.db import connection, models
+
+
+# -------------------------
+# PostgreSQL COPY helpers
+# -------------------------
+
+def quote_columns(columns: Sequence[str]) -> str:
+    """Render a quoted, comma-separated column list for SQL"""
+    return ", ".join(connection.ops.quote_name(c) for c in columns)
+
+
+def copy_columns(model: Type[models.Model], include_pk: bool = False) -> list[models.Field]:
+    """
+    Concrete fields written by COPY for a model.
+
+    Auto-increment primary keys are left to the database sequence unless
+    ``include_pk`` is set (e.g. when ids were pre-allocated).
+    """
+    auto_field = model._meta.auto_field
+    return [
+        f for f in model._meta.concrete_fields
+        if include_pk or f is not auto_field
+    ]
+
+
+def copy_rows(
+    cursor,
+    table: str,
+    columns: Sequence[str],
+    rows: Iterable[Sequence[Any]],
+) -> int:
+    """
+    Stream row tuples into ``table`` with COPY FROM STDIN.
+
+    ``table`` must already be quoted/qualified (Django db_table values in
+    this project are, e.g. '"autocare_aces"."app"').
+    """
+    n = 0
+    sql = f"COPY {table} ({quote_columns(columns)}) FROM STDIN"
+    with cursor.copy(sql) as copy:
+        for row in rows:
+            copy.write_row(row)
+            n += 1
+    return n
+
+
+def instance_rows(
+    model: Type[models.Model],
+    objs: Sequence[models.Model],
+    include_pk: bool = False,
+) -> tuple[list[str], list[list[Any]]]:
+    """
+    Convert unsaved model instances into (db columns, row values) for COPY.
+
+    Pure Python: safe to call in worker processes without a DB connection.
+    """
+    fields = copy_columns(model, include_pk=include_pk)
+    rows = [
+        [f.get_db_prep_save(getattr(obj, f.attname), connection) for f in fields]
+        for obj in objs
+    ]
+    return [f.column for f in fields], rows
+
+
+def copy_instances(
+    cursor,
+    model: Type[models.Model],
+    objs: Sequence[models.Model],
+    include_pk: bool = False,
+) -> int:
+    """COPY unsaved model instances into their table (no PKs returned)"""
+    if not objs:
+        return 0
+
+    columns, rows = instance_rows(model, objs, include_pk=include_pk)
+    return copy_rows(cursor, model._meta.db_table, columns, rows)
+
+
+def allocate_pks(model: Type[models.Model], count: int) -> list[int]:
+    """
+    Reserve ``count`` ids from the model's serial/identity sequence.
+
+    Lets callers assign PKs up front so child rows can reference their
+    parents without a RETURNING round trip.
+    """
+    if count <= 0:
+        return []
+
+    pk_col = model._meta.pk.column
+    with connection.cursor() as cur:
+        cur.execute(
+            "SELECT nextval(pg_get_serial_sequence(%s, %s)) FROM generate_series(1, %s)",
+            [model._meta.db_table, pk_col, count],
+        )
+        return [r[0] for r in cur.fetchall()]
+
+
+# -------------------------
+# COPY + conflict-skipping insert
+# -------------------------
+
+def unique_column_sets(model: Type[models.Model]) -> list[tuple[str, ...]]:
+    """
+    Every column set the table enforces uniqueness on.
+
+    Covers the primary key, unique fields, unique_together and
+    unconditional UniqueConstraints.
+    """
+    opts = model._meta
+    sets: list[tuple[str, ...]] = []
+
+    for f in opts.concrete_fields:
+        if f.primary_key or f.unique:
+            sets.append((f.column,))
+
+    for names in opts.unique_together:
+        sets.append(tuple(opts.get_field(n).column for n in names))
+
+    for constraint in opts.constraints:
+        if isinstance(constraint, models.UniqueConstraint) and constraint.fields and constraint.condition is None:
+            sets.append(tuple(opts.get_field(n).column for n in constraint.fields))
+
+    return list(dict.fromkeys(sets))
+
+
+def _stage_table(model: Type[models.Model]) -> str:
+    table = model._meta.db_table.split(".")[-1].strip('"')
+    return connection.ops.quote_name(f"_copy_stage_{table}")
+
+
+def create_stage(cursor, model: Type[models.Model]) -> str:
+    """
+    Create (or empty) a session temp table shaped like ``model``'s table.
+
+    Two tag columns ride along with every row: ``_batch`` (caller-defined,
+    e.g. the source record id) and ``_row`` (position within that batch).
+    """
+    stage = _stage_table(model)
+    cols = quote_columns([f.column for f in copy_columns(model)])
+    cursor.execute(
+        f"CREATE TEMP TABLE IF NOT EXISTS {stage} AS "
+        f"SELECT {cols}, 0::bigint AS _batch, 0 AS _row "
+        f"FROM {model._meta.db_table} WITH NO DATA"
+    )
+    cursor.execute(f"TRUNCATE {stage}")
+    return stage
+
+
+def copy_to_stage(
+    cursor,
+    model: Type[models.Model],
+    objs: Sequence[models.Model],
+    batch: int,
+    row_numbers: Sequence[int],
+) -> int:
+    """COPY unsaved instances into the stage created by ``create_stage``"""
+    if not objs:
+        return 0
+
+    columns, rows = instance_rows(model, objs)
+    return copy_rows(
+        cursor,
+        _stage_table(model),
+        [*columns, "_batch", "_row"],
+        ([*row, batch, n] for row, n in zip(rows, row_numbers)),
+    )
+
+
+def insert_from_stage(cursor, model: Type[models.Model]) -> tuple[int, list[tuple[int, int, dict]]]:
+    """
+    Move staged rows into the live table with one ``INSERT ... ON CONFLICT``.
+
+    Rows clashing with an existing row, or with an earlier staged row, on
+    any unique column set are removed from the stage first so the caller
+    learns exactly which were not inserted.
+
+    Returns (inserted count, [(batch, row, staged column values)]).
+    """
+    table = model._meta.db_table
+    stage = _stage_table(model)
+    columns = [f.column for f in copy_columns(model)]
+    cols = quote_columns(columns)
+
+    conflict_checks = []
+    for unique_cols in unique_column_sets(model):
+        if not set(unique_cols) <= set(columns):
+            continue
+        quoted = [connection.ops.quote_name(c) for c in unique_cols]
+        match = " AND ".join(f"l.{c} = t.{c}" for c in quoted)
+        not_null = " AND ".join(f"{c} IS NOT NULL" for c in quoted)
+        conflict_checks.append(
+            f"SELECT t._batch, t._row FROM {stage} t "
+            f"WHERE EXISTS (SELECT 1 FROM {table} l WHERE {match})"
+        )
+        conflict_checks.append(
+            f"SELECT d._batch, d._row FROM ("
+            f"SELECT _batch, _row, row_number() OVER ("
+            f"PARTITION BY {', '.join(quoted)} ORDER BY _batch, _row) AS rn "
+            f"FROM {stage} WHERE {not_null}"
+            f") d WHERE d.rn > 1"
+        )
+
+    conflicts: list[tuple[int, int, dict]] = []
+    if conflict_checks:
+        cursor.execute(
+            f"DELETE FROM {stage} s WHERE (s._batch, s._row) IN ({' UNION '.join(conflict_checks)}) "
+            f"RETURNING s._batch, s._row, to_jsonb(s) - '_batch' - '_row'"
+        )
+        conflicts = sorted(
+            (
+                (batch, row, values if isinstance(values, dict) else json.loads(values))
+                for batch, row, values in cursor.fetchall()
+            ),
+            key=lambda r: (r[0], r[1]),
+        )
+
+    cursor.execute(
+        f"INSERT INTO {table} ({cols}) SELECT {cols} FROM {stage} ORDER BY _batch, _row "
+        f"ON CONFLICT DO NOTHING"
+    )
+    inserted = cursor.rowcount
+    cursor.execute(f"TRUNCATE {stage}")
+    return inserted, conflicts
@@ -0,0 +1,240 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import List, Optional
+
+from django.db import connection, transaction
+
+from apps.autocare.core.models import AutocareRawRecord
+
+
+# -------------------------
+# Layout
+# -------------------------
+#
+# autocare_autocarerawrecord                  PARTITION BY LIST (source_db)
+#   autocare_autocarerawrecord_<db>           PARTITION BY LIST (as_of_date)   one per SOURCE_CHOICES
+#     autocare_autocarerawrecord_<db>_<date>  one per as-of snapshot
+#     autocare_autocarerawrecord_<db>_default as_of_date NULL / no snapshot partition yet
+#   autocare_autocarerawrecord_default        any other source_db
+#
+# See core migration 0003 for the DDL.
+
+PARENT = AutocareRawRecord._meta.db_table
+PARTITIONED_SOURCES = [code for code, _ in AutocareRawRecord.SOURCE_CHOICES]
+
+_AS_OF_RE = re.compile(r"^[0-9A-Za-z][0-9A-Za-z_.:-]*$")
+
+
+def source_table(source_db: str) -> str:
+    if source_db not in PARTITIONED_SOURCES:
+        raise ValueError(f"source_db {source_db!r} is not partitioned (expected one of {PARTITIONED_SOURCES})")
+    return f"{PARENT}_{source_db}"
+
+
+def default_table(source_db: str) -> str:
+    return f"{source_table(source_db)}_default"
+
+
+def _check_as_of(as_of: str) -> str:
+    if not as_of or not _AS_OF_RE.match(as_of):
+        raise ValueError(f"Invalid as_of_date for a partition: {as_of!r}")
+    return as_of
+
+
+def snapshot_table(source_db: str, as_of: str) -> str:
+    """
+    Partition name for one (source_db, as_of_date) snapshot.
+
+    Punctuation is stripped, so spellings such as ``2024-01-01`` and
+    ``20240101`` share a name; the table comment records which one owns
+    it (see _check_owner).
+    """
+    _check_as_of(as_of)
+    return f"{source_table(source_db)}_{re.sub(r'[^0-9A-Za-z]', '', as_of)}"
+
+
+def _q(name: str) -> str:
+    return connection.ops.quote_name(name)
+
+
+def _literal(as_of: str) -> str:
+    # DDL cannot take bind parameters; as_of is limited to a safe charset
+    return "'" + _check_as_of(as_of) + "'"
+
+
+# -------------------------
+# Introspection
+# -------------------------
+
+@dataclass
+class SnapshotPartition:
+    source_db: str
+    as_of_date: Optional[str]
+    table: str
+    attached: bool
+    approx_rows: int
+
+
+def list_partitions(source_db: Optional[str] = None) -> List[SnapshotPartition]:
+    """
+    Snapshot partitions (attached and detached) of the raw table.
+
+    Each snapshot table carries its as_of_date as the table comment, so
+    detached tables can still be identified. Row counts are planner
+    estimates (pg_class.reltuples) so listing never scans a partition.
+    """
+    sources = [source_db] if source_db else PARTITIONED_SOURCES
+    out: List[SnapshotPartition] = []
+
+    with connection.cursor() as cur:
+        for src in sources:
+            parent = source_table(src)
+            cur.execute(
+                """
+                SELECT c.relname,
+                       obj_description(c.oid, 'pg_class'),
+                       i.inhparent IS NOT NULL,
+                       GREATEST(c.reltuples, 0)::bigint
+                FROM pg_class c
+                JOIN pg_namespace n ON n.oid = c.relnamespace
+                LEFT JOIN pg_inherits i
+                       ON i.inhrelid = c.oid AND i.inhparent = to_regclass(%s)
+                WHERE n.nspname = current_schema()
+                  AND c.relkind = 'r'
+                  AND c.relname LIKE %s
+                ORDER BY c.relname
+                """,
+                [parent, parent.replace("_", r"\_") + r"\_%"],
+            )
+            for relname, as_of, attached, rows in cur.fetchall():
+                if relname == default_table(src):
+                    continue
+                out.append(
+                    SnapshotPartition(
+                        source_db=src,
+                        as_of_date=as_of,
+                        table=relname,
+                        attached=attached,
+                        approx_rows=rows,
+                    )
+                )
+
+    return out
+
+
+def _table_state(cur, table: str) -> Optional[bool]:
+    """None = no such table, True = attached partition, False = standalone"""
+    cur.execute(
+        "SELECT c.relispartition FROM pg_class c WHERE c.oid = to_regclass(%s)",
+        [table],
+    )
+    row = cur.fetchone()
+    return None if row is None else row[0]
+
+
+def _check_owner(cur, table: str, as_of: str) -> None:
+    """Refuse to touch a snapshot table that belongs to another as_of spelling"""
+    cur.execute("SELECT obj_description(to_regclass(%s), 'pg_class')", [table])
+    row = cur.fetchone()
+    owner = row[0] if row else None
+    if owner is not None and owner != as_of:
+        raise ValueError(
+            f"{table} holds as_of_date {owner!r}; {as_of!r} maps to the same partition "
+            f"name, use {owner!r} instead"
+        )
+
+
+# -------------------------
+# Attach / detach / drop
+# -------------------------
+
+def ensure_snapshot_partition(source_db: str, as_of: Optional[str]) -> bool:
+    """
+    Make sure pages for ``as_of`` land in their own partition.
+
+    Creates (or re-attaches a detached) snapshot table, moving any rows
+    for that date out of the source's default partition first so the
+    attach is valid. No-op for unpartitioned sources or a NULL as_of.
+    Returns True if a partition was attached.
+    """
+    if not as_of or source_db not in PARTITIONED_SOURCES:
+        return False
+
+    table = snapshot_table(source_db, as_of)
+    parent = source_table(source_db)
+
+    with transaction.atomic():
+        with connection.cursor() as cur:
+            # Serialise concurrent ingests racing to create the same snapshot
+            cur.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", [table])
+
+            state = _table_state(cur, table)
+            if state is not None:
+                _check_owner(cur, table, as_of)
+            if state is True:
+                return False
+
+            if state is None:
+                cur.execute(
+                    f"CREATE TABLE {_q(table)} "
+                    f"(LIKE {_q(parent)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+                )
+                cur.execute(f"COMMENT ON TABLE {_q(table)} IS {_literal(as_of)}")
+
+            cur.execute(
+                f"""
+                WITH moved AS (
+                    DELETE FROM {_q(default_table(source_db))}
+                    WHERE as_of_date = %s
+                    RETURNING *
+                )
+                INSERT INTO {_q(table)} SELECT * FROM moved
+                """,
+                [as_of],
+            )
+            cur.execute(
+                f"ALTER TABLE {_q(parent)} ATTACH PARTITION {_q(table)} "
+                f"FOR VALUES IN ({_literal(as_of)})"
+            )
+
+    return True
+
+
+def detach_snapshot_partition(source_db: str, as_of: str) -> str:
+    """
+    Detach a snapshot partition, keeping its rows as a standalone table.
+
+    Detached pages are invisible to ingest_payloads and gap tooling; attach
+    again with ensure_snapshot_partition, or drop it.
+    """
+    table = snapshot_table(source_db, as_of)
+
+    with transaction.atomic():
+        with connection.cursor() as cur:
+            if _table_state(cur, table) is not True:
+                raise ValueError(f"{table} is not an attached partition")
+            _check_owner(cur, table, as_of)
+            cur.execute(f"ALTER TABLE {_q(source_table(source_db))} DETACH PARTITION {_q(table)}")
+
+    return table
+
+
+def drop_snapshot_partition(source_db: str, as_of: str) -> str:
+    """
+    Drop a snapshot partition (attached or detached) and all its pages.
+
+    Blobs only referenced by the dropped pages remain until
+    raw_store.prune_orphan_blobs() runs.
+    """
+    table = snapshot_table(source_db, as_of)
+
+    with transaction.atomic():
+        with connection.cursor() as cur:
+            if _table_state(cur, table) is None:
+                raise ValueError(f"{table} does not exist")
+            _check_owner(cur, table, as_of)
+            cur.execute(f"DROP TABLE {_q(table)}")
+
+    return table
@@ -0,0 +1,130 @@
+import os
+import tempfile
+
+from django.test import TestCase
+
+from apps.autocare.aces.models import AcesApp, AcesAppVehicle
+from apps.autocare.services.aces_ingest import backfill_vehicle_axis, ingest_aces_file, unknown_vehicle_ids
+from apps.autocare.tests.vcdb import base_vehicle
+
+
+APP = """
+  <App action="{action}" id="{app_id}">
+    <BaseVehicle id="{base_vehicle}"/>
+    <Qty>1</Qty>
+    <PartType id="1896"/>
+    <Part BrandAAIAID="BBBB">{part}</Part>
+  </App>"""
+
+
+def aces_xml(*apps) -> str:
+    """ACES document with one <App> per (action, app_id, base_vehicle, part)"""
+    body = "".join(
+        APP.format(action=action, app_id=app_id, base_vehicle=base_vehicle, part=part)
+        for action, app_id, base_vehicle, part in apps
+    )
+    return f'<?xml version="1.0"?>\n<ACES version="4.2">{body}\n</ACES>\n'
+
+
+def write_xml(test: TestCase, text: str) -> str:
+    """Temporary .xml file holding ``text``, removed after the test"""
+    fd, path = tempfile.mkstemp(suffix=".xml")
+    test.addCleanup(os.remove, path)
+    with os.fdopen(fd, "w") as f:
+        f.write(text)
+    return path
+
+
+def write_aces(test: TestCase, *apps) -> str:
+    return write_xml(test, aces_xml(*apps))
+
+
+class AcesDeltaIngestTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        base_vehicle(100)
+
+    def ingest(self, *apps, delta=True) -> dict:
+        return ingest_aces_file(write_aces(self, *apps), batch_size=100, stream=True, delta=delta)
+
+    def parts(self):
+        return sorted(AcesApp.objects.values_list("app_id", "part_number"))
+
+    def test_unchanged_reingest_is_skipped(self):
+        self.ingest(("A", 1, 100, "P1"), ("A", 2, 100, "P2"))
+        first = set(AcesApp.objects.values_list("pk", flat=True))
+
+        stats = self.ingest(("A", 1, 100, "P1"), ("A", 2, 100, "P2"))
+
+        self.assertEqual(stats["unchanged"], 2)
+        self.assertEqual(stats["replaced"], 0)
+        self.assertEqual(set(AcesApp.objects.values_list("pk", flat=True)), first)
+
+    def test_changed_app_replaces_the_loaded_row(self):
+        self.ingest(("A", 1, 100, "P1"))
+        stats = self.ingest(("A", 1, 100, "P1-NEW"))
+
+        self.assertEqual(stats["replaced"], 1)
+        self.assertEqual(self.parts(), [(1, "P1-NEW")])
+
+    def test_delete_then_add_in_one_chunk_keeps_the_app(self):
+        self.ingest(("A", 1, 100, "P1"))
+        self.ingest(("D", 1, 100, "P1"), ("A", 1, 100, "P1"))
+
+        self.assertEqual(self.parts(), [(1, "P1")])
+
+    def test_add_then_delete_in_one_chunk_removes_the_app(self):
+        self.ingest(("A", 1, 100, "P1"))
+        stats = self.ingest(("A", 1, 100, "P1-NEW"), ("D", 1, 100, "P1-NEW"))
+
+        self.assertEqual(stats["deleted"], 1)
+        self.assertEqual(self.parts(), [])
+
+    def test_repeated_add_in_one_chunk_inserts_the_last_one(self):
+        self.ingest(("A", 1, 100, "P1"), ("A", 1, 100, "P1-NEW"))
+
+        self.assertEqual(self.parts(), [(1, "P1-NEW")])
+
+    def test_full_load_does_not_hash(self):
+        self.ingest(("A", 1, 100, "P1"), delta=False)
+
+        self.assertEqual(list(AcesApp.objects.values_list("content_hash", flat=True)), [None])
+
+
+class AcesVehicleAxisTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        base_vehicle(100)
+        base_vehicle(200)
+
+    def base_vehicles(self):
+        return sorted(AcesAppVehicle.objects.values_list("app__app_id", "base_vehicle_id"))
+
+    def test_base_vehicle_is_stored(self):
+        ingest_aces_file(write_aces(self, ("A", 1, 100, "P1"), ("A", 2, 200, "P2")), batch_size=100)
+
+        self.assertEqual(self.base_vehicles(), [(1, 100), (2, 200)])
+
+    def test_backfill_restores_missing_base_vehicles(self):
+        path = write_aces(self, ("A", 1, 100, "P1"), ("A", 2, 200, "P2"))
+        ingest_aces_file(path, batch_size=100)
+        AcesAppVehicle.objects.update(base_vehicle=None)
+
+        self.assertEqual(backfill_vehicle_axis(path, batch_size=1), 2)
+        self.assertEqual(self.base_vehicles(), [(1, 100), (2, 200)])
+
+    def test_base_vehicle_missing_from_vcdb_still_loads(self):
+        stats = ingest_aces_file(write_aces(self, ("A", 1, 100, "P1"), ("A", 2, 999, "P2")), batch_size=100)
+
+        self.assertEqual(stats["apps"], 2)
+        self.assertEqual(self.base_vehicles(), [(1, 100), (2, 999)])
+        self.assertEqual(stats["unknown_vehicle_ids"], {"base_vehicle_id": [999]})
+
+    def test_backfill_keeps_ids_missing_from_vcdb(self):
+        path = write_aces(self, ("A", 1, 999, "P1"))
+        ingest_aces_file(path, batch_size=100)
+        AcesAppVehicle.objects.update(base_vehicle=None)
+
+        self.assertEqual(backfill_vehicle_axis(path), 1)
+        self.assertEqual(self.base_vehicles(), [(1, 999)])
+        self.assertEqual(unknown_vehicle_ids(path), {"base_vehicle_id": [999]})
@@ -0,0 +1,57 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase
+
+from apps.autocare.core.management.commands import ingest_autocare_baseline
+from apps.autocare.ingest import baseline
+from apps.autocare.ingest.fetch import FetchResult
+from apps.autocare.ingest.plans import DatasetSpec, EndpointSpec
+
+
+MAKE = EndpointSpec(db="vcdb", resource="Make", api_version="v1")
+MODEL = EndpointSpec(db="vcdb", resource="Model", api_version="v1")
+DATASET = DatasetSpec(name="vcdb", plan=[MAKE, MODEL], default_as_of="", supports_as_of=False)
+
+
+def pull(client, spec, **kwargs):
+    if spec is MODEL:
+        raise RuntimeError("boom")
+    return FetchResult(spec=spec, total_pages=1, written=1)
+
+
+@mock.patch.object(baseline, "record_completed")
+@mock.patch.object(baseline, "ingest_endpoint_concurrent", side_effect=pull)
+class RunBaselineTests(SimpleTestCase):
+    def test_failed_endpoint_does_not_drop_the_others(self, ingest, record_completed):
+        stdout = StringIO()
+        results = baseline.run_baseline([DATASET], {"vcdb": None}, retries=1, stdout=stdout)
+
+        by_key = {r.spec.key: r for r in results}
+        self.assertFalse(by_key["vcdb:Make"].failed)
+        self.assertTrue(by_key["vcdb:Model"].failed)
+        self.assertEqual(by_key["vcdb:Model"].error, "RuntimeError: boom")
+        record_completed.assert_called_once()
+        self.assertIn("✗ vcdb:Model: RuntimeError: boom", stdout.getvalue())
+
+
+@mock.patch.object(ingest_autocare_baseline, "run_baseline", return_value=[])
+class BaselineAsOfTests(SimpleTestCase):
+    def run_command(self, *args):
+        call_command("ingest_autocare_baseline", *args, stdout=StringIO())
+
+    def as_of(self, run_baseline):
+        return run_baseline.call_args.args[1]
+
+    def test_per_dataset_dates(self, run_baseline):
+        self.run_command("--db", "vcdb,pcdb", "--asof", "vcdb=2024-01-01", "--asof", "pcdb=2024-02-01")
+        self.assertEqual(self.as_of(run_baseline), {"vcdb": "2024-01-01", "pcdb": "2024-02-01"})
+
+    def test_comma_separated_pairs_and_bare_default(self, run_baseline):
+        self.run_command("--db", "vcdb,pcdb", "--asof", "2024-03-01,pcdb=2024-02-01")
+        self.assertEqual(self.as_of(run_baseline), {"vcdb": "2024-03-01", "pcdb": "2024-02-01"})
+
+    def test_unknown_dataset_is_rejected(self, run_baseline):
+        with self.assertRaisesMessage(CommandError, "qdb is not in --db"):
+            self.run_command("--db", "vcdb", "--asof", "qdb=2024-01-01")
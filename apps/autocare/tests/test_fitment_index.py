@@ -0,0 +1,149 @@
+import random
+
+import zstandard
+from django.test import SimpleTestCase, TestCase
+
+from apps.autocare.domain.fitment import FitmentIndex, VehicleBitmap, build_from_db, build_index, refresh_index
+from apps.autocare.tests.vcdb import base_vehicle, vehicle
+from apps.autocare.vcdb.models import DriveType, VehicleToDriveType
+
+
+UNIVERSE = 4096
+
+
+def bitmap(ids) -> VehicleBitmap:
+    return VehicleBitmap.from_ids(ids, UNIVERSE)
+
+
+class VehicleBitmapTests(SimpleTestCase):
+    def setUp(self):
+        rng = random.Random(22)
+        self.sparse = [set(rng.sample(range(UNIVERSE), 40)) for _ in range(3)]
+        self.dense = [set(rng.sample(range(UNIVERSE), 1500)) for _ in range(3)]
+
+    def test_representation_follows_density(self):
+        self.assertFalse(bitmap(self.sparse[0]).dense)
+        self.assertTrue(bitmap(self.dense[0]).dense)
+
+    def test_membership_iteration_and_length(self):
+        for ids in (self.sparse[0], self.dense[0], set()):
+            bm = bitmap(ids)
+            self.assertEqual(bm.to_list(), sorted(ids))
+            self.assertEqual(len(bm), len(ids))
+            self.assertTrue(all(v in bm for v in ids))
+            self.assertNotIn(UNIVERSE + 10, bm)
+            self.assertNotIn(-1, bm)
+
+    def test_intersections_match_set_semantics(self):
+        cases = {
+            "array & array": (self.sparse[0] | self.sparse[1], self.sparse[1] | self.sparse[2]),
+            "array & bitmap": (self.sparse[0] | set(list(self.dense[0])[:20]), self.dense[0]),
+            "bitmap & array": (self.dense[1], self.sparse[1] | set(list(self.dense[1])[:20])),
+            "bitmap & bitmap": (self.dense[0], self.dense[1]),
+            "disjoint": (self.sparse[0] - self.sparse[1], self.sparse[1] - self.sparse[0]),
+        }
+        for name, (a, b) in cases.items():
+            with self.subTest(name):
+                result = bitmap(a) & bitmap(b)
+                self.assertEqual(result.to_list(), sorted(a & b))
+                self.assertEqual(len(result), len(a & b))
+
+    def test_sparse_bitmap_intersection_comes_back_as_an_array(self):
+        a = self.dense[0]
+        b = (self.dense[1] - a) | set(list(a)[:5])
+
+        result = bitmap(a) & bitmap(b)
+
+        self.assertFalse(result.dense)
+        self.assertEqual(result.to_list(), sorted(a & b))
+
+
+class FitmentIndexTests(SimpleTestCase):
+    def index(self) -> FitmentIndex:
+        return build_index(
+            version="v1",
+            universe=10,
+            rows={
+                "base_vehicle": [(1, 100), (2, 100), (3, 100), (4, 200)],
+                "drive_type": [(1, 5), (2, 6), (3, 5), (4, 5), (5, None)],
+            },
+        )
+
+    def test_vehicles_intersects_every_criterion(self):
+        index = self.index()
+
+        self.assertEqual(index.vehicle_ids(base_vehicle=100, drive_type=5), [1, 3])
+        self.assertEqual(index.vehicle_ids(base_vehicle=100, drive_type=[5, 6]), [1, 2, 3])
+        self.assertEqual(index.vehicle_ids(base_vehicle=300), [])
+        self.assertEqual(index.values("drive_type"), [5, 6])
+
+    def test_unknown_attribute_and_empty_criteria(self):
+        with self.assertRaises(ValueError):
+            self.index().vehicle_ids(colour=1)
+        with self.assertRaises(ValueError):
+            self.index().vehicles()
+
+    def test_refresh_moves_vehicles_between_values(self):
+        index = self.index()
+
+        rebuilt = index.refresh("drive_type", [1, 2, 12], [(1, 6), (2, 7), (12, 5)])
+
+        self.assertEqual(rebuilt, 3)
+        self.assertEqual(index.vehicle_ids(drive_type=5), [3, 4, 12])
+        self.assertEqual(index.vehicle_ids(drive_type=6), [1])
+        self.assertEqual(index.vehicle_ids(drive_type=7), [2])
+        self.assertEqual(index.universe, 13)
+
+    def test_refresh_drops_emptied_values(self):
+        index = self.index()
+
+        index.refresh("drive_type", [2], [])
+
+        self.assertEqual(index.values("drive_type"), [5])
+
+    def test_dumps_loads_round_trip(self):
+        rng = random.Random(7)
+        index = build_index(
+            version="v2",
+            universe=UNIVERSE,
+            rows={
+                "base_vehicle": [(v, v % 3) for v in range(UNIVERSE)],
+                "drive_type": [(v, 9) for v in rng.sample(range(UNIVERSE), 30)],
+            },
+        )
+
+        loaded = FitmentIndex.loads(index.dumps())
+
+        self.assertEqual((loaded.version, loaded.universe), ("v2", UNIVERSE))
+        for attribute, by_value in index.bitmaps.items():
+            self.assertEqual(set(loaded.bitmaps[attribute]), set(by_value))
+            for value, bm in by_value.items():
+                self.assertEqual(loaded.bitmaps[attribute][value].dense, bm.dense)
+                self.assertEqual(loaded.bitmaps[attribute][value].to_list(), bm.to_list())
+
+    def test_loads_rejects_other_data(self):
+        with self.assertRaises(ValueError):
+            FitmentIndex.loads(zstandard.ZstdCompressor().compress(b"nope"))
+
+
+class FitmentIndexDatabaseTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        base_vehicle(100)
+        vehicle(1000, 100)
+        vehicle(1001, 100)
+        DriveType.objects.create(drive_type_id=5, drive_type_name="AWD")
+        DriveType.objects.create(drive_type_id=6, drive_type_name="FWD")
+        VehicleToDriveType.objects.create(vehicle_to_drive_type_id=1, vehicle_id=1000, drive_type_id=5)
+
+    def test_build_and_refresh_from_vcdb_rows(self):
+        index = build_from_db("v1")
+        self.assertEqual(index.vehicle_ids(base_vehicle=100), [1000, 1001])
+        self.assertEqual(index.vehicle_ids(base_vehicle=100, drive_type=5), [1000])
+
+        VehicleToDriveType.objects.filter(vehicle_id=1000).update(drive_type_id=6)
+        VehicleToDriveType.objects.create(vehicle_to_drive_type_id=2, vehicle_id=1001, drive_type_id=5)
+        refresh_index(index, {"VehicleToDriveType": [1000, 1001]})
+
+        self.assertEqual(index.vehicle_ids(drive_type=5), [1001])
+        self.assertEqual(index.vehicle_ids(drive_type=6), [1000])
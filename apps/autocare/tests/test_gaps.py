@@ -0,0 +1,88 @@
+from django.test import SimpleTestCase, TestCase
+
+from apps.autocare.core.models import AutocareRawRecord
+from apps.autocare.ingest.gaps import PageGap, find_gaps, gap_spec, missing_endpoints
+from apps.autocare.ingest.plans import EndpointSpec
+
+
+MAKE = EndpointSpec(db="vcdb", resource="Make", api_version="v1")
+MODEL = EndpointSpec(db="vcdb", resource="Model", api_version="v1")
+
+
+def store_pages(spec, pages, total_pages=None, as_of="2024-01-01", page_size=100):
+    AutocareRawRecord.objects.bulk_create(
+        AutocareRawRecord(
+            source_db=spec.db,
+            endpoint_key=spec.key,
+            request_path=spec.request_path,
+            as_of_date=as_of,
+            page_number=page,
+            page_size=page_size,
+            total_pages=total_pages,
+            http_status=200,
+        )
+        for page in pages
+    )
+
+
+def spans(gaps):
+    return [(g.endpoint_key, g.as_of_date, g.first, g.last) for g in gaps]
+
+
+class FindGapsTests(TestCase):
+    def test_missing_pages_collapse_into_ranges(self):
+        store_pages(MAKE, [1, 2, 5, 9], total_pages=10)
+
+        gaps = find_gaps()
+
+        self.assertEqual(
+            spans(gaps),
+            [("vcdb:Make", "2024-01-01", 3, 4), ("vcdb:Make", "2024-01-01", 6, 8), ("vcdb:Make", "2024-01-01", 10, 10)],
+        )
+        self.assertEqual([len(g) for g in gaps], [2, 3, 1])
+        self.assertEqual(gaps[0].request_path, MAKE.request_path)
+        self.assertEqual((gaps[0].page_size, gaps[0].total_pages), (100, 10))
+
+    def test_complete_pull_has_no_gaps(self):
+        store_pages(MAKE, [1, 2, 3], total_pages=3)
+
+        self.assertEqual(find_gaps(), [])
+
+    def test_without_total_pages_only_inner_holes_are_found(self):
+        store_pages(MAKE, [1, 4])
+
+        self.assertEqual(spans(find_gaps()), [("vcdb:Make", "2024-01-01", 2, 3)])
+
+    def test_pulls_are_kept_apart(self):
+        store_pages(MAKE, [2], total_pages=2, as_of="2024-01-01")
+        store_pages(MAKE, [1], total_pages=2, as_of="2024-02-01")
+        store_pages(MODEL, [1], total_pages=1)
+
+        self.assertEqual(
+            spans(find_gaps()),
+            [("vcdb:Make", "2024-01-01", 1, 1), ("vcdb:Make", "2024-02-01", 2, 2)],
+        )
+        self.assertEqual(spans(find_gaps(asof="2024-02-01")), [("vcdb:Make", "2024-02-01", 2, 2)])
+        self.assertEqual(find_gaps(endpoint_key=MODEL.key), [])
+
+    def test_missing_endpoints(self):
+        store_pages(MAKE, [1], total_pages=1)
+
+        self.assertEqual(missing_endpoints([MAKE, MODEL], asof="2024-01-01"), [MODEL])
+        self.assertEqual(missing_endpoints([MAKE, MODEL], asof="2024-02-01"), [MAKE, MODEL])
+
+
+class GapSpecTests(SimpleTestCase):
+    def gap(self, request_path, endpoint_key="vcdb:Make"):
+        return PageGap("vcdb", endpoint_key, request_path, None, "2024-01-01", 100, 3, 2, 3)
+
+    def test_spec_follows_the_stored_request_path(self):
+        spec = gap_spec(self.gap("/api/v4/vcdb/Make"))
+
+        self.assertEqual(spec.request_path, "/api/v4/vcdb/Make")
+
+    def test_unparseable_path_falls_back_to_the_plan(self):
+        self.assertEqual(gap_spec(self.gap("/vcdb/Make")).key, "vcdb:Make")
+
+    def test_str(self):
+        self.assertEqual(str(self.gap("/api/v1/vcdb/Make")), "vcdb:Make as_of=2024-01-01 pages 2-3 (of 3)")
@@ -0,0 +1,63 @@
+import json
+from io import StringIO
+from unittest import mock
+
+import requests
+from django.core.management import call_command
+from django.test import TestCase
+
+from apps.autocare.core.management.commands import ingest_autocare
+from apps.autocare.core.models import AutocareRawRecord
+
+
+class FakeResponse:
+    """Streamed response whose body is ``body`` or fails with ``error`` while read"""
+
+    status_code = 200
+
+    def __init__(self, page, next_link=None, body=b"[]", error=None):
+        pagination = {"currentPage": page, "pageSize": 2, "totalPages": 3, "nextPageLink": next_link}
+        self.headers = {"X-Pagination": json.dumps(pagination)}
+        self.body = body
+        self.error = error
+
+    def iter_content(self, chunk_size=1):
+        yield self.body[:1]
+        if self.error:
+            raise self.error
+        yield self.body[1:]
+
+
+class IngestAutocareBodyErrorTests(TestCase):
+    def run_pages(self, *responses):
+        client = mock.Mock()
+        client.get.side_effect = list(responses)
+        stderr = StringIO()
+        with mock.patch.object(ingest_autocare, "AutocareAPIClient", return_value=client), \
+                mock.patch.object(ingest_autocare.time, "sleep"):
+            call_command("ingest_autocare", "/vcdb/Make", db="vcdb", stdout=StringIO(), stderr=stderr)
+        return stderr.getvalue()
+
+    def stored_pages(self):
+        return sorted(AutocareRawRecord.objects.values_list("page_number", flat=True))
+
+    def test_broken_body_is_skipped_and_the_next_page_followed(self):
+        stderr = self.run_pages(
+            FakeResponse(1, "/vcdb/Make?pageNumber=2", b'[{"MakeID": 1}]'),
+            FakeResponse(2, "/vcdb/Make?pageNumber=3", b'[{"MakeID": 2}]',
+                         error=requests.exceptions.ChunkedEncodingError("connection broken")),
+            FakeResponse(3, None, b'[{"MakeID": 3}]'),
+        )
+
+        self.assertEqual(self.stored_pages(), [1, 3])
+        self.assertIn("1 pages skipped: [2]", stderr)
+        self.assertIn("ChunkedEncodingError", stderr)
+
+    def test_truncated_body_is_skipped(self):
+        stderr = self.run_pages(
+            FakeResponse(1, "/vcdb/Make?pageNumber=2", b'[{"MakeID": 1}'),
+            FakeResponse(2, None, b'[{"MakeID": 2}]'),
+        )
+
+        self.assertEqual(self.stored_pages(), [2])
+        self.assertIn("1 pages skipped: [1]", stderr)
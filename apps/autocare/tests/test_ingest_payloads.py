@@ -0,0 +1,62 @@
+from io import StringIO
+from unittest import mock
+
+from django.test import TestCase
+
+from apps.autocare.core.management.commands import ingest_payloads
+from apps.autocare.core.models import AutocareRawRecord
+from apps.autocare.vcdb.models import VehicleToDriveType
+
+
+ROWS = [
+    {"VehicleToDriveTypeID": 1, "VehicleID": 101, "DriveTypeID": 5, "Source": None},
+    {"VehicleToDriveTypeID": 2, "VehicleID": 102, "DriveTypeID": 5, "Source": None},
+]
+
+
+class FakeResolver:
+    """Records the ids it is asked to hydrate; resolves none of them"""
+
+    def __init__(self, error=None):
+        self.error = error
+        self.calls = []
+
+    def ensure_vehicles_exist(self, VehicleModel, vehicle_ids):
+        self.calls.append((VehicleModel.__name__, set(vehicle_ids)))
+        if self.error:
+            raise self.error
+        return {vid: "not found" for vid in vehicle_ids}
+
+
+class IngestLogHydrationTests(TestCase):
+    def setUp(self):
+        self.log = AutocareRawRecord(id=42, source_db="vcdb", endpoint_key="VehicleToDriveType")
+        self.command = ingest_payloads.Command(stdout=StringIO())
+        patcher = mock.patch.object(ingest_payloads, "load_payload", return_value=ROWS)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def ingest(self, resolver, skip_missing_vehicles):
+        return self.command._ingest_log_strict(
+            VehicleToDriveType,
+            self.log,
+            batch_size=100,
+            resolver=resolver,
+            skip_missing_vehicles=skip_missing_vehicles,
+            skip_missing_engineconfig2=False,
+        )
+
+    def test_hydrates_referenced_vehicles_in_one_batch(self):
+        resolver = FakeResolver()
+        skipped = self.ingest(resolver, skip_missing_vehicles=True)
+
+        self.assertEqual(resolver.calls, [("Vehicle", {101, 102})])
+        # Still missing after hydration: both rows are skipped, not inserted
+        self.assertEqual(len(skipped), 2)
+        self.assertFalse(VehicleToDriveType.objects.exists())
+
+    def test_hydration_failure_names_the_endpoint(self):
+        resolver = FakeResolver(error=ValueError("boom"))
+        with self.assertRaisesMessage(RuntimeError, "endpoint=VehicleToDriveType, log_id=42"):
+            self.ingest(resolver, skip_missing_vehicles=False)
+        self.assertEqual(len(resolver.calls), 1)
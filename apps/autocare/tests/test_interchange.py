@@ -0,0 +1,46 @@
+from django.test import SimpleTestCase
+
+from apps.autocare.domain.interchange import InterchangeIndex
+from apps.autocare.domain.supersession import build_graph
+
+
+def index() -> InterchangeIndex:
+    """10 is replaced by 20; 20 and 30 are alternatives"""
+    built = InterchangeIndex(version="v1", graph=build_graph("v1", [(10, 20, "2024-01-01")], [(20, 30)]))
+    built._add_numbers([
+        (10, "OLD-1", None),
+        (20, "NEW-1", "X-99"),
+        (20, "NEW-1", "new1"),
+        (30, "ALT-1", "NEW-1"),
+    ])
+    return built
+
+
+class InterchangeIndexTests(SimpleTestCase):
+    def test_numbers_resolve_case_insensitively(self):
+        self.assertEqual(index().product_id(" old-1 "), 10)
+        self.assertEqual(index().product_id("x-99"), 20)
+        self.assertIsNone(index().product_id("NOPE"))
+
+    def test_own_part_number_wins_over_interchange(self):
+        self.assertEqual(index().product_id("NEW-1"), 20)
+
+    def test_current_replacement(self):
+        self.assertEqual(index().current_replacement("OLD-1"), 20)
+        self.assertEqual(index().current_number("OLD-1"), "NEW-1")
+        self.assertIsNone(index().current_replacement("NOPE"))
+
+    def test_interchangeable_numbers(self):
+        self.assertEqual(index().interchangeable_numbers("ALT-1"), ["NEW-1", "X-99", "new1", "ALT-1"])
+        self.assertEqual(index().interchangeable_numbers("NOPE"), [])
+
+    def test_dumps_loads_round_trip(self):
+        original = index()
+
+        loaded = InterchangeIndex.loads(original.dumps())
+
+        self.assertEqual(loaded.version, "v1")
+        self.assertEqual(loaded.numbers, original.numbers)
+        self.assertEqual(loaded.products, original.products)
+        self.assertEqual(loaded.current_replacement("OLD-1"), 20)
+        self.assertEqual(loaded.interchangeable(30), (20, 30))
@@ -0,0 +1,131 @@
+import threading
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from apps.autocare.api_client import AutocareAPIClient, AutocareAPIFatalError
+from apps.autocare.oauth import AutocareOAuthClient
+
+
+OAUTH_SETTINGS = {
+    "AUTOCARE_OAUTH_TOKEN_URL": "http://127.0.0.1:1/token",
+    "AUTOCARE_CLIENT_ID": "client",
+    "AUTOCARE_CLIENT_SECRET": "secret",
+    "AUTOCARE_USERNAME": "user",
+    "AUTOCARE_PASSWORD": "password",
+    "AUTOCARE_SCOPE": "scope",
+    "AUTOCARE_OAUTH_REFRESH_MARGIN": 300,
+}
+
+
+def token_response(token, expires_in=3600):
+    response = mock.Mock(status_code=200)
+    response.json.return_value = {"access_token": token, "expires_in": expires_in}
+    return response
+
+
+@override_settings(**OAUTH_SETTINGS)
+class SharedTokenTests(SimpleTestCase):
+    def setUp(self):
+        self.forget_process_token()
+        cache.delete_many([AutocareOAuthClient.CACHE_KEY, AutocareOAuthClient.LOCK_KEY])
+        self.addCleanup(self.forget_process_token)
+        self.addCleanup(cache.delete_many, [AutocareOAuthClient.CACHE_KEY, AutocareOAuthClient.LOCK_KEY])
+
+        patcher = mock.patch("apps.autocare.oauth.requests.post")
+        self.post = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def forget_process_token(self):
+        AutocareOAuthClient._access_token = None
+        AutocareOAuthClient._expires_at = AutocareOAuthClient._refresh_at = 0
+
+    def test_concurrent_callers_share_one_fetch(self):
+        def slow_post(*args, **kwargs):
+            time.sleep(0.1)
+            return token_response("t1")
+
+        self.post.side_effect = slow_post
+        tokens = []
+        threads = [
+            threading.Thread(target=lambda: tokens.append(AutocareOAuthClient.get_access_token()))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(tokens, ["t1"] * 8)
+        self.assertEqual(self.post.call_count, 1)
+        self.assertFalse(cache.get(AutocareOAuthClient.LOCK_KEY))
+
+    def test_other_processes_reuse_the_cached_token(self):
+        self.post.return_value = token_response("t1")
+        AutocareOAuthClient.get_access_token()
+
+        self.forget_process_token()
+
+        self.assertEqual(AutocareOAuthClient.get_access_token(), "t1")
+        self.assertEqual(self.post.call_count, 1)
+
+    def test_refresh_starts_before_expiry(self):
+        # 400s lifetime: refreshed after 200s (half), usable until 370s
+        self.post.return_value = token_response("t1", expires_in=400)
+        AutocareOAuthClient.get_access_token()
+        self.assertAlmostEqual(AutocareOAuthClient._refresh_at - time.time(), 200, delta=5)
+
+        AutocareOAuthClient._refresh_at = 0
+        cache.delete(AutocareOAuthClient.CACHE_KEY)
+        self.post.return_value = token_response("t2")
+
+        self.assertEqual(AutocareOAuthClient.get_access_token(), "t2")
+
+    def test_usable_token_is_kept_while_another_process_refreshes(self):
+        self.post.return_value = token_response("t1")
+        AutocareOAuthClient.get_access_token()
+        AutocareOAuthClient._refresh_at = 0
+        cache.delete(AutocareOAuthClient.CACHE_KEY)
+        cache.add(AutocareOAuthClient.LOCK_KEY, 1)
+
+        self.assertEqual(AutocareOAuthClient.get_access_token(), "t1")
+        self.assertEqual(self.post.call_count, 1)
+
+    def test_failed_proactive_refresh_keeps_the_current_token(self):
+        self.post.return_value = token_response("t1")
+        AutocareOAuthClient.get_access_token()
+        AutocareOAuthClient._refresh_at = 0
+        cache.delete(AutocareOAuthClient.CACHE_KEY)
+        self.post.return_value = mock.Mock(status_code=500, text="down")
+
+        with self.assertLogs("apps.autocare.oauth", "ERROR"):
+            self.assertEqual(AutocareOAuthClient.get_access_token(), "t1")
+        self.assertFalse(cache.get(AutocareOAuthClient.LOCK_KEY))
+
+    def test_failed_fetch_without_a_token_raises(self):
+        self.post.return_value = mock.Mock(status_code=400, text="bad grant")
+
+        with self.assertRaises(RuntimeError):
+            AutocareOAuthClient.get_access_token()
+
+    def test_invalidate_ignores_a_token_already_replaced(self):
+        self.post.return_value = token_response("t2")
+        AutocareOAuthClient.get_access_token()
+
+        AutocareOAuthClient.invalidate("t1")
+
+        self.assertEqual(AutocareOAuthClient._access_token, "t2")
+        self.assertEqual(cache.get(AutocareOAuthClient.CACHE_KEY)["access_token"], "t2")
+
+    def test_unauthorized_response_invalidates_the_shared_token(self):
+        self.post.side_effect = [token_response("t1"), token_response("t2")]
+        client = AutocareAPIClient("vcdb")
+
+        with mock.patch.object(client.session, "get", return_value=mock.Mock(status_code=401)):
+            with self.assertRaises(AutocareAPIFatalError):
+                client.get("/api/v1/vcdb/Make")
+
+        self.assertIsNone(cache.get(AutocareOAuthClient.CACHE_KEY))
+        self.assertEqual(AutocareOAuthClient.get_access_token(), "t2")
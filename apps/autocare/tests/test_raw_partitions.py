@@ -0,0 +1,42 @@
+from django.db import connection
+from django.test import TestCase
+
+from apps.autocare.core.models import AutocareRawRecord
+from apps.autocare.services.raw_partitions import (
+    drop_snapshot_partition,
+    ensure_snapshot_partition,
+    snapshot_table,
+)
+
+
+class SnapshotPartitionTests(TestCase):
+    def partition_of(self, record: AutocareRawRecord) -> str:
+        with connection.cursor() as cur:
+            cur.execute(
+                f"SELECT tableoid::regclass::text FROM {AutocareRawRecord._meta.db_table} WHERE id = %s",
+                [record.pk],
+            )
+            return cur.fetchone()[0]
+
+    def record(self, as_of: str) -> AutocareRawRecord:
+        return AutocareRawRecord.objects.create(
+            source_db="vcdb", endpoint_key="Make", request_path="/vcdb/Make", as_of_date=as_of, http_status=200
+        )
+
+    def test_pages_move_into_the_snapshot_partition(self):
+        record = self.record("2024-01-01")
+        self.assertEqual(self.partition_of(record), "autocare_autocarerawrecord_vcdb_default")
+
+        self.assertTrue(ensure_snapshot_partition("vcdb", "2024-01-01"))
+        self.assertFalse(ensure_snapshot_partition("vcdb", "2024-01-01"))
+        self.assertEqual(self.partition_of(record), snapshot_table("vcdb", "2024-01-01"))
+
+    def test_colliding_as_of_spelling_is_rejected(self):
+        ensure_snapshot_partition("vcdb", "2024-01-01")
+
+        with self.assertRaisesMessage(ValueError, "use '2024-01-01' instead"):
+            ensure_snapshot_partition("vcdb", "20240101")
+        with self.assertRaisesMessage(ValueError, "use '2024-01-01' instead"):
+            drop_snapshot_partition("vcdb", "20240101")
+        # The owning spelling still works
+        self.assertEqual(drop_snapshot_partition("vcdb", "2024-01-01"), snapshot_table("vcdb", "2024-01-01"))
@@ -0,0 +1,81 @@
+from django.test import TestCase
+
+from apps.autocare.core.models import AutocareRawBlob, AutocareRawRecord
+from apps.autocare.ingest.raw_store import (
+    attach_blobs,
+    compact_records,
+    decode_blob,
+    encode_blob,
+    load_payload,
+    prune_orphan_blobs,
+    storage_stats,
+)
+
+
+PAGE = [{"MakeID": 1, "MakeName": "Acura"}, {"MakeID": 2, "MakeName": "Audi"}]
+
+
+def raw_record(payload, page_number=1, as_of="2024-01-01") -> AutocareRawRecord:
+    return AutocareRawRecord(
+        source_db="vcdb",
+        endpoint_key="Make",
+        request_path="/vcdb/Make",
+        as_of_date=as_of,
+        page_number=page_number,
+        http_status=200,
+        record_count=len(payload),
+        payload=payload,
+    )
+
+
+def store(*records: AutocareRawRecord) -> list[AutocareRawRecord]:
+    records = attach_blobs(records)
+    AutocareRawRecord.objects.bulk_create(records)
+    return records
+
+
+class LoadPayloadTests(TestCase):
+    def test_deferred_body_is_read_but_not_kept(self):
+        store(raw_record(PAGE))
+        record = AutocareRawRecord.objects.select_related("blob").defer("blob__body").get()
+
+        self.assertEqual(load_payload(record), PAGE)
+        self.assertIn("body", record.blob.get_deferred_fields())
+
+
+class BlobStoreTests(TestCase):
+    def test_payload_round_trips_through_a_blob(self):
+        record = store(raw_record(PAGE))[0]
+
+        self.assertIsNone(record.payload)
+        self.assertEqual(load_payload(AutocareRawRecord.objects.get(pk=record.pk)), PAGE)
+
+    def test_identical_pages_share_one_blob(self):
+        first, second = store(raw_record(PAGE, as_of="2024-01-01"), raw_record(list(PAGE), as_of="2024-02-01"))
+
+        self.assertEqual(first.blob_id, second.blob_id)
+        self.assertEqual(AutocareRawBlob.objects.count(), 1)
+
+    def test_key_order_does_not_change_the_blob(self):
+        self.assertEqual(encode_blob({"a": 1, "b": 2}).sha256, encode_blob({"b": 2, "a": 1}).sha256)
+
+    def test_unknown_codec_is_rejected(self):
+        with self.assertRaises(ValueError):
+            decode_blob("gzip", b"")
+
+    def test_compact_moves_inline_payloads(self):
+        AutocareRawRecord.objects.bulk_create([raw_record(PAGE, page_number=n) for n in (1, 2, 3)])
+
+        self.assertEqual(compact_records(batch_size=2), 3)
+        self.assertFalse(AutocareRawRecord.objects.filter(payload__isnull=False).exists())
+        self.assertEqual(AutocareRawBlob.objects.count(), 1)
+        self.assertEqual([load_payload(r) for r in AutocareRawRecord.objects.all()], [PAGE] * 3)
+
+    def test_prune_keeps_referenced_blobs(self):
+        store(raw_record(PAGE))
+        orphan = store(raw_record([{"MakeID": 3}], page_number=2))[0]
+        AutocareRawRecord.objects.filter(pk=orphan.pk).delete()
+
+        self.assertEqual(prune_orphan_blobs(), 1)
+        self.assertEqual(list(AutocareRawBlob.objects.values_list("sha256", flat=True)), [encode_blob(PAGE).sha256])
+        self.assertEqual(storage_stats()["blobs"], 1)
@@ -0,0 +1,130 @@
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+
+from apps.autocare.domain import supersession
+from apps.autocare.domain.supersession import SupersessionGraph, build_graph
+
+
+class SupersessionGraphTests(SimpleTestCase):
+    def test_latest_successor_follows_the_chain(self):
+        graph = build_graph("v1", [(1, 2, "2020-01-01"), (2, 3, "2021-01-01")])
+
+        self.assertEqual(graph.current(1), 3)
+        self.assertEqual(graph.current(2), 3)
+        self.assertEqual(graph.current(3), 3)
+        self.assertTrue(graph.is_superseded(1))
+        self.assertFalse(graph.is_superseded(3))
+
+    def test_most_recent_replacement_wins(self):
+        graph = build_graph("v1", [(1, 2, "2020-01-01"), (1, 3, "2022-01-01"), (3, 4, "2023-01-01")])
+
+        self.assertEqual(graph.successors(1), [3, 2])
+        self.assertEqual(graph.current(1), 4)
+        self.assertEqual(graph.predecessors(3), [1])
+
+    def test_unknown_node_is_its_own_answer(self):
+        graph = build_graph("v1", [(1, 2, "")])
+
+        self.assertEqual(graph.current(99), 99)
+        self.assertEqual(graph.interchangeable(99), (99,))
+        self.assertNotIn(99, graph)
+
+    def test_equivalences_form_one_component(self):
+        graph = build_graph("v1", [], [(1, 2), (2, 3)])
+
+        self.assertEqual(graph.interchangeable(3), (1, 2, 3))
+        self.assertEqual(graph.component[3], 1)
+        self.assertEqual(graph.current(2), 2)
+
+    def test_reversed_supersession_is_a_component(self):
+        # 1 -> 2 and back again: a cycle, so both stand in for each other
+        # and the component exits through its only edge out
+        graph = build_graph("v1", [(1, 2, "2020-01-01"), (2, 1, "2021-01-01"), (2, 5, "2022-01-01")])
+
+        self.assertEqual(graph.interchangeable(1), (1, 2))
+        self.assertEqual(graph.current(1), 5)
+        self.assertEqual(graph.current(2), 5)
+        self.assertEqual(graph.interchangeable(5), (5,))
+
+    def test_equivalents_of_a_superseded_node_share_its_successor(self):
+        graph = build_graph("v1", [(1, 9, "2020-01-01")], [(1, 2)])
+
+        self.assertEqual(graph.current(2), 9)
+
+    def test_long_chain_does_not_recurse(self):
+        graph = build_graph("v1", [(n, n + 1, "") for n in range(5000)])
+
+        self.assertEqual(graph.current(0), 5000)
+
+    def test_refresh_recomputes_only_the_changed_region(self):
+        edges = {"replacements": [(1, 2, "2020-01-01"), (10, 11, "2020-01-01")]}
+
+        def load_edges(nodes):
+            return [e for e in edges["replacements"] if e[0] in nodes or e[1] in nodes], []
+
+        graph = build_graph("v1", edges["replacements"])
+        edges["replacements"] = [(1, 2, "2020-01-01"), (2, 3, "2021-01-01"), (10, 11, "2020-01-01")]
+        untouched = graph.members[graph.component[10]]
+
+        region = graph.refresh({3}, load_edges)
+
+        self.assertEqual(graph.current(1), 3)
+        self.assertEqual(graph.current(10), 11)
+        self.assertIs(graph.members[graph.component[10]], untouched)
+        self.assertEqual(region, 3)
+
+    def test_refresh_drops_removed_edges(self):
+        edges = {"replacements": [(1, 2, ""), (2, 3, "")]}
+
+        def load_edges(nodes):
+            return [e for e in edges["replacements"] if e[0] in nodes or e[1] in nodes], []
+
+        graph = build_graph("v1", edges["replacements"])
+        edges["replacements"] = [(1, 2, "")]
+
+        graph.refresh({3}, load_edges)
+
+        self.assertEqual(graph.current(1), 2)
+        self.assertNotIn(3, graph)
+
+    def test_dumps_loads_round_trip(self):
+        graph = build_graph(
+            "v1",
+            [(1, 2, "2020-01-01"), (2, 3, "2021-01-01")],
+            [(3, 4)],
+            related=[(7, 8)],
+        )
+
+        loaded = SupersessionGraph.loads(graph.dumps())
+
+        self.assertEqual(loaded.version, "v1")
+        self.assertEqual(loaded.current(1), graph.current(1))
+        self.assertEqual(loaded.interchangeable(4), (3, 4))
+        self.assertEqual(loaded.successors(2), [3])
+        self.assertEqual(loaded.related_to(7), [8])
+        self.assertEqual(loaded.latest, graph.latest)
+
+
+class SupersessionGenerationTests(TestCase):
+    def setUp(self):
+        cache.delete(supersession.GENERATION_KEY)
+
+    def test_version_is_stable_until_published(self):
+        first = supersession.current_version()
+
+        with self.assertNumQueries(0):
+            self.assertEqual(supersession.current_version(), first)
+
+    def test_publish_moves_the_generation(self):
+        graph = supersession.publish_snapshot(build_graph("gen-2", [(1, 2, "")]))
+
+        self.assertEqual(supersession.current_version(), "gen-2")
+        self.assertIs(supersession.get_graph(), graph)
+        self.assertEqual(supersession.current_terminology(1), 2)
+
+    def test_default_publish_builds_a_new_generation(self):
+        before = supersession.current_version()
+        graph = supersession.publish_snapshot()
+
+        self.assertNotEqual(graph.version, before)
+        self.assertEqual(supersession.current_version(), graph.version)
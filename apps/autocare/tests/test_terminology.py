@@ -0,0 +1,94 @@
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+
+from apps.autocare.domain import terminology
+from apps.autocare.domain.terminology import KEY_CHARS, PartTerminology, TerminologyIndex, build_index
+
+
+class TerminologyGenerationTests(TestCase):
+    def setUp(self):
+        cache.delete(terminology.GENERATION_KEY)
+
+    def test_version_is_stable_until_published(self):
+        first = terminology.current_version()
+
+        self.assertEqual(terminology.current_version(), first)
+
+        with self.assertNumQueries(0):
+            terminology.current_version()
+
+    def test_publish_moves_the_generation(self):
+        before = terminology.current_version()
+        index = terminology.publish_snapshot(build_index("gen-2", [PartTerminology(1896, "Brake Pad")]))
+
+        self.assertNotEqual(before, "gen-2")
+        self.assertEqual(terminology.current_version(), "gen-2")
+        self.assertIs(terminology.get_index(), index)
+
+    def test_default_publish_builds_a_new_generation(self):
+        before = terminology.current_version()
+        index = terminology.publish_snapshot()
+
+        self.assertNotEqual(index.version, before)
+        self.assertEqual(terminology.current_version(), index.version)
+
+
+TERMS = [
+    PartTerminology(1, "Brake Pad", description="Friction material for disc brakes"),
+    PartTerminology(2, "Disc Brake Pad Set", aliases=("Pad Kit",)),
+    PartTerminology(3, "Brake Rotor", aliases=("Disc",)),
+    PartTerminology(4, "Padlock", categories=(("Accessories", "Security"),)),
+]
+
+
+class TerminologyIndexTests(SimpleTestCase):
+    def setUp(self):
+        self.index = build_index("v1", TERMS)
+
+    def ids(self, prefix, **kwargs):
+        return [s.terminology.part_terminology_id for s in self.index.autocomplete(prefix, **kwargs)]
+
+    def test_whole_names_rank_before_later_words(self):
+        self.assertEqual(self.ids("brake"), [1, 3, 2])
+
+    def test_names_rank_before_aliases_then_shorter_names(self):
+        # "pad" starts name 4 and alias "Pad Kit" of 2; later words of 1 and 2 come after
+        self.assertEqual(self.ids("pad"), [4, 2, 1])
+
+    def test_each_part_type_appears_once_with_its_best_match(self):
+        suggestions = self.index.autocomplete("disc")
+
+        self.assertEqual([s.terminology.part_terminology_id for s in suggestions], [2, 3])
+        self.assertEqual((suggestions[1].matched, suggestions[1].source), ("Disc", "alias"))
+
+    def test_descriptions_only_when_asked_for(self):
+        self.assertEqual(self.ids("friction"), [])
+
+        suggestions = self.index.autocomplete("friction", descriptions=True)
+
+        self.assertEqual([s.source for s in suggestions], ["description"])
+
+    def test_limit(self):
+        self.assertEqual(self.ids("brake", limit=2), [1, 3])
+        self.assertEqual(self.ids("", limit=2), [])
+
+    def test_prefix_longer_than_the_key_is_checked_in_full(self):
+        long_name = "Brake " + "x" * KEY_CHARS
+        index = build_index("v1", [PartTerminology(1, long_name + " A"), PartTerminology(2, long_name + " B")])
+
+        found = index.autocomplete(long_name + " b")
+
+        self.assertEqual([s.terminology.part_terminology_id for s in found], [2])
+
+    def test_lookup_ignores_case_and_punctuation(self):
+        self.assertEqual([t.part_terminology_id for t in self.index.lookup("  brake-PAD ")], [1])
+        self.assertEqual([t.part_terminology_id for t in self.index.lookup("pad kit")], [2])
+        self.assertEqual(self.index.lookup("brake"), [])
+
+    def test_dumps_loads_round_trip(self):
+        loaded = TerminologyIndex.loads(self.index.dumps())
+
+        self.assertEqual(loaded.version, "v1")
+        self.assertEqual(loaded.terms, self.index.terms)
+        self.assertEqual(loaded.get(4).category_paths, ["Accessories > Security"])
+        self.assertEqual([s.terminology.part_terminology_id for s in loaded.autocomplete("pad")], [4, 2, 1])
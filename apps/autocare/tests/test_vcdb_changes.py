@@ -0,0 +1,217 @@
+import io
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from unittest import mock
+
+from django.apps import apps
+from django.test import TestCase
+
+from apps.autocare.core.models import AutocareRawRecord
+from apps.autocare.ingest import vcdb_changes
+from apps.autocare.ingest.plans import VCDB_CHANGES_SPEC
+from apps.autocare.ingest.vcdb_changes import (
+    ChangeSet,
+    TableChanges,
+    apply_changes,
+    fetch_changes,
+    last_applied_version,
+)
+from apps.autocare.tests.vcdb import base_vehicle, vehicle
+from apps.autocare.vcdb.models import VCdbChanges
+from apps.autocare.vcdb.models.drive_type import DriveType
+from apps.autocare.vcdb.models.power_output import PowerOutput
+from apps.autocare.vcdb.models.vehicle_to_drive_type import VehicleToDriveType
+
+
+SINCE = "2024-01-01"
+PAGE_SIZE = 100
+
+
+def at(day: str) -> datetime:
+    return datetime.fromisoformat(day).replace(tzinfo=timezone.utc)
+
+
+def change(table: str, row_id: int, action: str, day: str) -> dict:
+    return {"VersionDate": f"{day}T00:00:00", "TableName": table, "ID": row_id, "Action": action}
+
+
+def store_pull(spec, rows) -> None:
+    """One stored SinceDate page of ``spec``"""
+    AutocareRawRecord.objects.create(
+        source_db=spec.db,
+        endpoint_key=spec.key,
+        request_path=spec.request_path,
+        since_date=SINCE,
+        page_number=1,
+        page_size=PAGE_SIZE,
+        http_status=200,
+        payload=rows,
+    )
+
+
+def table_changes(name: str, rows=(), upsert_ids=(), delete_ids=()) -> TableChanges:
+    spec = next(s for s in vcdb_changes._table_specs().values() if s.django_model == name)
+    return TableChanges(
+        spec=spec,
+        model=apps.get_model(vcdb_changes.APP_LABEL, name),
+        upsert_ids=set(upsert_ids),
+        delete_ids=set(delete_ids),
+        rows=list(rows),
+    )
+
+
+def changeset(*tables: TableChanges, changes=()) -> ChangeSet:
+    return ChangeSet(
+        since=SINCE,
+        changes=[
+            VCdbChanges(version_date=at(day), table_name=table, vcdb_changes_id=row_id, action=action)
+            for table, row_id, action, day in changes
+        ],
+        tables={tc.model.__name__: tc for tc in tables},
+    )
+
+
+@mock.patch.object(vcdb_changes, "ingest_endpoint_concurrent", return_value=SimpleNamespace(failed_pages=[]))
+class FetchChangesTests(TestCase):
+    def fetch(self, after=None) -> ChangeSet:
+        return fetch_changes(client=None, since=SINCE, after=after, page_size=PAGE_SIZE)
+
+    def test_change_log_is_filtered_and_collapsed(self, pull):
+        store_pull(VCDB_CHANGES_SPEC, [
+            change("DriveType", 3, "A", "2023-12-01"),      # already applied
+            change("DriveType", 4, "A", "2024-02-01"),
+            change("DriveType", 4, "D", "2024-03-01"),      # added, then deleted
+            change("DriveType", 5, "D", "2024-02-01"),
+            change("drivetype", 5, "A", "2024-03-01"),      # deleted, then re-added
+            change("PowerOutput", 7, "C", "2024-02-01"),
+            change("PowerOutput", 9, "C", "2024-02-01"),
+            change("NotAVcdbTable", 1, "A", "2024-02-01"),
+        ])
+        store_pull(vcdb_changes._table_specs()["drivetype"], [
+            {"DriveTypeID": 5, "DriveTypeName": "AWD"},
+            {"DriveTypeID": 6, "DriveTypeName": "Not in the log"},
+        ])
+        store_pull(vcdb_changes._table_specs()["poweroutput"], [
+            {"PowerOutputID": 7, "HorsePower": "150", "KilowattPower": "112"},
+            {"PowerOutputID": 8, "HorsePower": "200", "KilowattPower": "149"},
+        ])
+
+        result = self.fetch(after=at("2024-01-01"))
+
+        self.assertEqual(len(result.changes), 7)
+        drive_types = result.tables["DriveType"]
+        self.assertEqual((drive_types.upsert_ids, drive_types.delete_ids), ({5}, {4}))
+        self.assertEqual([r.drive_type_id for r in drive_types.rows], [5])
+        # Surrogate id: matched on PowerOutputID, not the pk
+        self.assertEqual([r.power_output_id for r in result.tables["PowerOutput"].rows], [7])
+        self.assertEqual(result.missing, {"PowerOutput": {9}})
+        self.assertEqual(result.unknown_tables, {"NotAVcdbTable": 1})
+
+    def test_failed_change_log_pull_stops_early(self, pull):
+        pull.return_value = SimpleNamespace(failed_pages=[2])
+
+        result = self.fetch()
+
+        self.assertEqual(result.failed_pages, {VCDB_CHANGES_SPEC.key: [2]})
+        self.assertEqual(result.tables, {})
+        self.assertEqual(pull.call_count, 1)
+
+
+class ApplyChangesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        base_vehicle(100)
+        vehicle(1000, 100)
+        vehicle(1001, 100)
+        DriveType.objects.create(drive_type_id=1, drive_type_name="FWD")
+        DriveType.objects.create(drive_type_id=2, drive_type_name="RWD")
+        VehicleToDriveType.objects.create(vehicle_to_drive_type_id=10, vehicle_id=1000, drive_type_id=2)
+        PowerOutput.objects.create(power_output_id=5, horse_power="100", kilowatt_power="75")
+        VCdbChanges.objects.create(
+            version_date=at("2024-01-01"), table_name="DriveType", vcdb_changes_id=1, action="A"
+        )
+
+    def parent_child_changes(self) -> ChangeSet:
+        """Add drive type 3 with a vehicle on it; remove drive type 2 and its vehicle row"""
+        return changeset(
+            table_changes(
+                "VehicleToDriveType",
+                rows=[VehicleToDriveType(vehicle_to_drive_type_id=11, vehicle_id=1001, drive_type_id=3)],
+                upsert_ids={11},
+                delete_ids={10},
+            ),
+            table_changes(
+                "DriveType",
+                rows=[
+                    DriveType(drive_type_id=3, drive_type_name="AWD"),
+                    DriveType(drive_type_id=1, drive_type_name="Front"),
+                ],
+                upsert_ids={1, 3},
+                delete_ids={2},
+            ),
+            changes=[
+                ("DriveType", 1, "C", "2024-02-01"),
+                ("DriveType", 2, "D", "2024-02-01"),
+                ("DriveType", 3, "A", "2024-02-01"),
+                ("VehicleToDriveType", 10, "D", "2024-02-01"),
+                ("VehicleToDriveType", 11, "A", "2024-02-02"),
+            ],
+        )
+
+    def test_upserts_parents_first_and_deletes_children_first(self):
+        out = io.StringIO()
+
+        result = apply_changes(self.parent_child_changes(), stdout=out)
+
+        self.assertEqual(
+            sorted(DriveType.objects.values_list("drive_type_id", "drive_type_name")),
+            [(1, "Front"), (3, "AWD")],
+        )
+        self.assertEqual(
+            list(VehicleToDriveType.objects.values_list("vehicle_to_drive_type_id", "vehicle_id", "drive_type_id")),
+            [(11, 1001, 3)],
+        )
+        self.assertEqual(
+            out.getvalue().splitlines(),
+            [
+                "  ✔ DriveType: upserted 2",
+                "  ✔ VehicleToDriveType: upserted 1",
+                "  ✔ VehicleToDriveType: deleted 1",
+                "  ✔ DriveType: deleted 1",
+            ],
+        )
+        self.assertEqual(result.upserted, {"DriveType": 2, "VehicleToDriveType": 1})
+        self.assertEqual(result.deleted, {"DriveType": 1, "VehicleToDriveType": 1})
+
+    def test_touched_vehicles_before_and_after(self):
+        result = apply_changes(self.parent_child_changes())
+
+        self.assertEqual(result.touched_vehicles, {"VehicleToDriveType": {1000, 1001}})
+
+    def test_surrogate_key_table_replaces_the_changed_row(self):
+        apply_changes(changeset(
+            table_changes(
+                "PowerOutput",
+                rows=[PowerOutput(power_output_id=5, horse_power="150", kilowatt_power="112")],
+                upsert_ids={5},
+            ),
+            changes=[("PowerOutput", 5, "C", "2024-02-01")],
+        ))
+
+        self.assertEqual(list(PowerOutput.objects.values_list("power_output_id", "horse_power")), [(5, "150")])
+
+    def test_watermark_advances_with_the_changes(self):
+        result = apply_changes(self.parent_child_changes())
+
+        self.assertEqual(result.recorded, 5)
+        self.assertEqual(last_applied_version(), at("2024-02-02"))
+
+    def test_failed_apply_keeps_the_watermark(self):
+        with mock.patch.object(vcdb_changes, "_delete", side_effect=RuntimeError("boom")):
+            with self.assertRaises(RuntimeError):
+                apply_changes(self.parent_child_changes())
+
+        self.assertEqual(last_applied_version(), at("2024-01-01"))
+        self.assertEqual(VCdbChanges.objects.count(), 1)
+        self.assertFalse(DriveType.objects.filter(drive_type_id=3).exists())
+        self.assertEqual(DriveType.objects.get(drive_type_id=1).drive_type_name, "FWD")
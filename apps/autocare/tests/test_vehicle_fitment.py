@@ -0,0 +1,78 @@
+from django.test import TestCase
+
+from apps.autocare.query.aces import parts_for_vehicle, vehicle_configuration
+from apps.autocare.services.aces_fitment import refresh_fitment
+from apps.autocare.services.aces_ingest import ingest_aces_file
+from apps.autocare.tests.test_aces_ingest import write_xml
+from apps.autocare.tests.vcdb import base_vehicle, vehicle
+from apps.autocare.vcdb.models import BrakeABS, BrakeConfig, BrakeSystem, BrakeType, VehicleToBrakeConfig
+
+
+APPS = """<?xml version="1.0"?>
+<ACES version="4.2">
+  <App action="A" id="1">
+    <BaseVehicle id="100"/>
+    <Qty>1</Qty>
+    <PartType id="1896"/>
+    <Part BrandAAIAID="BBBB">ANY-BRAKE</Part>
+  </App>
+  <App action="A" id="2">
+    <BaseVehicle id="100"/>
+    <FrontBrakeType id="3"/>
+    <Qty>1</Qty>
+    <PartType id="1896"/>
+    <Part BrandAAIAID="BBBB">FRONT-DISC</Part>
+  </App>
+  <App action="A" id="3">
+    <BaseVehicle id="100"/>
+    <FrontBrakeType id="4"/>
+    <Qty>1</Qty>
+    <PartType id="1896"/>
+    <Part BrandAAIAID="BBBB">FRONT-DRUM</Part>
+  </App>
+  <App action="A" id="4">
+    <BaseVehicle id="200"/>
+    <Qty>1</Qty>
+    <PartType id="1896"/>
+    <Part BrandAAIAID="BBBB">OTHER-VEHICLE</Part>
+  </App>
+</ACES>
+"""
+
+
+class ReverseFitmentTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        base_vehicle(100)
+        base_vehicle(200)
+        vehicle(1000, 100)
+
+        BrakeType.objects.create(brake_type_id=3, brake_type_name="Disc")
+        BrakeType.objects.create(brake_type_id=4, brake_type_name="Drum")
+        BrakeSystem.objects.create(brake_system_id=1, brake_system_name="Power")
+        BrakeABS.objects.create(brake_abs_id=1, brake_abs_name="4-Wheel")
+        BrakeConfig.objects.create(
+            brake_config_id=1, front_brake_type_id=3, rear_brake_type_id=4, brake_system_id=1, brake_abs_id=1
+        )
+        VehicleToBrakeConfig.objects.create(vehicle_to_brake_config_id=1, vehicle_id=1000, brake_config_id=1)
+
+    def setUp(self):
+        path = write_xml(self, APPS)
+        ingest_aces_file(path, batch_size=100)
+        refresh_fitment(source_file=path)
+
+    def test_vehicle_configuration_reads_both_brake_types(self):
+        config = vehicle_configuration(1000)
+
+        self.assertEqual(config.attributes["front_brake_type"], {3})
+        self.assertEqual(config.attributes["rear_brake_type"], {4})
+
+    def test_parts_for_vehicle_matches_base_vehicle_and_attributes(self):
+        fitment = parts_for_vehicle(1000, use_cache=False)
+
+        numbers = sorted(m.part_number for m in fitment.parts[1896][None])
+        self.assertEqual(numbers, ["ANY-BRAKE", "FRONT-DISC"])
+
+    def test_unknown_vehicle(self):
+        self.assertIsNone(parts_for_vehicle(9999, use_cache=False))
+
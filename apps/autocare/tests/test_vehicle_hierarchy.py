@@ -0,0 +1,108 @@
+import zstandard
+from django.test import SimpleTestCase
+
+from apps.autocare.domain.vehicle_hierarchy import VehicleHierarchy, build_index
+
+
+# (year, make, model, base vehicle)
+BASE_VEHICLES = [
+    (2021, 1, 10, 500),
+    (2020, 2, 30, 300),
+    (2020, 1, 20, 200),
+    (2020, 1, 10, 100),
+    (2020, 1, 10, 101),     # duplicate Year/Make/Model: 100 wins
+    (2022, 1, 10, 600),     # no vehicles
+]
+
+# (base vehicle, submodel, vehicle)
+VEHICLES = [
+    (100, 7, 1002),
+    (100, 5, 1001),
+    (100, 7, 1003),
+    (200, 5, 2001),
+    (300, 9, 3001),
+    (500, 5, 5001),
+    (999, 5, 9001),         # unknown base vehicle
+]
+
+
+def hierarchy() -> VehicleHierarchy:
+    return build_index(
+        "v1",
+        BASE_VEHICLES,
+        VEHICLES,
+        make_names={1: "Acura", 2: "Audi"},
+        model_names={10: "ILX"},
+        submodel_names={5: "Base", 7: "Premium"},
+    )
+
+
+class VehicleHierarchyTests(SimpleTestCase):
+    def test_levels_are_sorted(self):
+        index = hierarchy()
+
+        self.assertEqual(index.years(), [2020, 2021, 2022])
+        self.assertEqual(index.makes(2020), [1, 2])
+        self.assertEqual(index.models(2020, 1), [10, 20])
+        self.assertEqual(index.submodels(2020, 1, 10), [5, 7])
+
+    def test_base_vehicle_per_year_make_model(self):
+        index = hierarchy()
+
+        self.assertEqual(index.base_vehicle_id(2020, 1, 10), 100)
+        self.assertEqual(index.base_vehicle_id(2020, 2, 30), 300)
+        self.assertEqual(index.base_vehicle_id(2022, 1, 10), 600)
+
+    def test_vehicle_ids(self):
+        index = hierarchy()
+
+        self.assertEqual(index.vehicle_ids(2020, 1, 10), [1001, 1002, 1003])
+        self.assertEqual(index.vehicle_ids(2020, 1, 10, submodel_id=7), [1002, 1003])
+        self.assertEqual(index.vehicle_ids(2022, 1, 10), [])
+        self.assertEqual(index.submodels(2022, 1, 10), [])
+        self.assertEqual(len(index), 6)
+
+    def test_unknown_keys(self):
+        index = hierarchy()
+
+        self.assertEqual(index.makes(1999), [])
+        self.assertEqual(index.models(2020, 99), [])
+        self.assertEqual(index.models(2021, 2), [])
+        self.assertEqual(index.submodels(2020, 1, 99), [])
+        self.assertIsNone(index.base_vehicle_id(2020, 2, 10))
+        self.assertEqual(index.vehicle_ids(2020, 1, 10, submodel_id=6), [])
+        self.assertEqual(index.vehicle_ids(2099, 1, 10), [])
+
+    def test_keys_between_existing_ones(self):
+        # bisect lands inside a parent's slice but on a different key
+        index = hierarchy()
+
+        self.assertIsNone(index.base_vehicle_id(2020, 1, 15))
+        self.assertEqual(index.submodels(2020, 1, 15), [])
+        # submodel 7 exists, but not under this model
+        self.assertEqual(index.vehicle_ids(2020, 1, 20, submodel_id=7), [])
+
+    def test_empty_index(self):
+        index = build_index("v0", [], [])
+
+        self.assertEqual(index.years(), [])
+        self.assertEqual(index.vehicle_ids(2020, 1, 10), [])
+        self.assertEqual(VehicleHierarchy.loads(index.dumps()).years(), [])
+
+    def test_dumps_loads_round_trip(self):
+        index = hierarchy()
+
+        loaded = VehicleHierarchy.loads(index.dumps())
+
+        self.assertEqual(loaded.version, "v1")
+        self.assertEqual(loaded.years(), index.years())
+        self.assertEqual(loaded.vehicle_ids(2020, 1, 10, submodel_id=7), [1002, 1003])
+        self.assertEqual(loaded.base_vehicle_id(2021, 1, 10), 500)
+        self.assertEqual(loaded.make_names, {1: "Acura", 2: "Audi"})
+        self.assertEqual(loaded.submodel_names[7], "Premium")
+        for name in ("year_keys", "make_start", "model_base", "sub_start", "vehicles"):
+            self.assertEqual(getattr(loaded, name), getattr(index, name))
+
+    def test_loads_rejects_other_snapshots(self):
+        with self.assertRaises(ValueError):
+            VehicleHierarchy.loads(zstandard.ZstdCompressor().compress(b"XXXX"))
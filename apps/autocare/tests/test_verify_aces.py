@@ -0,0 +1,84 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from apps.autocare.aces.models import AcesApp, AcesAppVehicle, AcesQualifier, AcesRawAttribute
+from apps.autocare.core.management.commands import verify_aces
+from apps.autocare.core.management.commands.verify_aces import (
+    _verify_cache_key,
+    compute_aces_metrics,
+    get_aces_metrics,
+    verify_aces_integrity,
+)
+from apps.autocare.services.aces_ingest import ingest_aces_file
+from apps.autocare.tests.test_aces_ingest import write_aces
+from apps.autocare.tests.vcdb import base_vehicle
+
+
+class AcesMetricsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        base_vehicle(100)
+
+    def setUp(self):
+        self.path = write_aces(self, ("A", 1, 100, "P1"), ("A", 2, 100, "P2"), ("A", 3, 100, "P3"))
+        ingest_aces_file(self.path, batch_size=100)
+        self.addCleanup(cache.delete, _verify_cache_key(self.path))
+
+    def app(self, app_id) -> AcesApp:
+        return AcesApp.objects.get(source_file=self.path, app_id=app_id)
+
+    def test_counts_with_one_aggregate_query(self):
+        AcesQualifier.objects.create(app=self.app(1), qual_id=10, qual_text="With ABS")
+        AcesRawAttribute.objects.create(app=self.app(1), attr_name="note", attr_value="Front")
+        AcesRawAttribute.objects.create(app=self.app(2), attr_name="note", attr_value="Rear")
+        AcesRawAttribute.objects.create(app=self.app(2), attr_name="EngineVIN", attr_id=5)
+
+        # The aggregate, plus the breakdown of the one unmapped attribute
+        with self.assertNumQueries(2):
+            metrics = compute_aces_metrics(self.path)
+
+        self.assertEqual(metrics["apps_total"], 3)
+        self.assertEqual(metrics["apps_with_vehicles"], 3)
+        self.assertEqual(metrics["apps_with_parts"], 3)
+        self.assertEqual((metrics["total_qualifiers"], metrics["apps_with_qualifiers"]), (1, 1))
+        self.assertEqual((metrics["total_notes"], metrics["apps_with_notes"]), (2, 2))
+        self.assertEqual((metrics["total_raw_attrs"], metrics["apps_with_raw_attrs"]), (1, 1))
+        self.assertEqual(metrics["raw_breakdown"], [{"attr_name": "EngineVIN", "count": 1}])
+        self.assertEqual(metrics["missing_vehicle_records"], [])
+
+    def test_missing_rows_are_sampled(self):
+        AcesAppVehicle.objects.filter(app__app_id__in=[2, 3]).delete()
+        AcesApp.objects.filter(app_id=3).update(part_number="")
+
+        with mock.patch.object(verify_aces, "MISSING_SAMPLE_LIMIT", 1):
+            metrics = compute_aces_metrics(self.path)
+
+        self.assertEqual(metrics["apps_with_vehicles"], 1)
+        self.assertEqual(metrics["missing_vehicle_records"], [2])
+        self.assertEqual(metrics["missing_parts"], [3])
+
+    def test_cached_until_the_file_is_reingested(self):
+        first = get_aces_metrics(self.path)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(get_aces_metrics(self.path), first)
+
+        ingest_aces_file(write_aces(self, ("A", 4, 100, "P4")), batch_size=100)
+        AcesApp.objects.filter(app_id=4).update(source_file=self.path)
+
+        self.assertEqual(get_aces_metrics(self.path)["apps_total"], 4)
+
+    def test_integrity_report(self):
+        AcesAppVehicle.objects.filter(app__app_id=2).delete()
+
+        results = verify_aces_integrity(self.path, verbose=False, use_cache=False)
+
+        self.assertEqual(results["issues"], ["1 apps missing vehicle records!"])
+        self.assertEqual(results["missing_vehicle_records"], [2])
+
+    def test_unknown_file(self):
+        results = verify_aces_integrity("missing.xml", verbose=False, use_cache=False)
+
+        self.assertEqual(results["issues"], ["No applications found for this source file!"])
@@ -0,0 +1,30 @@
+"""Minimal VCdb rows for tests that need real vehicle foreign keys"""
+
+from apps.autocare.vcdb.models.base_vehicle import BaseVehicle
+from apps.autocare.vcdb.models.make import Make
+from apps.autocare.vcdb.models.model import VehicleModel
+from apps.autocare.vcdb.models.region import Region
+from apps.autocare.vcdb.models.sub_model import SubModel
+from apps.autocare.vcdb.models.vehicle import Vehicle
+from apps.autocare.vcdb.models.vehicle_type import VehicleType
+from apps.autocare.vcdb.models.year import Year
+
+
+def base_vehicle(base_vehicle_id: int, year: int = 2020, make_id: int = 1, model_id: int = 1) -> BaseVehicle:
+    vehicle_type, _ = VehicleType.objects.get_or_create(vehicle_type_id=5, defaults={"vehicle_type_name": "Car"})
+    Year.objects.get_or_create(year_id=year)
+    Make.objects.get_or_create(make_id=make_id, defaults={"make_name": f"Make {make_id}"})
+    VehicleModel.objects.get_or_create(
+        model_id=model_id, defaults={"model_name": f"Model {model_id}", "vehicle_type": vehicle_type}
+    )
+    return BaseVehicle.objects.create(
+        base_vehicle_id=base_vehicle_id, vehicle_year_id=year, make_id=make_id, vehicle_model_id=model_id
+    )
+
+
+def vehicle(vehicle_id: int, base_vehicle_id: int, submodel_id: int = 1) -> Vehicle:
+    SubModel.objects.get_or_create(submodel_id=submodel_id, defaults={"sub_model_name": f"Sub {submodel_id}"})
+    Region.objects.get_or_create(region_id=1, defaults={"region_abbr": "US", "region_name": "United States"})
+    return Vehicle.objects.create(
+        vehicle_id=vehicle_id, base_vehicle_id=base_vehicle_id, sub_model_id=submodel_id, region_id=1
+    )
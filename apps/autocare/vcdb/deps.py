@@ -72,3 +72,41 @@ def topo_sort_models(app_label: str, model_names: List[str]) -> List[str]:
         raise ValueError(f"FK cycle detected among: {remaining}")
 
     return out
+
+
+def topo_levels(app_label: str, model_names: List[str]) -> List[List[str]]:
+    """
+    Kahn topo sort, grouped by wave.
+
+    Level 0 holds models with no in-set FK dependencies; every model in
+    level N depends only on models in levels < N, so the models within one
+    level can be loaded concurrently. Raises ValueError on a real cycle.
+    """
+    deps, rev = build_fk_graph(app_label, model_names)
+
+    indeg: Dict[str, int] = {n: len(deps[n]) for n in model_names}
+    order = {n: i for i, n in enumerate(model_names)}
+    level = [n for n in model_names if indeg[n] == 0]
+
+    out: List[List[str]] = []
+    placed = 0
+    while level:
+        out.append(level)
+        placed += len(level)
+
+        nxt: List[str] = []
+        for n in level:
+            for child in rev.get(n, ()):
+                indeg[child] -= 1
+                if indeg[child] == 0:
+                    nxt.append(child)
+
+        # Keep caller order within a level for stable output
+        level = sorted(nxt, key=order.__getitem__)
+
+    if placed != len(model_names):
+        done = {n for lvl in out for n in lvl}
+        remaining = [n for n in model_names if n not in done]
+        raise ValueError(f"FK cycle detected among: {remaining}")
+
+    return out
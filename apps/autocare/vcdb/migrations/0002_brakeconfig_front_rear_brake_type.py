@@ -0,0 +1,33 @@
+# Generated by Django 5.2.9 on 2026-10-18 06:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("autocare_vcdb", "0001_initial"),
+    ]
+
+    operations = [
+        # BrakeConfig declared brake_type twice, so only RearBrakeTypeID
+        # was ever created; the column keeps its name.
+        migrations.RenameField(
+            model_name="brakeconfig",
+            old_name="brake_type",
+            new_name="rear_brake_type",
+        ),
+        # Nullable so existing rows migrate; re-ingest BrakeConfig to fill it
+        migrations.AddField(
+            model_name="brakeconfig",
+            name="front_brake_type",
+            field=models.ForeignKey(
+                blank=True,
+                db_column="FrontBrakeTypeID",
+                null=True,
+                on_delete=django.db.models.deletion.DO_NOTHING,
+                to="autocare_vcdb.braketype",
+            ),
+        ),
+    ]
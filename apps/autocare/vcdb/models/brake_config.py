@@ -4,8 +4,8 @@ from apps.autocare.core.mixins import AutocareAPIMetadata
 
 class BrakeConfig(AutocareAPIMetadata, models.Model):
     brake_config_id = models.IntegerField(db_column='BrakeConfigID', primary_key=True)
-    brake_type = models.ForeignKey('autocare_vcdb.BrakeType', db_column='FrontBrakeTypeID', db_index=True, on_delete=models.DO_NOTHING)
-    brake_type = models.ForeignKey('autocare_vcdb.BrakeType', db_column='RearBrakeTypeID', related_name='brakeconfig_rearbraketypeid_set', db_index=True, on_delete=models.DO_NOTHING)
+    front_brake_type = models.ForeignKey('autocare_vcdb.BrakeType', db_column='FrontBrakeTypeID', blank=True, null=True, db_index=True, on_delete=models.DO_NOTHING)
+    rear_brake_type = models.ForeignKey('autocare_vcdb.BrakeType', db_column='RearBrakeTypeID', related_name='brakeconfig_rearbraketypeid_set', db_index=True, on_delete=models.DO_NOTHING)
     brake_system = models.ForeignKey('autocare_vcdb.BrakeSystem', db_column='BrakeSystemID', db_index=True, on_delete=models.DO_NOTHING)
     brake_abs = models.ForeignKey('autocare_vcdb.BrakeABS', db_column='BrakeABSID', db_index=True, on_delete=models.DO_NOTHING)
 
@@ -1,8 +1,32 @@
 from __future__ import annotations
 
-from typing import Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Any, Iterable, Optional
 
-from apps.autocare.api_client import AutocareAPIClient
+from django.db import models
+from django.utils import timezone
+
+from apps.autocare.api_client import AutocareAPIClient, AutocareAPIError
+from apps.autocare.core.models import VehicleLookupMiss
+
+
+# ---- HARD VCDB CONTRACT ----
+# These fields are NOT NULL in the official schema.
+REQUIRED_FIELDS = (
+    "VehicleID",
+    "BaseVehicleID",
+    "SubModelID",
+    "RegionID",
+    "PublicationStageID",
+    "PublicationStageDate",
+)
+
+NOT_FOUND_REASON = "Vehicle not present in bulk VCDB or UI endpoint"
+
+
+def _norm_key(s: str) -> str:
+    return s.replace("_", "").lower()
 
 
 class VehicleResolver:
@@ -16,10 +40,21 @@ class VehicleResolver:
       - relax NOT NULL constraints
 
     If a Vehicle cannot exist canonically, it is explicitly skipped.
+
+    Ids that 404 or come back non-canonical are remembered in
+    VehicleLookupMiss and not requested again (until ``miss_ttl`` passes,
+    if set).
     """
 
-    def __init__(self, api_client: AutocareAPIClient):
+    def __init__(
+        self,
+        api_client: AutocareAPIClient,
+        concurrency: int = 8,
+        miss_ttl: Optional[timedelta] = None,
+    ):
         self.client = api_client
+        self.concurrency = max(1, concurrency)
+        self.miss_ttl = miss_ttl
 
     # ---------------------------------------------------------
 
@@ -52,49 +87,127 @@ class VehicleResolver:
 
     # ---------------------------------------------------------
 
-    def ensure_vehicle_exists(self, VehicleModel, vehicle_id: int) -> tuple[bool, str]:
+    @staticmethod
+    def build_vehicle(VehicleModel, payload: dict[str, Any]) -> tuple[Optional[models.Model], str]:
         """
-        Ensure a Vehicle exists IF AND ONLY IF it satisfies VCDB schema.
+        Map a UI payload onto an unsaved Vehicle (IDs only, no FK objects).
+
+        Payload keys are matched to each field's db_column (or name)
+        ignoring case and underscores, e.g. "SubModelID" -> SubmodelID.
 
         Returns:
-            (True, "")        -> vehicle exists or was safely created
-            (False, reason)   -> vehicle is non-canonical and must be skipped
+            (vehicle, "")     -> canonical
+            (None, reason)    -> non-canonical
         """
+        for field in REQUIRED_FIELDS:
+            if payload.get(field) is None:
+                return None, f"UI vehicle missing required field {field}"
 
-        # Already present
-        if VehicleModel.objects.filter(vehicle_id=vehicle_id).exists():
-            return True, ""
-
-        payload = self.fetch_vehicle_json(vehicle_id)
-        if not payload:
-            return False, "Vehicle not present in bulk VCDB or UI endpoint"
-
-        # ---- HARD VCDB CONTRACT ----
-        # These fields are NOT NULL in the official schema.
-        required_fields = (
-            "VehicleID",
-            "BaseVehicleID",
-            "SubModelID",
-            "RegionID",
-            "PublicationStageID",
-            "PublicationStageDate",
-        )
+        by_key = {_norm_key(k): v for k, v in payload.items()}
 
-        for field in required_fields:
-            if payload.get(field) is None:
-                return False, f"UI vehicle missing required field {field}"
-
-        # ---- SAFE INSERT (IDs only, no FK objects) ----
-        VehicleModel.objects.create(
-            vehicle_id=payload["VehicleID"],
-            base_vehicle_id=payload["BaseVehicleID"],
-            submodel_id=payload["SubModelID"],
-            region_id=payload["RegionID"],
-            publication_stage_id=payload["PublicationStageID"],
-            publication_stage_source=payload.get("PublicationStageSource", ""),
-            publication_stage_date=payload["PublicationStageDate"],
-            effective_datetime=payload.get("EffectiveDateTime"),
-            end_datetime=payload.get("EndDateTime"),
+        kwargs = {}
+        for f in VehicleModel._meta.concrete_fields:
+            value = by_key.get(_norm_key(f.db_column or f.name))
+            if value is not None:
+                kwargs[f.attname] = value
+
+        return VehicleModel(**kwargs), ""
+
+    # ---------------------------------------------------------
+
+    def _cached_misses(self, vehicle_ids: Iterable[int]) -> dict[int, str]:
+        qs = VehicleLookupMiss.objects.filter(vehicle_id__in=list(vehicle_ids))
+        if self.miss_ttl is not None:
+            qs = qs.filter(checked_at__gte=timezone.now() - self.miss_ttl)
+        return dict(qs.values_list("vehicle_id", "reason"))
+
+    def _fetch_many(self, vehicle_ids: list[int]) -> dict[int, Any]:
+        """
+        Fetch vehicles with at most ``concurrency`` requests in flight.
+
+        Maps id -> payload dict, None (404) or the AutocareAPIError raised.
+        """
+
+        def _one(vid: int):
+            try:
+                return vid, self.fetch_vehicle_json(vid)
+            except (AutocareAPIError, ValueError, OSError) as exc:
+                return vid, exc
+
+        if self.concurrency == 1 or len(vehicle_ids) == 1:
+            return dict(map(_one, vehicle_ids))
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            return dict(pool.map(_one, vehicle_ids))
+
+    def ensure_vehicles_exist(self, VehicleModel, vehicle_ids: Iterable[int]) -> dict[int, str]:
+        """
+        Batch form of ensure_vehicle_exists.
+
+        Only ids not already in VehicleModel or the miss cache are fetched.
+        Canonical vehicles are inserted with one bulk INSERT; 404s and
+        non-canonical payloads are recorded in VehicleLookupMiss. Transient
+        API errors are reported but not cached.
+
+        Returns {vehicle_id: reason} for every id that is still missing.
+        """
+        wanted = {int(v) for v in vehicle_ids}
+        if not wanted:
+            return {}
+
+        existing = set(
+            VehicleModel.objects.filter(vehicle_id__in=wanted).values_list("vehicle_id", flat=True)
         )
+        unresolved = self._cached_misses(wanted - existing)
+
+        todo = sorted(wanted - existing - unresolved.keys())
+        if not todo:
+            return unresolved
+
+        vehicles: list[models.Model] = []
+        misses: list[VehicleLookupMiss] = []
+
+        for vid, result in self._fetch_many(todo).items():
+            if isinstance(result, Exception):
+                unresolved[vid] = f"UI lookup failed: {result}"
+                continue
+
+            if not result:
+                status, reason = VehicleLookupMiss.NOT_FOUND, NOT_FOUND_REASON
+            else:
+                vehicle, reason = self.build_vehicle(VehicleModel, result)
+                if vehicle is not None:
+                    vehicles.append(vehicle)
+                    continue
+                status = VehicleLookupMiss.NON_CANONICAL
+
+            unresolved[vid] = reason
+            misses.append(VehicleLookupMiss(vehicle_id=vid, status=status, reason=reason[:255]))
+
+        if vehicles:
+            VehicleModel.objects.bulk_create(vehicles, ignore_conflicts=True)
 
+        if misses:
+            VehicleLookupMiss.objects.bulk_create(
+                misses,
+                update_conflicts=True,
+                unique_fields=["vehicle_id"],
+                update_fields=["status", "reason", "checked_at"],
+            )
+
+        return unresolved
+
+    # ---------------------------------------------------------
+
+    def ensure_vehicle_exists(self, VehicleModel, vehicle_id: int) -> tuple[bool, str]:
+        """
+        Ensure a Vehicle exists IF AND ONLY IF it satisfies VCDB schema.
+
+        Returns:
+            (True, "")        -> vehicle exists or was safely created
+            (False, reason)   -> vehicle is non-canonical and must be skipped
+        """
+        reason = self.ensure_vehicles_exist(VehicleModel, [vehicle_id]).get(int(vehicle_id))
+        if reason is not None:
+            return False, reason
         return True, ""
@@ -1,13 +1,18 @@
 """
 Signals for the products application.
 
-Handles automatic updates like search vector updates.
+Handles automatic updates like search vector updates and schedules
+rebuilds of the interchange/replacement index.
 """
 from django.contrib.postgres.search import SearchVector
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
-from .models import Product
+from apps.autocare.domain import interchange
+
+from .models import Product, ProductInterchange, ProductRelationship
+from .tasks import rebuild_interchange_index
 
 
 @receiver(post_save, sender=Product)
@@ -24,3 +29,58 @@ def update_product_search_vector(sender, instance, **kwargs):
     Product.objects.filter(pk=instance.pk).update(
         search_vector=SearchVector('part_number', 'name', 'description', 'manufacturer_part_number')
     )
+
+
+def _schedule_interchange_rebuild():
+    """Rebuild the interchange index once this change commits (debounced)"""
+    def schedule():
+        if interchange.request_rebuild():
+            rebuild_interchange_index.apply_async(countdown=interchange.REBUILD_DELAY)
+
+    transaction.on_commit(schedule)
+
+
+@receiver([post_save, post_delete], sender=ProductInterchange)
+def update_interchange_numbers(sender, instance, **kwargs):
+    """
+    Rebuild the interchange index when an interchange number changes.
+
+    Args:
+        sender: The ProductInterchange model class
+        instance: The ProductInterchange instance saved or deleted
+        **kwargs: Additional keyword arguments
+    """
+    _schedule_interchange_rebuild()
+
+
+@receiver([post_save, post_delete], sender=ProductRelationship)
+def update_interchange_relationships(sender, instance, **kwargs):
+    """
+    Rebuild the interchange index when a relationship changes.
+
+    Args:
+        sender: The ProductRelationship model class
+        instance: The ProductRelationship instance saved or deleted
+        **kwargs: Additional keyword arguments
+    """
+    # Also on other types: the relationship may have been retyped
+    _schedule_interchange_rebuild()
+
+
+@receiver([post_save, post_delete], sender=Product)
+def update_interchange_products(sender, instance, update_fields=None, **kwargs):
+    """
+    Rebuild the interchange index when a part number may have changed.
+
+    Part numbers are keys of the index and decide which interchange
+    numbers link two products.
+
+    Args:
+        sender: The Product model class
+        instance: The Product instance saved or deleted
+        update_fields: Fields saved, if the save was limited to some
+        **kwargs: Additional keyword arguments
+    """
+    if update_fields is not None and 'part_number' not in update_fields:
+        return
+    _schedule_interchange_rebuild()
@@ -97,3 +97,19 @@ def generate_product_report():
     cache.set("product_stats", stats, timeout=3600)
 
     return stats
+
+
+@shared_task(bind=True, max_retries=None)
+def rebuild_interchange_index(self):
+    """
+    Rebuild and publish the product interchange/replacement index.
+    Scheduled (debounced) by the product signals.
+    """
+    from apps.autocare.domain import interchange
+
+    index = interchange.rebuild_snapshot()
+    if index is None:
+        # Another rebuild is running; run again after it
+        raise self.retry(countdown=interchange.REBUILD_DELAY)
+
+    return f"Published interchange index {index.version} ({len(index.graph):,} linked products)"
@@ -450,6 +450,8 @@ AUTOCARE_CLIENT_SECRET = env("AUTOCARE_CLIENT_SECRET", default="")
 AUTOCARE_USERNAME = env("AUTOCARE_USERNAME", default="")
 AUTOCARE_PASSWORD = env("AUTOCARE_PASSWORD", default="")
 AUTOCARE_SCOPE = env("AUTOCARE_SCOPE", default="")
+# Seconds before expiry at which the shared OAuth token is refreshed
+AUTOCARE_OAUTH_REFRESH_MARGIN = env("AUTOCARE_OAUTH_REFRESH_MARGIN", default=300, cast=int)
 
 AUTOCARE_API_HOSTS = {
     "vcdb": "https://vcdb.autocarevip.com",